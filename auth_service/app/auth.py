@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt, JWTError
@@ -11,6 +12,7 @@ from .config import settings
 from .database import get_db
 from .models import User, UserRole
 from .schemas import TokenPayload
+from . import revocation
 
 # --- Hashing Context ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -37,7 +39,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
+    # jti identifies this token so it can be revoked on its own (logout)
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def create_refresh_token(data: dict) -> str:
@@ -62,6 +65,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
+    if revocation.is_revoked(payload.get("jti"), str(user_id), payload.get("iat")):
+        raise credentials_exception
+
     user = db.query(User).filter(User.id == token_data.sub).first()
     if user is None:
         raise credentials_exception
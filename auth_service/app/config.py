@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,10 +9,37 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     REDIS_URL: str
 
+    # --- DATABASE POOL SETTINGS ---
+    DB_CONNECTION_BUDGET: int = 20  # Connections one replica may hold; split across uvicorn workers
+    DB_POOL_SIZE: int = 0  # 0 = derive from DB_CONNECTION_BUDGET
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 2.0  # Fail fast with a 503 instead of queueing behind a saturated pool
+    DB_POOL_RECYCLE: int = 1800
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
+    # --- PROFILING SETTINGS ---
+    PROFILING_ENABLED: bool = False  # Installs the profiling middleware and /admin/profiling routes
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_MAX_CONCURRENT: int = 2  # Samplers running at once per process
+    PROFILING_TOKEN_TTL_SECONDS: int = 600
+    PROFILING_RETENTION_SECONDS: int = 3600
+
+    SERVICE_NAME: str = "auth_service"  # Namespaces shared Redis keys
+
     # --- NEW KAFKA SETTINGS ---
     KAFKA_BOOTSTRAP_SERVERS: str = "kafka:9092"
     KAFKA_PROPERTY_TOPIC: str = "property_updates"
 
     model_config = SettingsConfigDict(env_file="../../booking-service/.env",extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+class _LazySettings:
+    """Reads the environment on first attribute access instead of at import time."""
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+settings = _LazySettings()
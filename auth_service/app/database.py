@@ -1,11 +1,102 @@
+import os
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 from redis import Redis, ConnectionPool
 from .config import settings
 
+
+# --- Pool Telemetry ---
+class PoolMetrics:
+    """Checkout wait and timeout counters for one named pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_avg = 0.0  # Exponentially weighted, so it tracks the current load
+        self.wait_ms_max = 0.0
+        self.updated_at = time.monotonic()
+
+    def record_wait(self, wait_ms: float):
+        self.checkouts += 1
+        self.updated_at = time.monotonic()
+        self.wait_ms_avg = wait_ms if self.checkouts == 1 else 0.9 * self.wait_ms_avg + 0.1 * wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+
+pool_metrics: dict = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        # Keyed by logging name so the counters survive pool.recreate()
+        self.metrics = pool_metrics.setdefault(kw.get("logging_name") or "default", PoolMetrics())
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000)
+
+
 # --- PostgreSQL Setup ---
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _api_pool_size() -> int:
+    """
+    Pool size for request handlers. When DB_POOL_SIZE is not set, the per-replica
+    connection budget is split across uvicorn workers.
+    """
+    if settings.DB_POOL_SIZE > 0:
+        return settings.DB_POOL_SIZE
+    workers = max(int(os.environ.get("WEB_CONCURRENCY", "1")), 1)
+    per_process = settings.DB_CONNECTION_BUDGET // workers
+    return max(per_process - settings.DB_MAX_OVERFLOW, 1)
+
+
+def _create_engine(name: str, pool_size: int, max_overflow: int, pool_timeout: float):
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer does the pooling; holding connections here would pin server connections
+        return create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    return create_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+# The engine is created by init_engines() from the app lifespan, so importing the app never touches the database
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def init_engines():
+    """Creates the connection pool and binds the session factory. Safe to call more than once."""
+    global engine
+    if engine is not None:
+        return
+    engine = _create_engine("api", _api_pool_size(), settings.DB_MAX_OVERFLOW, settings.DB_POOL_TIMEOUT)
+    SessionLocal.configure(bind=engine)
+
+
+def dispose_engines():
+    global engine
+    if engine is not None:
+        engine.dispose()
+    engine = None
+
 
 def get_db():
     db = SessionLocal()
@@ -14,11 +105,41 @@ def get_db():
     finally:
         db.close()
 
+
+def pool_stats() -> dict:
+    """Saturation snapshot of every connection pool in this process."""
+    stats = {}
+    for name, eng in (("api", engine),):
+        if eng is None:
+            continue
+        pool = eng.pool
+        if not isinstance(pool, QueuePool):
+            stats[name] = {"pool": type(pool).__name__}
+            continue
+        capacity = pool.size() + pool._max_overflow
+        metrics = pool_metrics.get(name, PoolMetrics())
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_ms_avg": round(metrics.wait_ms_avg, 3),
+            "wait_ms_max": round(metrics.wait_ms_max, 3),
+        }
+    return stats
+
+
 # --- Redis Setup ---
-redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
+redis_pool = None
 
 def get_redis_client():
     """Dependency to get a Redis client from the connection pool."""
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
     return Redis(connection_pool=redis_pool)
 
 Base = declarative_base()
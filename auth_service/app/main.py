@@ -1,33 +1,39 @@
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import redis.asyncio as redis
-from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import auth_router
-from .database import engine
-from . import models
+from .routers import auth_router, profiling_router
+from .database import init_engines, dispose_engines, pool_stats
 from .config import settings
+from . import rate_limit, profiling
 
 # Set up a logger
 logger = logging.getLogger("auth_service")
 
-# Create tables on startup
-models.Base.metadata.create_all(bind=engine)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Auth Service starting up...")
 
+    # Connection pools are created here rather than at import, so workers start without touching the DB
+    init_engines()
+
     # --- Initialize Redis for Rate Limiting ---
     redis_client = None
     try:
         redis_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        await FastAPILimiter.init(redis_client)
-        logger.info("FastAPILimiter initialized.")
+        rate_limit.init(redis_client)
+        logger.info("Rate limiter initialized.")
     except Exception as e:
-        logger.error(f"Failed to initialize FastAPILimiter: {e}")
+        logger.error(f"Failed to initialize rate limiter Redis client: {e}")
+
+    # --- On-demand profiling (admin only) ---
+    if settings.PROFILING_ENABLED:
+        profiling.enable()
+        app.include_router(profiling_router.router)
 
     yield  # Application runs here
 
@@ -35,6 +41,9 @@ async def lifespan(app: FastAPI):
     if redis_client:
         await redis_client.close()
 
+    dispose_engines()
+
+
 app = FastAPI(
     title="Auth Service API",
     version="1.0.0",
@@ -49,8 +58,25 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+app.add_middleware(profiling.ProfilingMiddleware)  # Pass-through unless PROFILING_ENABLED
+
 app.include_router(auth_router.router)
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # The connection pool is saturated: shed the request quickly instead of cascading timeouts
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    return pool_stats()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Auth Service"}
\ No newline at end of file
@@ -0,0 +1,145 @@
+import itertools
+import logging
+import math
+import time
+from typing import Awaitable, Callable
+from fastapi import HTTPException, Request, Response, status
+
+logger = logging.getLogger("rate_limit")
+
+# Async Redis client shared by every limiter; set from the app lifespan via init()
+_redis = None
+# After a failed sync, skip Redis until this monotonic time instead of paying a connect error per request
+_redis_retry_at = 0.0
+REDIS_RETRY_SECONDS = 5.0
+
+
+def init(redis_client) -> None:
+    global _redis
+    _redis = redis_client
+
+
+async def default_identifier(request: Request) -> str:
+    """Keys authenticated requests by user id (set by get_current_user), anonymous ones by client IP."""
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        return f"user:{user_id}"
+    ip = request.headers.get("X-Real-IP") or (request.client.host if request.client else "unknown")
+    return f"ip:{ip}"
+
+
+class _Bucket:
+    __slots__ = ("window", "used", "unsynced", "synced_at")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.used = 0  # Best estimate of hits in this window across all workers
+        self.unsynced = 0  # Local hits not yet pushed to Redis
+        self.synced_at = time.monotonic()  # The sync interval runs from the bucket's first hit
+
+
+class RateLimiter:
+    """
+    Fixed-window rate limiter with a local bucket per worker, reconciled with Redis.
+
+    Well below the limit, hits are only counted in memory and pushed to the shared
+    Redis counter every `sync_every` hits or `sync_interval` seconds, which also
+    refreshes the global estimate. Every other worker may be holding up to a batch of
+    unsynced hits the estimate cannot see, so once it comes within `sync_every` of
+    `exact_threshold` of the limit, every hit goes to Redis and the limit itself is
+    enforced exactly. Limits no larger than one batch are therefore always exact.
+    If Redis is unavailable the local count is enforced on its own.
+    """
+
+    MAX_TRACKED_KEYS = 10_000
+    EVICT_FRACTION = 0.1  # Share of the oldest buckets dropped when still full after pruning
+
+    def __init__(
+        self,
+        times: int,
+        milliseconds: int = 0,
+        seconds: int = 0,
+        minutes: int = 0,
+        hours: int = 0,
+        identifier: Callable[[Request], Awaitable[str]] = default_identifier,
+        sync_every: int = 10,
+        sync_interval: float = 1.0,
+        exact_threshold: float = 0.8,
+    ):
+        self.times = times
+        self.window_ms = milliseconds + 1000 * seconds + 60_000 * minutes + 3_600_000 * hours
+        self.identifier = identifier
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.exact_threshold = exact_threshold
+        self.exact_from = max(0.0, times * exact_threshold - sync_every)
+        self.buckets: dict = {}
+
+    async def __call__(self, request: Request, response: Response):
+        global _redis_retry_at
+        key = await self.identifier(request)
+        now_ms = time.time() * 1000
+        window = int(now_ms // self.window_ms)
+        retry_after = math.ceil(((window + 1) * self.window_ms - now_ms) / 1000)
+
+        bucket = self.buckets.get(key)
+        if bucket is None or bucket.window != window:
+            if len(self.buckets) >= self.MAX_TRACKED_KEYS:
+                self._evict(window)
+            bucket = self.buckets[key] = _Bucket(window)
+
+        if bucket.used >= self.times:
+            self._reject(retry_after)
+        bucket.used += 1
+        bucket.unsynced += 1
+
+        now = time.monotonic()
+        if _redis is None or now < _redis_retry_at:
+            return
+        near_limit = bucket.used >= self.exact_from
+        if not (near_limit or bucket.unsynced >= self.sync_every or now - bucket.synced_at >= self.sync_interval):
+            return
+
+        # Take the hits before awaiting: concurrent requests on this bucket keep counting into
+        # `unsynced` meanwhile and are neither wiped by this push nor pushed twice
+        hits, bucket.unsynced = bucket.unsynced, 0
+        try:
+            total = await self._push(self._redis_key(request, key, window), hits)
+        except Exception as e:
+            bucket.unsynced += hits
+            _redis_retry_at = now + REDIS_RETRY_SECONDS
+            logger.error(f"Rate limiter sync failed, enforcing local count only: {e}")
+            return
+        bucket.used = total + bucket.unsynced  # Plus hits counted while the push was in flight
+        bucket.synced_at = now
+        if total > self.times:
+            self._reject(retry_after)
+
+    async def _push(self, redis_key: str, hits: int) -> int:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(redis_key, hits)
+            pipe.pexpire(redis_key, self.window_ms)
+            total, _ = await pipe.execute()
+        return int(total)
+
+    def _redis_key(self, request: Request, key: str, window: int) -> str:
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        return f"ratelimit:{request.method}:{path}:{key}:{window}"
+
+    def _evict(self, window: int) -> None:
+        self.buckets = {k: b for k, b in self.buckets.items() if b.window == window}
+        if len(self.buckets) < self.MAX_TRACKED_KEYS:
+            return
+        # Still full within one window: drop the oldest buckets in one go, so the next
+        # new keys do not each pay for a full scan. Redis keeps their synced hits.
+        for key in list(itertools.islice(self.buckets, int(self.MAX_TRACKED_KEYS * self.EVICT_FRACTION) or 1)):
+            del self.buckets[key]
+
+    @staticmethod
+    def _reject(retry_after: int):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too Many Requests",
+            headers={"Retry-After": str(retry_after)},
+        )
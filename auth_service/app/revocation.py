@@ -0,0 +1,62 @@
+import json
+import logging
+import time
+from typing import Optional
+
+from .config import settings
+from .database import get_redis_client
+
+logger = logging.getLogger("revocation")
+
+# --- Access Token Revocation ---
+# Access tokens are checked statelessly by the other services, so revoking one means telling them.
+# Revocations are written to two Redis sorted sets (the snapshot services resync from) and then
+# announced on a pub/sub channel (how services hear about them within milliseconds):
+#   revoked:tokens  jti     -> token expiry; the entry is useless once the token expires
+#   revoked:users   user id -> revocation time; every token of that user issued up to then is revoked
+# The key and channel names are shared with revocation.py in booking_service and events_service.
+REVOKED_TOKENS_KEY = "revoked:tokens"
+REVOKED_USERS_KEY = "revoked:users"
+REVOCATION_CHANNEL = "revocations"
+
+
+def _publish(kind: str, member: str, score: float) -> None:
+    now = time.time()
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.zadd(REVOKED_TOKENS_KEY if kind == "token" else REVOKED_USERS_KEY, {member: score})
+    # Prune entries that can no longer match an unexpired token
+    pipe.zremrangebyscore(REVOKED_TOKENS_KEY, 0, now)
+    pipe.zremrangebyscore(REVOKED_USERS_KEY, 0, now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    pipe.publish(REVOCATION_CHANNEL, json.dumps({"kind": kind, "id": member, "at": score}))
+    pipe.execute()
+
+
+def revoke_token(jti: str, expires_at: float) -> None:
+    """Revokes one access token (logout)."""
+    _publish("token", jti, expires_at)
+    logger.info(f"Revoked token {jti}")
+
+
+def revoke_user(user_id: int) -> None:
+    """Revokes every access token issued to the user so far (ban, password reset, logout everywhere)."""
+    _publish("user", str(user_id), time.time())
+    logger.info(f"Revoked all tokens of user {user_id}")
+
+
+def is_revoked(jti: Optional[str], user_id: str, issued_at: Optional[float]) -> bool:
+    """
+    Auth's own check. Auth already loads the user from the DB on every request, so two ZSCOREs are
+    cheap here; the stateless services use the in-memory copy instead. Fails open if Redis is down,
+    like the rate limiter.
+    """
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.zscore(REVOKED_TOKENS_KEY, jti or "")
+        pipe.zscore(REVOKED_USERS_KEY, user_id)
+        token_revoked, user_revoked_at = pipe.execute()
+    except Exception as e:
+        logger.error(f"Revocation check skipped, Redis unavailable: {e}")
+        return False
+    if jti and token_revoked is not None:
+        return True
+    return user_revoked_at is not None and (issued_at or 0) <= user_revoked_at
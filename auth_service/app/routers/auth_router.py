@@ -5,11 +5,11 @@ from typing import Annotated, Optional
 import bcrypt
 from jose import jwt, JWTError
 
-from .. import schemas, crud, auth, models
+from .. import schemas, crud, auth, models, revocation
 from ..auth import create_refresh_token
 from ..database import get_db
 from ..config import settings
-from fastapi_limiter.depends import RateLimiter
+from ..rate_limit import RateLimiter
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -106,3 +106,50 @@ def refresh_access_token(
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
 
+# --- Revocation ---
+def _publish_revocation(revoke, *args):
+    try:
+        revoke(*args)
+    except Exception as e:
+        revocation.logger.error(f"Failed to publish revocation: {e}")
+        # The refresh token is already gone; the caller should retry so the access token goes too
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation unavailable, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    response: Response,
+    token: str = Depends(auth.oauth2_scheme),
+    user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ends this session: revokes the presented access token and the refresh token."""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    user.refresh_token_hash = None
+    db.commit()
+    response.delete_cookie("refresh_token")
+
+    if payload.get("jti"):
+        _publish_revocation(revocation.revoke_token, payload["jti"], payload["exp"])
+    else:
+        # Tokens issued before jti existed can only be revoked together
+        _publish_revocation(revocation.revoke_user, user.id)
+
+
+@router.post("/users/{user_id}/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_user_tokens(
+    user_id: int,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(auth.get_current_admin_user)
+):
+    """Signs a user out everywhere (ban, compromised account): every token issued so far stops working."""
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.refresh_token_hash = None
+    db.commit()
+    _publish_revocation(revocation.revoke_user, user.id)
@@ -3,7 +3,7 @@ import pytest
 from fastapi.testclient import TestClient # Client to make API requests to your app
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from unittest.mock import MagicMock, AsyncMock # For creating mock objects
+from unittest.mock import MagicMock # For creating mock objects
 
 # Import your actual application code
 from app.main import app # The main FastAPI application instance
@@ -23,17 +23,6 @@ engine = create_engine(
 # Create a session factory specifically for testing, bound to the test engine
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# --- Mocking External Services ---
-@pytest.fixture(scope="function", autouse=True)
-def mock_kafka_consumer(mocker):
-    """Mocks the Kafka consumer startup event."""
-    # This fixture runs automatically for every test (`autouse=True`)
-    # `mocker` is a fixture provided by pytest-mock
-    # `mocker.patch` replaces the real `consume_property_updates` function
-    # with an `AsyncMock`. This prevents the real function (which tries
-    # to connect to Kafka) from running during tests.
-    mocker.patch("app.kafka_consumer.consume_property_updates", new_callable=AsyncMock)
-
 # --- Database Management Fixtures ---
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
@@ -67,13 +56,7 @@ def db_session():
 def client(db_session,mocker):
     """Provides a FastAPI TestClient configured for testing."""
     # This fixture depends on the `db_session` fixture above
-
-    # --- THIS IS THE KAFKA FIX ---
-    # Patch the consumer *before* the TestClient is created.
-    # This prevents the lifespan manager from starting the real consumer.
-    mocker.patch("app.main.consume_property_updates", new_callable=AsyncMock)
-
-    # --- END OF FIX ---
+    # auth_service runs no Kafka consumer, so the lifespan needs nothing patched
 
     def override_get_db():
         """Dependency override for get_db."""
@@ -0,0 +1,37 @@
+# Unit tests for the on-demand profiler (no HTTP, no Redis needed)
+import threading
+import time
+from app import profiling
+
+def test_profile_token_roundtrip():
+    """A freshly issued token verifies."""
+    token = profiling.issue_token(60)
+    assert profiling.verify_token(token) is True
+
+def test_profile_token_tampered_or_expired():
+    """Tokens with a forged signature, a past expiry or a bad shape are rejected."""
+    expires, signature = profiling.issue_token(60).split(".", 1)
+    assert profiling.verify_token(f"{int(expires) + 1}.{signature}") is False
+    assert profiling.verify_token(profiling.issue_token(-1)) is False
+    assert profiling.verify_token("not-a-token") is False
+
+def test_sampler_produces_folded_stacks():
+    """Every output line is 'frame;frame;... count', rooted at the thread name."""
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="busy-worker")
+    worker.start()
+    profiler = profiling.SamplingProfiler(0.001)
+    profiler.start()
+    time.sleep(0.05)
+    folded = profiler.stop()
+    stop.set()
+    worker.join()
+
+    lines = folded.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(line.startswith("busy-worker;") for line in lines)
+    # The sampler never records itself
+    assert not any(line.startswith("profiler;") for line in lines)
@@ -0,0 +1,154 @@
+# Tests for the worker-local rate limiter and its Redis reconciliation
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import rate_limit
+from app.rate_limit import RateLimiter
+
+@pytest.fixture(autouse=True)
+def reset_redis(monkeypatch):
+    """Each test starts without a shared Redis client and without a failover in progress."""
+    monkeypatch.setattr(rate_limit, "_redis", None)
+    monkeypatch.setattr(rate_limit, "_redis_retry_at", 0.0)
+
+def _request(ip: str) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/bookings", "query_string": b"",
+                    "headers": [(b"x-real-ip", ip.encode())], "scheme": "http", "server": ("testserver", 80)})
+
+def _limiter(times: int, **kwargs) -> RateLimiter:
+    return RateLimiter(times=times, hours=1, **kwargs)
+
+def _hit(limiter: RateLimiter, ip: str = "10.0.0.1") -> bool:
+    """Returns True if the hit was admitted."""
+    try:
+        asyncio.run(limiter(_request(ip), None))
+        return True
+    except HTTPException as e:
+        assert e.status_code == 429
+        assert int(e.headers["Retry-After"]) > 0
+        return False
+
+def test_local_only_enforces_the_limit_per_worker():
+    limiter = _limiter(times=3)
+    assert [_hit(limiter) for _ in range(5)] == [True, True, True, False, False]
+
+def test_local_only_counts_clients_separately():
+    limiter = _limiter(times=1)
+    assert _hit(limiter, "10.0.0.1") and _hit(limiter, "10.0.0.2")
+    assert not _hit(limiter, "10.0.0.1")
+
+def test_small_limit_is_exact_across_workers():
+    """A limit no larger than one sync batch goes through Redis on every hit, whatever the local estimate."""
+    rate_limit.init(fakeredis.FakeAsyncRedis())
+    workers = [_limiter(times=5) for _ in range(4)]
+    # Interleaved hits, so no single worker's local count gets anywhere near the limit
+    admitted = sum(_hit(workers[i % 4]) for i in range(20))
+    assert admitted == 5
+
+def test_large_limit_syncs_in_batches():
+    """Well below the limit, hits reach Redis every sync_every hits rather than one by one."""
+    redis_client = fakeredis.FakeAsyncRedis()
+    rate_limit.init(redis_client)
+    limiter = _limiter(times=1000, sync_every=10, sync_interval=3600)
+    for _ in range(9):
+        assert _hit(limiter)
+
+    async def shared_count():
+        keys = await redis_client.keys("ratelimit:*")
+        return sum([int(await redis_client.get(key)) for key in keys])
+
+    assert asyncio.run(shared_count()) == 0
+    assert _hit(limiter)
+    assert asyncio.run(shared_count()) == 10
+
+def test_large_limit_overshoot_is_bounded_across_workers():
+    """Exact checks start a sync batch early, so other workers' unsynced hits cannot push far past the limit."""
+    rate_limit.init(fakeredis.FakeAsyncRedis())
+    workers = [_limiter(times=50, sync_every=10, sync_interval=3600) for _ in range(4)]
+    admitted = sum(_hit(workers[i % 4]) for i in range(200))
+    assert 50 <= admitted <= 50 + 4 * 10
+
+def test_redis_failure_falls_back_to_the_local_count(mocker):
+    """A failed sync is logged once, Redis is skipped for a while, and the local count keeps enforcing the limit."""
+    broken = mocker.MagicMock()
+    broken.pipeline.side_effect = ConnectionError("redis down")
+    rate_limit.init(broken)
+    limiter = _limiter(times=3)
+
+    assert [_hit(limiter) for _ in range(5)] == [True, True, True, False, False]
+    assert broken.pipeline.call_count == 1
+    assert rate_limit._redis_retry_at > 0
+
+def test_redis_is_retried_after_the_failover_period(mocker):
+    broken = mocker.MagicMock()
+    broken.pipeline.side_effect = ConnectionError("redis down")
+    rate_limit.init(broken)
+    limiter = _limiter(times=100)
+    _hit(limiter)
+
+    # Redis is back and the retry period is over
+    rate_limit.init(fakeredis.FakeAsyncRedis())
+    rate_limit._redis_retry_at = 0.0
+    limiter.exact_from = 0  # Sync on this hit
+    assert _hit(limiter)
+    assert limiter.buckets["ip:10.0.0.1"].unsynced == 0
+    assert limiter.buckets["ip:10.0.0.1"].used == 2  # Hits made during the outage were pushed too
+
+def _hit_concurrently(limiter: RateLimiter, count: int) -> list:
+    """Sends `count` hits from one client at the same time; returns True for each admitted hit."""
+    async def hit():
+        try:
+            await limiter(_request("10.0.0.1"), None)
+            return True
+        except HTTPException:
+            return False
+
+    async def run():
+        return await asyncio.gather(*(hit() for _ in range(count)))
+    return asyncio.run(run())
+
+def test_hits_made_while_a_sync_is_in_flight_are_counted_once(mocker):
+    """A second request landing while the first one's push is awaited is neither lost nor pushed twice."""
+    redis_client = fakeredis.FakeAsyncRedis()
+    rate_limit.init(redis_client)
+    limiter = _limiter(times=100, exact_threshold=0)  # Every hit syncs
+    push = limiter._push
+    pushed = []
+
+    async def slow_push(redis_key, hits):
+        pushed.append(hits)
+        await asyncio.sleep(0.01)  # Let the other request run in the meantime
+        return await push(redis_key, hits)
+
+    mocker.patch.object(limiter, "_push", side_effect=slow_push)
+    assert _hit_concurrently(limiter, 2) == [True, True]
+
+    assert pushed == [1, 1]
+    bucket = limiter.buckets["ip:10.0.0.1"]
+    assert (bucket.used, bucket.unsynced) == (2, 0)
+
+def test_hits_of_a_failed_sync_are_kept_for_the_next_one(mocker):
+    rate_limit.init(fakeredis.FakeAsyncRedis())
+    limiter = _limiter(times=100, exact_threshold=0)
+
+    async def failing_push(redis_key, hits):
+        await asyncio.sleep(0.01)
+        raise ConnectionError("redis down")
+
+    mocker.patch.object(limiter, "_push", side_effect=failing_push)
+    _hit_concurrently(limiter, 2)
+
+    # Both pushes failed: neither hit is lost, they wait for the next sync
+    assert limiter.buckets["ip:10.0.0.1"].unsynced == 2
+
+def test_buckets_are_evicted_within_one_window():
+    limiter = _limiter(times=10)
+    limiter.MAX_TRACKED_KEYS = 100
+    for i in range(1000):
+        _hit(limiter, f"10.0.{i // 256}.{i % 256}")
+    assert len(limiter.buckets) <= 100
+    assert "ip:10.0.3.231" in limiter.buckets  # The newest client is still tracked
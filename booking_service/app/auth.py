@@ -1,15 +1,16 @@
 # FastTicket/events_service/app/auth.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from .config import settings
+from .revocation import revocations
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost:8000/auth/login") # Point to Auth Service
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
     """
     Stateless validation. Decodes JWT and returns payload.
-    Does NOT query the database.
+    Does NOT query the database; revocation is checked against the in-memory copy.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -23,7 +24,19 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         role: str = payload.get("role")
         if user_id is None:
             raise credentials_exception
+        if revocations.is_revoked(payload.get("jti"), str(user_id), payload.get("iat")):
+            raise credentials_exception
+        # Lets the rate limiter key this request by user instead of IP
+        request.state.user_id = user_id
         # Return a simple dict instead of a DB model
         return {"id": user_id, "role": role, "sub": str(user_id)}
     except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+
+def get_current_admin_user(user: dict = Depends(get_current_user)):
+    if user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation requires administrator privileges",
+        )
+    return user
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from aiokafka import AIOKafkaProducer
+from sqlalchemy.orm import Session  # Needed for the relay
+
+from .database import WorkerSessionLocal  # Worker pool for the relay
+from . import models
+from .config import settings
+from .coordination import run_partitioned
+from .kafka_consumer import consume_confirmations
+from .tracing import start_span, kafka_headers
+
+logger = logging.getLogger("booking_background")
+
+
+# --- BACKGROUND TASK: THE OUTBOX RELAY ---
+async def outbox_relay(producer: AIOKafkaProducer, partition: int = 0, partitions: int = 1):
+    """
+    Periodically checks the Outbox table for pending messages of one partition (id % partitions)
+    and sends them to Kafka.
+    """
+    logger.info(f"Outbox Relay started for partition {partition}/{partitions}.")
+    while True:
+        try:
+            # 1. Create a new DB session
+            db: Session = WorkerSessionLocal()
+            try:
+                # 2. Fetch pending messages (limit 10 to avoid overloading)
+                # Rows locked by another relay are skipped, even if a lease handover ever overlaps
+                messages = (
+                    db.query(models.Outbox)
+                    .filter(models.Outbox.status == "PENDING", models.Outbox.id % partitions == partition)
+                    .order_by(models.Outbox.id)
+                    .limit(10)
+                    .with_for_update(skip_locked=True)
+                    .all()
+                )
+
+                for msg in messages:
+                    # Continue the trace stored with the row; the queue time shows how long it sat in the outbox
+                    with start_span("outbox_relay.send", traceparent=msg.trace_context,
+                                    outbox_id=msg.id, topic=msg.topic) as span:
+                        if msg.created_at:
+                            queued_ms = (datetime.now(timezone.utc) - msg.created_at).total_seconds() * 1000
+                            span.set_attribute("outbox.queued_ms", round(queued_ms, 3))
+                        try:
+                            logger.info(f"Relaying message {msg.id} to topic {msg.topic}")
+                            # 3. Send to Kafka, propagating the trace context as a message header
+                            await producer.send_and_wait(
+                                msg.topic,
+                                msg.payload,
+                                headers=kafka_headers()
+                            )
+
+                            # 4. Mark as PROCESSED
+                            msg.status = "PROCESSED"
+                        except Exception as e:
+                            logger.error(f"Failed to relay message {msg.id}: {e}")
+                            span.status = "ERROR"
+                            msg.retry_count += 1
+                            # Optional: Mark FAILED if retries > 5
+
+                db.commit()
+            finally:
+                db.close()
+
+        except Exception as e:
+            logger.error(f"Outbox Relay crashed: {e}")
+
+        # Sleep for a bit before checking again
+        await asyncio.sleep(5)
+
+
+async def start_background_tasks(redis_client) -> Tuple[List[asyncio.Task], Optional[AIOKafkaProducer]]:
+    """Starts the outbox relay and the confirmation consumer. Used by the API lifespan and by app.worker."""
+    tasks = []
+
+    # Kafka Producer Init
+    producer = AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
+    try:
+        await producer.start()
+        logger.info("Kafka Producer started.")
+
+        # START THE RELAY: outbox rows are split into partitions, each relayed by whichever process holds its lease
+        partitions = settings.OUTBOX_RELAY_PARTITIONS
+        tasks.append(run_partitioned(
+            redis_client, "outbox-relay", partitions,
+            lambda partition: outbox_relay(producer, partition, partitions)
+        ))
+    except Exception as e:
+        logger.error(f"Failed to start Kafka Producer: {e}")
+        producer = None
+
+    # The consumer group already splits topic partitions between processes
+    tasks.append(asyncio.create_task(consume_confirmations()))
+    return tasks, producer
+
+
+async def stop_background_tasks(tasks: List[asyncio.Task], producer: Optional[AIOKafkaProducer]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    logger.info("Background tasks stopped.")
+    if producer:
+        await producer.stop()
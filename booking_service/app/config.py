@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,11 +9,84 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     REDIS_URL: str
 
+    # --- DATABASE POOL SETTINGS ---
+    DB_CONNECTION_BUDGET: int = 20  # Connections one replica may hold; split across uvicorn workers
+    DB_POOL_SIZE: int = 0  # 0 = derive from DB_CONNECTION_BUDGET
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 2.0  # Fail fast with a 503 instead of queueing behind a saturated pool
+    DB_POOL_RECYCLE: int = 1800
+    DB_WORKER_POOL_SIZE: int = 0  # 0 = one per outbox relay partition, plus the confirmation consumer and load monitor
+    DB_WORKER_MAX_OVERFLOW: int = 1
+    DB_WORKER_POOL_TIMEOUT: float = 30.0
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
     # --- KAFKA SETTINGS ---
     KAFKA_BOOTSTRAP_SERVERS: str = "kafka:9092"
     KAFKA_BOOKING_TOPIC: str = "booking_events"
     KAFKA_CONFIRMATION_TOPIC: str = "booking_confirmations"
+    KAFKA_CANCELLATION_TOPIC: str = "booking_cancellations"
+
+    # --- LOAD SHEDDING SETTINGS ---
+    SHED_LOOP_LAG_MS: float = 250.0
+    SHED_POOL_WAIT_MS: float = 500.0
+    SHED_OUTBOX_BACKLOG: int = 5000
+    SHED_NON_CRITICAL_FACTOR: float = 0.5  # Non-critical routes shed at this fraction of the thresholds
+    SHED_SIGNAL_HALF_LIFE_SECONDS: float = 1.0
+    SHED_RETRY_AFTER_SECONDS: int = 2
+
+    # --- BACKGROUND TASK SETTINGS ---
+    RUN_BACKGROUND_TASKS: bool = True  # False: API only; run `python -m app.worker` separately
+    LEASE_TTL_SECONDS: float = 15.0
+    OUTBOX_RELAY_PARTITIONS: int = 4  # Outbox rows are relayed by id % partitions, one lease each
+
+    # --- GROUP COMMIT SETTINGS ---
+    GROUP_COMMIT_ENABLED: bool = False  # Batch concurrent bookings into one transaction
+    GROUP_COMMIT_WINDOW_MS: float = 2.0
+    GROUP_COMMIT_MAX_BATCH: int = 100
+
+    # --- RESERVATION FAST PATH SETTINGS ---
+    FAST_PATH_ENABLED: bool = False  # Ask events_service inline; the outbox saga stays the fallback
+    EVENTS_INTERNAL_URL: str = "http://events_service:8000"
+    INTERNAL_API_TOKEN: str = ""  # Must match events_service
+    FAST_PATH_TIMEOUT_MS: float = 200.0
+    FAST_PATH_MAX_CONNECTIONS: int = 50  # Keep-alive connections to events_service per process
+    FAST_PATH_COOLDOWN_SECONDS: float = 5.0  # After a failure, skip the fast path for this long
+
+    # --- EXPORT SETTINGS ---
+    EXPORT_CHUNK_SIZE: int = 5000  # Rows fetched per server-side cursor round trip
+    EXPORT_MAX_CONCURRENT: int = 2  # Per process; each export holds one connection of its own pool
+    EXPORT_RETRY_AFTER_SECONDS: int = 30
+
+    # --- TOKEN REVOCATION SETTINGS ---
+    REVOCATION_RESYNC_SECONDS: float = 30.0  # Full snapshot reload, on top of pub/sub updates
+    REVOCATION_RETRY_SECONDS: float = 2.0
+
+    # --- PROFILING SETTINGS ---
+    PROFILING_ENABLED: bool = False  # Installs the profiling middleware and /admin/profiling routes
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_MAX_CONCURRENT: int = 2  # Samplers running at once per process
+    PROFILING_TOKEN_TTL_SECONDS: int = 600
+    PROFILING_RETENTION_SECONDS: int = 3600
+    PROFILING_SIGNAL_SECONDS: int = 30  # Length of the profile `kill -USR1` takes of app.worker
+
+    # --- TRACING SETTINGS ---
+    SERVICE_NAME: str = "booking_service"
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01  # Share of new traces recorded; continued traces follow the caller's decision
+    TRACE_EXPORT_PATH: str = "/var/log/fastticket/traces.jsonl"
+    TRACE_EXPORT_MAX_BYTES: int = 50 * 1024 * 1024  # Rotated at this size
+    TRACE_EXPORT_BACKUP_COUNT: int = 3
 
     model_config = SettingsConfigDict(env_file="../../booking-service/.env",extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+class _LazySettings:
+    """Reads the environment on first attribute access instead of at import time."""
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+settings = _LazySettings()
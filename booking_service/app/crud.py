@@ -1,11 +1,132 @@
+import base64
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.orm import Session
-from . import models
+from . import models, messages
+from .config import settings
+
+# Statuses a confirmation may move a booking to, by its current status. Replies can arrive more
+# than once and out of order, so only forward moves apply: a late WAITLISTED must never demote a
+# booking its PROMOTED confirmation already confirmed. A cancellation is final: events_service
+# releases whatever a late confirmation would have granted.
+STATUS_TRANSITIONS = {
+    "PENDING": ("CONFIRMED", "REJECTED", "WAITLISTED"),
+    "WAITLISTED": ("CONFIRMED", "REJECTED"),
+}
+
 
 def update_booking_status(db: Session, booking_id: int, status: str):
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
-    if booking:
+    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).with_for_update().first()
+    if booking and status in STATUS_TRANSITIONS.get(booking.status, ()):
         booking.status = status
         db.commit()
         db.refresh(booking)
         return booking
-    return None
\ No newline at end of file
+    return None
+
+
+def resolve_pending_booking(db: Session, booking_id: int, status: str) -> str:
+    """
+    Applies the fast path's outcome, but only to a booking that is still PENDING: a confirmation
+    from the saga or a cancellation that got there first is at least as recent. Returns the status.
+    """
+    updated = db.execute(
+        update(models.Booking)
+        .where(models.Booking.id == booking_id, models.Booking.status == "PENDING")
+        .values(status=status)
+    ).rowcount
+    db.commit()
+    if updated:
+        return status
+    return db.scalar(select(models.Booking.status).where(models.Booking.id == booking_id))
+
+
+CANCELLABLE_STATUSES = ("PENDING", "CONFIRMED", "WAITLISTED")
+
+
+def cancel_booking(db: Session, booking: models.Booking, traceparent: Optional[str] = None) -> models.Booking:
+    """
+    Marks the booking CANCELLED and queues a BookingCancelled message in the same transaction,
+    so events_service always learns about it. The caller has locked the booking row.
+    """
+    message = messages.BookingCancelled(
+        booking_id=booking.id,
+        event_id=booking.event_id,
+        user_id=booking.user_id,
+        previous_status=booking.status,
+    )
+    booking.status = "CANCELLED"
+    db.add(models.Outbox(
+        topic=settings.KAFKA_CANCELLATION_TOPIC,
+        payload=messages.encode(message),
+        status="PENDING",
+        trace_context=traceparent
+    ))
+    db.commit()
+    db.refresh(booking)
+    return booking
+
+
+# --- Listing ---
+def encode_booking_cursor(created_at: datetime, booking_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{booking_id}".encode()).decode()
+
+
+def decode_booking_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a malformed cursor."""
+    created_at, booking_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(booking_id)
+
+
+def list_bookings(db: Session, limit: int, cursor: Optional[str] = None, user_id: Optional[int] = None,
+                  event_id: Optional[int] = None, status: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """
+    Returns a page of bookings, newest first, and the cursor of the next page.
+    Pages are keyset-paginated on (created_at, id), so each one is a single range scan of
+    ix_bookings_user_created (by user), ix_bookings_event_status_created (by event and status)
+    or ix_bookings_event_created (by event).
+    """
+    stmt = select(models.Booking)
+    if user_id is not None:
+        stmt = stmt.where(models.Booking.user_id == user_id)
+    if event_id is not None:
+        stmt = stmt.where(models.Booking.event_id == event_id)
+    if status is not None:
+        stmt = stmt.where(models.Booking.status == status)
+    if cursor:
+        created_at, booking_id = decode_booking_cursor(cursor)
+        stmt = stmt.where(tuple_(models.Booking.created_at, models.Booking.id) < tuple_(created_at, booking_id))
+
+    # Fetch one extra row to know whether there is a next page
+    stmt = stmt.order_by(models.Booking.created_at.desc(), models.Booking.id.desc()).limit(limit + 1)
+    bookings = db.scalars(stmt).all()
+
+    next_cursor = None
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        next_cursor = encode_booking_cursor(bookings[-1].created_at, bookings[-1].id)
+    return bookings, next_cursor
+
+
+# --- Export ---
+EXPORT_COLUMNS = (
+    models.Booking.id,
+    models.Booking.user_id,
+    models.Booking.event_id,
+    models.Booking.status,
+    models.Booking.created_at,
+)
+
+
+def iter_booking_export(db: Session, event_id: int, chunk_size: int, status: Optional[str] = None) -> Iterator[list]:
+    """
+    Yields all bookings of an event as lists of at most `chunk_size` rows, oldest first.
+    Rows come from a server-side cursor as plain tuples, so memory stays constant however large the event.
+    """
+    stmt = select(*EXPORT_COLUMNS).where(models.Booking.event_id == event_id)
+    if status is not None:
+        stmt = stmt.where(models.Booking.status == status)
+    stmt = stmt.order_by(models.Booking.created_at, models.Booking.id).execution_options(yield_per=chunk_size)
+    for partition in db.execute(stmt).partitions():
+        yield partition
@@ -1,11 +1,126 @@
+import os
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 from redis import Redis, ConnectionPool
 from .config import settings
 
+
+# --- Pool Telemetry ---
+class PoolMetrics:
+    """Checkout wait and timeout counters for one named pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_avg = 0.0  # Exponentially weighted, so it tracks the current load
+        self.wait_ms_max = 0.0
+        self.updated_at = time.monotonic()
+
+    def record_wait(self, wait_ms: float):
+        self.checkouts += 1
+        self.updated_at = time.monotonic()
+        self.wait_ms_avg = wait_ms if self.checkouts == 1 else 0.9 * self.wait_ms_avg + 0.1 * wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+
+pool_metrics: dict = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        # Keyed by logging name so the counters survive pool.recreate()
+        self.metrics = pool_metrics.setdefault(kw.get("logging_name") or "default", PoolMetrics())
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000)
+
+
 # --- PostgreSQL Setup ---
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _api_pool_size() -> int:
+    """
+    Pool size for request handlers. When DB_POOL_SIZE is not set, the per-replica
+    connection budget is split across uvicorn workers, minus what the background workers hold.
+    """
+    if settings.DB_POOL_SIZE > 0:
+        return settings.DB_POOL_SIZE
+    workers = max(int(os.environ.get("WEB_CONCURRENCY", "1")), 1)
+    per_process = settings.DB_CONNECTION_BUDGET // workers
+    reserved = (_worker_pool_size() + settings.DB_WORKER_MAX_OVERFLOW + settings.DB_MAX_OVERFLOW
+                + settings.EXPORT_MAX_CONCURRENT)
+    return max(per_process - reserved, 1)
+
+
+def _worker_pool_size() -> int:
+    """
+    Pool size for background work. Each relay partition this process holds keeps a connection
+    (and its row locks) across the Kafka send, so the pool grows with the partition count;
+    the confirmation consumer and the load monitor's backlog count need one each on top.
+    """
+    if settings.DB_WORKER_POOL_SIZE > 0:
+        return settings.DB_WORKER_POOL_SIZE
+    return settings.OUTBOX_RELAY_PARTITIONS + 2
+
+
+def _create_engine(name: str, pool_size: int, max_overflow: int, pool_timeout: float):
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer does the pooling; holding connections here would pin server connections
+        return create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    return create_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+# Engines are created by init_engines() from the app lifespan, so importing the app never touches the database
+engine = None  # Request handlers
+worker_engine = None  # Background workers (outbox relay, Kafka consumers) get their own pool so they can't starve the API
+export_engine = None  # Exports hold a connection for a whole download, so they can starve neither of the above
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ExportSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def init_engines():
+    """Creates the connection pools and binds the session factories. Safe to call more than once."""
+    global engine, worker_engine, export_engine
+    if engine is not None:
+        return
+    engine = _create_engine("api", _api_pool_size(), settings.DB_MAX_OVERFLOW, settings.DB_POOL_TIMEOUT)
+    worker_engine = _create_engine("worker", _worker_pool_size(), settings.DB_WORKER_MAX_OVERFLOW,
+                                   settings.DB_WORKER_POOL_TIMEOUT)
+    # One connection per export slot; export.start_export() turns requests away before they would wait
+    export_engine = _create_engine("export", settings.EXPORT_MAX_CONCURRENT, 0, settings.DB_POOL_TIMEOUT)
+    SessionLocal.configure(bind=engine)
+    WorkerSessionLocal.configure(bind=worker_engine)
+    ExportSessionLocal.configure(bind=export_engine)
+
+
+def dispose_engines():
+    global engine, worker_engine, export_engine
+    for eng in (engine, worker_engine, export_engine):
+        if eng is not None:
+            eng.dispose()
+    engine = worker_engine = export_engine = None
+
 
 def get_db():
     db = SessionLocal()
@@ -14,11 +129,41 @@ def get_db():
     finally:
         db.close()
 
+
+def pool_stats() -> dict:
+    """Saturation snapshot of every connection pool in this process."""
+    stats = {}
+    for name, eng in (("api", engine), ("worker", worker_engine), ("export", export_engine)):
+        if eng is None:
+            continue
+        pool = eng.pool
+        if not isinstance(pool, QueuePool):
+            stats[name] = {"pool": type(pool).__name__}
+            continue
+        capacity = pool.size() + pool._max_overflow
+        metrics = pool_metrics.get(name, PoolMetrics())
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_ms_avg": round(metrics.wait_ms_avg, 3),
+            "wait_ms_max": round(metrics.wait_ms_max, 3),
+        }
+    return stats
+
+
 # --- Redis Setup ---
-redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
+redis_pool = None
 
 def get_redis_client():
     """Dependency to get a Redis client from the connection pool."""
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
     return Redis(connection_pool=redis_pool)
 
 Base = declarative_base()
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import logging
+import threading
+import zlib
+from typing import Iterator, Optional
+
+from . import crud
+from .config import settings
+from .database import ExportSessionLocal
+
+logger = logging.getLogger("booking_export")
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+HEADER = ["id", "user_id", "event_id", "status", "created_at"]
+
+# Export slots in this process; created on first use so settings are read after startup
+_slots: Optional[threading.BoundedSemaphore] = None
+_slots_lock = threading.Lock()
+
+
+def _export_slots() -> threading.BoundedSemaphore:
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.EXPORT_MAX_CONCURRENT)
+        return _slots
+
+
+def _csv_chunk(rows: list, include_header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(HEADER)
+    writer.writerows((id_, user_id, event_id, status, created_at.isoformat())
+                     for id_, user_id, event_id, status, created_at in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunk(rows: list) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(HEADER, (id_, user_id, event_id, status, created_at.isoformat())))) + "\n"
+        for id_, user_id, event_id, status, created_at in rows
+    ).encode("utf-8")
+
+
+def start_export(event_id: int, status: Optional[str], fmt: str, compress: bool) -> Optional[Iterator[bytes]]:
+    """
+    Takes one of EXPORT_MAX_CONCURRENT slots and returns the body for a StreamingResponse,
+    or None if every slot is in use.
+    """
+    slot = _export_slots()
+    if not slot.acquire(blocking=False):
+        return None
+    stream = stream_bookings(event_id, status, fmt, compress, slot)
+    # Run up to the first yield, inside the try block: from here on, closing the stream
+    # releases the slot, even if the client disconnects before the body is read
+    next(stream)
+    return stream
+
+
+def stream_bookings(event_id: int, status: Optional[str], fmt: str, compress: bool,
+                    slot: threading.BoundedSemaphore) -> Iterator[bytes]:
+    """
+    Generator body for a StreamingResponse: one encoded (and optionally gzipped) block per cursor chunk.
+    It is synchronous, so Starlette iterates it in the thread pool and the event loop is never blocked.
+    The export holds its connection for its whole duration, so it uses a pool of its own, sized to the slots.
+    """
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    db = None
+    try:
+        yield b""  # Consumed by start_export()
+        db = ExportSessionLocal()
+        first = True
+        for rows in crud.iter_booking_export(db, event_id, settings.EXPORT_CHUNK_SIZE, status):
+            data = _csv_chunk(rows, first) if fmt == "csv" else _ndjson_chunk(rows)
+            first = False
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if fmt == "csv" and first:
+            # Empty export: still a valid CSV with its header
+            data = _csv_chunk([], True)
+            yield compressor.compress(data) if compressor else data
+        if compressor:
+            yield compressor.flush()
+    except Exception as e:
+        # Headers are already sent, so the client sees a truncated body rather than an error status
+        logger.error(f"Booking export for event {event_id} failed mid-stream: {e}")
+        raise
+    finally:
+        if db is not None:
+            db.close()
+        slot.release()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, messages
+from .config import settings
+from .database import SessionLocal
+from .tracing import start_span
+
+logger = logging.getLogger("group_commit")
+
+BOOKING_COLUMNS = (
+    models.Booking.id,
+    models.Booking.user_id,
+    models.Booking.event_id,
+    models.Booking.status,
+    models.Booking.created_at,
+)
+
+
+@dataclass
+class _PendingBooking:
+    user_id: int
+    event_id: int
+    join_waitlist: bool
+    traceparent: Optional[str]
+    future: asyncio.Future = field(repr=False)
+
+
+class GroupCommitter:
+    """
+    Gathers concurrent book_ticket calls into one transaction (group commit).
+
+    The first booking to arrive opens a window of GROUP_COMMIT_WINDOW_MS. Everything queued
+    by then (up to GROUP_COMMIT_MAX_BATCH) is written with one multi-row INSERT into bookings
+    and one into outbox, and committed with a single WAL flush. While a batch commits, the
+    next one accumulates. Each booking and its outbox row always share a transaction, so
+    per-request atomicity is unchanged. If a batch is rejected for its data, its bookings are
+    retried one by one, so a single bad request cannot fail its neighbours. Any other failure
+    (pool timeout, lost connection) fails the whole batch at once: retrying row by row would only
+    hold up every booking queued behind it.
+    """
+
+    def __init__(self):
+        self.window = 0.0
+        self.max_batch = 1
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.window = settings.GROUP_COMMIT_WINDOW_MS / 1000
+        self.max_batch = settings.GROUP_COMMIT_MAX_BATCH
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commits everything queued so far, then stops; in-flight callers still get their result."""
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    async def submit(self, user_id: int, event_id: int, join_waitlist: bool, traceparent: Optional[str]) -> dict:
+        """Queues one booking and waits for the batch that commits it. Returns the booking as a dict."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingBooking(user_id, event_id, join_waitlist, traceparent, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    # Past the window, still take whatever is already queued, without waiting
+                    pending = self.queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self.queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if pending is None:  # Stop sentinel: commit what we have and exit
+                    stopping = True
+                    break
+                batch.append(pending)
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[_PendingBooking]):
+        try:
+            results = await asyncio.to_thread(self._write_batch, batch)
+        except (IntegrityError, DataError) as e:
+            logger.error(f"Group commit of {len(batch)} bookings rejected, retrying individually: {e}")
+            results = [await asyncio.to_thread(self._write_one, pending) for pending in batch]
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} bookings failed: {e}")
+            results = [e] * len(batch)
+
+        for pending, result in zip(batch, results):
+            if pending.future.done():  # The caller went away
+                continue
+            if isinstance(result, Exception):
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+
+    @staticmethod
+    def _insert(db: Session, batch: List[_PendingBooking]) -> List[dict]:
+        # 1. All bookings in one statement; RETURNING keeps the order of the parameters
+        rows = db.execute(
+            insert(models.Booking).returning(*BOOKING_COLUMNS, sort_by_parameter_order=True),
+            [{"user_id": pending.user_id, "event_id": pending.event_id, "status": "PENDING"} for pending in batch],
+        ).all()
+
+        # 2. All outbox messages in one statement, in the same transaction as their bookings
+        db.execute(insert(models.Outbox), [
+            {
+                "topic": settings.KAFKA_BOOKING_TOPIC,
+                "payload": messages.encode(messages.BookingRequested(
+                    event_id=row.event_id, booking_id=row.id, user_id=row.user_id,
+                    join_waitlist=pending.join_waitlist,
+                )),
+                "status": "PENDING",
+                "trace_context": pending.traceparent,
+            }
+            for pending, row in zip(batch, rows)
+        ])
+        return [row._asdict() for row in rows]
+
+    def _write_batch(self, batch: List[_PendingBooking]) -> List[dict]:
+        db = SessionLocal()
+        try:
+            with start_span("book_ticket.group_commit", batch_size=len(batch)):
+                results = self._insert(db, batch)
+                db.commit()
+            return results
+        finally:
+            db.close()
+
+    def _write_one(self, pending: _PendingBooking):
+        db = SessionLocal()
+        try:
+            results = self._insert(db, [pending])
+            db.commit()
+            return results[0]
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+
+group_committer = GroupCommitter()
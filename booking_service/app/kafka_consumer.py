@@ -1,9 +1,9 @@
-import json
 import logging
 from aiokafka import AIOKafkaConsumer
-from .database import SessionLocal
+from .database import WorkerSessionLocal
 from .config import settings
-from . import crud
+from . import crud, messages
+from .tracing import start_span, traceparent_from_headers
 
 logger = logging.getLogger("booking_consumer")
 
@@ -24,21 +24,27 @@ async def consume_confirmations():
 
     try:
         async for msg in consumer:
-            try:
-                data = json.loads(msg.value.decode("utf-8"))
-                booking_id = data.get("booking_id")
-                status = data.get("status")
-
-                if booking_id and status:
-                    logger.info(f"Received confirmation for Booking {booking_id}: {status}")
-
-                    db = SessionLocal()
-                    try:
-                        crud.update_booking_status(db, booking_id, status)
-                    finally:
-                        db.close()
-
-            except Exception as e:
-                logger.error(f"Error processing confirmation: {e}")
+            with start_span("consume_confirmations", traceparent=traceparent_from_headers(msg.headers),
+                            partition=msg.partition, offset=msg.offset) as span:
+                try:
+                    confirmation = messages.decode(msg.value, messages.BookingConfirmation)
+                    booking_id = confirmation.booking_id
+                    status = confirmation.status
+
+                    if booking_id and status:
+                        logger.info(f"Received confirmation for Booking {booking_id}: {status}")
+                        span.set_attribute("booking_id", booking_id)
+                        span.set_attribute("booking.status", status)
+
+                        db = WorkerSessionLocal()
+                        try:
+                            if crud.update_booking_status(db, booking_id, status) is None:
+                                logger.info(f"Ignored {status} for Booking {booking_id}: not a forward transition")
+                        finally:
+                            db.close()
+
+                except Exception as e:
+                    logger.error(f"Error processing confirmation: {e}")
+                    span.status = "ERROR"
     finally:
         await consumer.stop()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func
+
+from . import models
+from .config import settings
+from .database import WorkerSessionLocal, pool_metrics
+
+logger = logging.getLogger("load_shedding")
+
+
+class LoadMonitor:
+    """
+    Tracks the overload signals for this process: event-loop lag, API pool checkout
+    wait and outbox PENDING depth. Signals rise immediately and decay slowly.
+    """
+
+    def __init__(self):
+        self.loop_lag_ms = 0.0
+        self.outbox_pending = 0
+
+    async def watch_loop_lag(self, interval: float = 0.1):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag_ms = max((loop.time() - start - interval) * 1000, 0.0)
+            self.loop_lag_ms = lag_ms if lag_ms > self.loop_lag_ms else 0.8 * self.loop_lag_ms + 0.2 * lag_ms
+
+    async def watch_outbox_backlog(self, interval: float = 2.0):
+        while True:
+            try:
+                self.outbox_pending = await asyncio.to_thread(self._count_pending)
+            except Exception as e:
+                logger.error(f"Outbox backlog check failed: {e}")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _count_pending() -> int:
+        db = WorkerSessionLocal()
+        try:
+            return db.query(func.count(models.Outbox.id)).filter(models.Outbox.status == "PENDING").scalar()
+        finally:
+            db.close()
+
+    @staticmethod
+    def pool_wait_ms() -> float:
+        metrics = pool_metrics.get("api")
+        if metrics is None:
+            return 0.0
+        # The average only moves on checkouts; decay it while shedding keeps checkouts from happening
+        idle = time.monotonic() - metrics.updated_at
+        return metrics.wait_ms_avg * 0.5 ** (idle / settings.SHED_SIGNAL_HALF_LIFE_SECONDS)
+
+    def overload_reason(self, critical: bool) -> Optional[str]:
+        # Non-critical routes are shed at a fraction of the thresholds, before the booking path is affected
+        factor = 1.0 if critical else settings.SHED_NON_CRITICAL_FACTOR
+        if self.loop_lag_ms > settings.SHED_LOOP_LAG_MS * factor:
+            return "event_loop_lag"
+        if self.pool_wait_ms() > settings.SHED_POOL_WAIT_MS * factor:
+            return "db_pool_wait"
+        if self.outbox_pending > settings.SHED_OUTBOX_BACKLOG * factor:
+            return "outbox_backlog"
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "loop_lag_ms": round(self.loop_lag_ms, 3),
+            "pool_wait_ms": round(self.pool_wait_ms(), 3),
+            "outbox_pending": self.outbox_pending,
+            "shedding_critical": self.overload_reason(critical=True),
+            "shedding_non_critical": self.overload_reason(critical=False),
+        }
+
+
+load_monitor = LoadMonitor()
+
+
+def _shed(critical: bool):
+    reason = load_monitor.overload_reason(critical)
+    if reason:
+        logger.warning(f"Shedding request: {reason}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service overloaded ({reason}), please retry",
+            headers={"Retry-After": str(settings.SHED_RETRY_AFTER_SECONDS)},
+        )
+
+
+# Async so FastAPI runs them on the event loop: a sync dependency would take a threadpool
+# thread per request just to compare a few numbers, adding contention exactly when overloaded
+async def shed_critical():
+    """Dependency for the booking hot path: rejects only past the full thresholds."""
+    _shed(critical=True)
+
+
+async def shed_non_critical():
+    """Dependency for routes that can be degraded first."""
+    _shed(critical=False)
@@ -1,114 +1,108 @@
 import logging
 import asyncio
-import json
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import redis.asyncio as redis
-from fastapi_limiter import FastAPILimiter
-from aiokafka import AIOKafkaProducer
-from sqlalchemy.orm import Session  # Needed for the relay
 
-from .database import engine, SessionLocal  # Need SessionLocal for manual DB access
-from . import models
-from .routers import booking_router
+from .database import init_engines, dispose_engines, pool_stats
+from .routers import booking_router, profiling_router
 from .config import settings
-from .kafka_consumer import consume_confirmations
+from . import rate_limit, profiling
+from .load_shedding import load_monitor
+from .group_commit import group_committer
+from .reservation_client import reservation_client
+from .background import start_background_tasks, stop_background_tasks
+from .revocation import sync_revocations
 
 logger = logging.getLogger("booking_service")
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
-
-
-# --- BACKGROUND TASK: THE OUTBOX RELAY ---
-async def outbox_relay(producer: AIOKafkaProducer):
-    """
-    Periodically checks the Outbox table for pending messages and sends them to Kafka.
-    """
-    logger.info("Outbox Relay started.")
-    while True:
-        try:
-            # 1. Create a new DB session
-            db: Session = SessionLocal()
-            try:
-                # 2. Fetch pending messages (limit 10 to avoid overloading)
-                messages = db.query(models.Outbox).filter(models.Outbox.status == "PENDING").limit(10).all()
-
-                for msg in messages:
-                    try:
-                        logger.info(f"Relaying message {msg.id} to topic {msg.topic}")
-                        # 3. Send to Kafka
-                        await producer.send_and_wait(msg.topic, msg.payload.encode("utf-8"))
-
-                        # 4. Mark as PROCESSED
-                        msg.status = "PROCESSED"
-                    except Exception as e:
-                        logger.error(f"Failed to relay message {msg.id}: {e}")
-                        msg.retry_count += 1
-                        # Optional: Mark FAILED if retries > 5
-
-                db.commit()
-            finally:
-                db.close()
-
-        except Exception as e:
-            logger.error(f"Outbox Relay crashed: {e}")
-
-        # Sleep for a bit before checking again
-        await asyncio.sleep(5)
-    # -----------------------------------------
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Booking Service starting up...")
 
+    # Connection pools are created here rather than at import, so workers start without touching the DB
+    init_engines()
+
     # Redis Init
     redis_client = None
     try:
         redis_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        await FastAPILimiter.init(redis_client)
+        rate_limit.init(redis_client)
     except Exception as e:
-        logger.error(f"Failed to initialize FastAPILimiter: {e}")
+        logger.error(f"Failed to initialize rate limiter Redis client: {e}")
 
-    # Kafka Producer Init
-    producer = AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
-    relay_task = None
-    try:
-        await producer.start()
-        logger.info("Kafka Producer started.")
+    # Revoked tokens, mirrored in memory for get_current_user
+    revocation_task = asyncio.create_task(sync_revocations(redis_client)) if redis_client else None
 
-        # START THE RELAY TASK
-        relay_task = asyncio.create_task(outbox_relay(producer))
+    # Outbox relay and confirmation consumer; API-only deployments run them in app.worker instead
+    background_tasks, producer = [], None
+    if settings.RUN_BACKGROUND_TASKS:
+        background_tasks, producer = await start_background_tasks(redis_client)
 
-    except Exception as e:
-        logger.error(f"Failed to start Kafka Producer: {e}")
+    if settings.GROUP_COMMIT_ENABLED:
+        group_committer.start()
+
+    # Synchronous reservation through events_service's internal API, with the outbox saga as fallback
+    if settings.FAST_PATH_ENABLED:
+        reservation_client.start()
+
+    # On-demand profiling (admin only)
+    if settings.PROFILING_ENABLED:
+        profiling.enable()
+        app.include_router(profiling_router.router)
 
-    consumer_task = asyncio.create_task(consume_confirmations())
+    # Overload signals for the load-shedding dependencies
+    monitor_tasks = [
+        asyncio.create_task(load_monitor.watch_loop_lag()),
+        asyncio.create_task(load_monitor.watch_outbox_backlog()),
+    ]
 
     yield
 
     logger.info("Booking Service shutting down...")
 
-    # Cancel relay
-    if relay_task:
-        relay_task.cancel()
-        try:
-            await relay_task
-        except asyncio.CancelledError:
-            logger.info("Outbox Relay stopped.")
-    consumer_task.cancel()
+    # Commit bookings still waiting for their group before the pools go away
+    await group_committer.stop()
+    await reservation_client.stop()
 
-    if producer:
-        await producer.stop()
+    await stop_background_tasks(background_tasks, producer)
+    for task in monitor_tasks:
+        task.cancel()
+    if revocation_task:
+        revocation_task.cancel()
 
     if redis_client:
         await redis_client.close()
 
+    dispose_engines()
+
 
 app = FastAPI(title="Booking Service API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(profiling.ProfilingMiddleware)  # Pass-through unless PROFILING_ENABLED
 app.include_router(booking_router.router)
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # The connection pool is saturated: shed the request quickly instead of cascading timeouts
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    return pool_stats()
+
+
+@app.get("/metrics/load")
+def load_metrics():
+    return load_monitor.snapshot()
+
 
 @app.get("/")
 def read_root():
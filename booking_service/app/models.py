@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime,Text
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Index, text
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -11,12 +11,30 @@ class Booking(Base):
     status = Column(String, default="CONFIRMED")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # "My bookings": keyset on (created_at, id) within one user, covering the listing columns
+        Index("ix_bookings_user_created", "user_id", "created_at", "id",
+              postgresql_include=["event_id", "status"]),
+        # Operational queries such as "all PENDING bookings for event X"
+        Index("ix_bookings_event_status_created", "event_id", "status", "created_at", "id",
+              postgresql_include=["user_id"]),
+        # All bookings of an event, any status: listings without a status filter and exports
+        Index("ix_bookings_event_created", "event_id", "created_at", "id",
+              postgresql_include=["user_id", "status"]),
+    )
+
 class Outbox(Base):
     __tablename__ = "outbox"
 
     id = Column(Integer, primary_key=True, index=True)
     topic = Column(String, nullable=False)
-    payload = Column(Text, nullable=False)  # Stores the JSON message
+    payload = Column(LargeBinary, nullable=False)  # Stores the encoded message (see messages.py)
     status = Column(String, default="PENDING")  # PENDING, PROCESSED, FAILED
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    retry_count = Column(Integer, default=0)
\ No newline at end of file
+    retry_count = Column(Integer, default=0)
+    trace_context = Column(String, nullable=True)  # W3C traceparent of the originating request
+
+    __table_args__ = (
+        # Partial index: keeps the relay poll and the backlog count cheap however many rows were processed
+        Index("ix_outbox_pending", "id", postgresql_where=text("status = 'PENDING'")),
+    )
@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+from .database import get_redis_client
+
+logger = logging.getLogger("profiling")
+
+# --- On-Demand Profiling ---
+# Nothing here runs unless PROFILING_ENABLED is set: the middleware passes requests straight
+# through, the routes are not mounted, and a sampler thread only exists while a profile is taken.
+# Output is in the folded-stack format read by flamegraph.pl and speedscope.
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+MAX_LOCAL_PROFILES = 20
+
+_enabled = False
+_active = threading.BoundedSemaphore(1)  # Replaced in enable(); bounds concurrent samplers
+_running: set = set()
+_local_profiles: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def enable() -> None:
+    global _enabled, _active
+    _active = threading.BoundedSemaphore(settings.PROFILING_MAX_CONCURRENT)
+    _enabled = True
+
+
+# --- Signed Profile Tokens ---
+def _signature(expires: int) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def issue_token(ttl_seconds: int) -> str:
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(expires)}"
+
+
+def verify_token(token: str) -> bool:
+    try:
+        expires_text, signature = token.split(".", 1)
+        expires = int(expires_text)
+    except ValueError:
+        return False
+    return expires > time.time() and hmac.compare_digest(signature, _signature(expires))
+
+
+# --- Sampler ---
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # ';' separates frames in folded output, so it must never appear inside one
+    path = os.sep.join(code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples the stack of every thread in the process from a separate thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        # Sample first, then wait: even a request shorter than the interval gets one sample
+        while True:
+            self._sample(own)
+            if self._stop.wait(self.interval):
+                return
+
+    def _sample(self, own: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def try_start() -> Optional[SamplingProfiler]:
+    """Starts a sampler unless PROFILING_MAX_CONCURRENT are already running."""
+    if not _active.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+    profiler.start()
+    return profiler
+
+
+def finish(profiler: SamplingProfiler, profile_id: str) -> None:
+    try:
+        store(profile_id, profiler.stop())
+    finally:
+        _active.release()
+
+
+def profile_process(seconds: float) -> Optional[str]:
+    """Samples the whole process for `seconds` in the background. Returns the profile id, or None if busy."""
+    profiler = try_start()
+    if profiler is None:
+        return None
+    profile_id = uuid.uuid4().hex
+    _running.add(profile_id)
+
+    def done():
+        try:
+            finish(profiler, profile_id)
+        finally:
+            _running.discard(profile_id)
+        logger.info(f"Profile {profile_id} finished")
+
+    timer = threading.Timer(seconds, done)
+    timer.daemon = True
+    timer.start()
+    return profile_id
+
+
+def is_running(profile_id: str) -> bool:
+    return profile_id in _running
+
+
+# --- Storage ---
+# Kept locally and in Redis, so any process of the service can serve a profile taken by another
+def _redis_key(profile_id: str) -> str:
+    return f"profile:{settings.SERVICE_NAME}:{profile_id}"
+
+
+def store(profile_id: str, folded: str) -> None:
+    with _lock:
+        _local_profiles[profile_id] = folded
+        while len(_local_profiles) > MAX_LOCAL_PROFILES:
+            _local_profiles.popitem(last=False)
+    try:
+        get_redis_client().set(_redis_key(profile_id), folded, ex=settings.PROFILING_RETENTION_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to store profile {profile_id} in Redis: {e}")
+
+
+def load(profile_id: str) -> Optional[str]:
+    with _lock:
+        folded = _local_profiles.get(profile_id)
+    if folded is not None:
+        return folded
+    try:
+        return get_redis_client().get(_redis_key(profile_id))
+    except Exception as e:
+        logger.error(f"Failed to load profile {profile_id} from Redis: {e}")
+        return None
+
+
+# --- Middleware ---
+class ProfilingMiddleware:
+    """
+    Profiles a single request when it carries a valid X-Profile-Token header, and returns the
+    profile id in X-Profile-Id. Until enable() runs it only checks one flag per request.
+    The sampler sees every thread, so work of concurrent requests in the same process shows up too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not _enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        profiler = try_start() if token is not None and verify_token(token) else None
+        if profiler is None:
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Joins the sampler thread and writes to Redis: keep both off the event loop
+            await run_in_threadpool(finish, profiler, profile_id)
@@ -0,0 +1,76 @@
+import logging
+import time
+from typing import Optional
+import httpx
+
+from .config import settings
+from .tracing import start_span, TRACEPARENT_HEADER
+
+logger = logging.getLogger("reservation_client")
+
+
+class ReservationClient:
+    """
+    Fast path for book_ticket: asks events_service to reserve right away over a pooled keep-alive
+    connection, so the response can carry CONFIRMED or REJECTED instead of PENDING.
+
+    It only ever shortens the wait. The booking and its outbox message are committed before the
+    call, so on a timeout or error the Kafka saga decides the booking as before. When both paths
+    reach events_service, its inbox makes the second one return the first one's result.
+    After a failure the fast path is skipped for FAST_PATH_COOLDOWN_SECONDS, so an unhealthy
+    events_service does not add a timeout to every booking.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.retry_at = 0.0
+
+    def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=settings.EVENTS_INTERNAL_URL,
+            headers={"X-Internal-Token": settings.INTERNAL_API_TOKEN},
+            timeout=httpx.Timeout(settings.FAST_PATH_TIMEOUT_MS / 1000),
+            limits=httpx.Limits(
+                max_connections=settings.FAST_PATH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.FAST_PATH_MAX_CONNECTIONS,
+            ),
+        )
+
+    async def stop(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @property
+    def running(self) -> bool:
+        return self.client is not None
+
+    async def reserve(self, booking: dict, join_waitlist: bool, traceparent: Optional[str]) -> Optional[str]:
+        """Returns the booking's new status, or None to leave it PENDING for the saga."""
+        if time.monotonic() < self.retry_at:
+            return None
+        with start_span("book_ticket.fast_path", traceparent=traceparent, booking_id=booking["id"]) as span:
+            try:
+                response = await self.client.post(
+                    "/internal/reservations",
+                    json={
+                        "booking_id": booking["id"],
+                        "event_id": booking["event_id"],
+                        "user_id": booking["user_id"],
+                        "join_waitlist": join_waitlist,
+                    },
+                    headers={TRACEPARENT_HEADER: span.traceparent},
+                )
+                response.raise_for_status()
+                status = response.json()["status"]
+            except Exception as e:
+                # Includes 503s from load shedding on the events side: back off and let Kafka queue the work
+                self.retry_at = time.monotonic() + settings.FAST_PATH_COOLDOWN_SECONDS
+                logger.warning(f"Fast path failed for Booking {booking['id']}, falling back to the outbox: {e!r}")
+                span.status = "ERROR"
+                return None
+            span.set_attribute("booking.status", status)
+            return status
+
+
+reservation_client = ReservationClient()
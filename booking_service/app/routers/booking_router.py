@@ -1,54 +1,175 @@
-import json
-from fastapi import APIRouter, Depends, status, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, schemas
-from ..auth import get_current_user
-from fastapi_limiter.depends import RateLimiter
+from .. import models, schemas, messages, crud, export
+from ..auth import get_current_user, get_current_admin_user
+from ..rate_limit import RateLimiter
+from ..load_shedding import shed_critical, shed_non_critical
 from ..config import settings
+from ..tracing import start_span, TRACEPARENT_HEADER
+from ..group_commit import group_committer
+from ..reservation_client import reservation_client
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
 
+async def _try_fast_path(db: Session, booking: dict, join_waitlist: bool, traceparent: str) -> dict:
+    """Resolves the committed booking inline when events_service answers in time; otherwise it stays PENDING."""
+    status = await reservation_client.reserve(booking, join_waitlist, traceparent)
+    if status is not None:
+        booking["status"] = await run_in_threadpool(crud.resolve_pending_booking, db, booking["id"], status)
+    return booking
+
+
 @router.post("/", response_model=schemas.BookingRead, status_code=status.HTTP_201_CREATED)
 async def book_ticket(
         request: Request,
         booking: schemas.BookingCreate,
+        shed: None = Depends(shed_critical),
         db: Session = Depends(get_db),
         user: dict = Depends(get_current_user),
         limit: None = Depends(RateLimiter(times=5, minutes=1))
 ):
-    # 1. Prepare the Booking Object
-    db_booking = models.Booking(
-        user_id=int(user.get("sub")),
-        event_id=booking.event_id,
-        status="PENDING"
-    )
+    # Continue the caller's trace if one was sent, otherwise this request starts a new one
+    with start_span("book_ticket", traceparent=request.headers.get(TRACEPARENT_HEADER),
+                    event_id=booking.event_id) as span:
+        if group_committer.running:
+            # Group commit: booking and outbox row are written in a batch shared with concurrent requests
+            db_booking = await group_committer.submit(
+                int(user.get("sub")), booking.event_id, booking.join_waitlist, span.traceparent
+            )
+            span.set_attribute("booking_id", db_booking["id"])
+            if reservation_client.running:
+                db_booking = await _try_fast_path(db, db_booking, booking.join_waitlist, span.traceparent)
+            return db_booking
+
+        # 1. Prepare the Booking Object
+        db_booking = models.Booking(
+            user_id=int(user.get("sub")),
+            event_id=booking.event_id,
+            status="PENDING"
+        )
+
+        # 2. Add Booking to Session (Do not commit yet!)
+        db.add(db_booking)
+        db.flush()  # Flush to get the ID for the message
+        span.set_attribute("booking_id", db_booking.id)
+
+        # 3. Prepare the Outbox Message
+        message = messages.BookingRequested(
+            event_id=booking.event_id,
+            booking_id=db_booking.id,
+            user_id=int(user.get("sub")),
+            join_waitlist=booking.join_waitlist,
+        )
+
+        db_outbox = models.Outbox(
+            topic=settings.KAFKA_BOOKING_TOPIC,
+            payload=messages.encode(message),
+            status="PENDING",
+            trace_context=span.traceparent
+        )
+
+        # 4. Add Outbox Message to Session
+        db.add(db_outbox)
+
+        # 5. Commit BOTH together (Atomic Transaction)
+        # If this fails, neither the booking nor the message exists.
+        with start_span("book_ticket.commit"):
+            db.commit()
+        db.refresh(db_booking)
+
+        # 6. Optional fast path: reserve now instead of waiting for the outbox relay and Kafka
+        if reservation_client.running:
+            return await _try_fast_path(
+                db, schemas.BookingRead.model_validate(db_booking).model_dump(), booking.join_waitlist, span.traceparent
+            )
+        return db_booking
+
+
+@router.post("/{booking_id:int}/cancel", response_model=schemas.BookingRead)
+def cancel_booking(
+        request: Request,
+        booking_id: int,
+        db: Session = Depends(get_db),
+        user: dict = Depends(get_current_user),
+        limit: None = Depends(RateLimiter(times=10, minutes=1))
+):
+    with start_span("cancel_booking", traceparent=request.headers.get(TRACEPARENT_HEADER),
+                    booking_id=booking_id) as span:
+        # Lock the row so a confirmation arriving meanwhile cannot interleave with the cancellation
+        db_booking = db.query(models.Booking).filter(models.Booking.id == booking_id).with_for_update().first()
+        if db_booking is None or db_booking.user_id != int(user.get("sub")):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+        if db_booking.status == "CANCELLED":
+            return db_booking
+        if db_booking.status not in crud.CANCELLABLE_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A {db_booking.status} booking cannot be cancelled",
+            )
+        return crud.cancel_booking(db, db_booking, span.traceparent)
 
-    # 2. Add Booking to Session (Do not commit yet!)
-    db.add(db_booking)
-    db.flush()  # Flush to get the ID for the message
-
-    # 3. Prepare the Outbox Message
-    message_payload = {
-        "event_id": booking.event_id,
-        "booking_id": db_booking.id,
-        "user_id": int(user.get("sub")),
-        "status": "booked"
-    }
-
-    db_outbox = models.Outbox(
-        topic=settings.KAFKA_BOOKING_TOPIC,
-        payload=json.dumps(message_payload),
-        status="PENDING"
-    )
 
-    # 4. Add Outbox Message to Session
-    db.add(db_outbox)
+@router.get("/me", response_model=schemas.BookingPage)
+def my_bookings(
+        limit_num: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        shed: None = Depends(shed_non_critical),
+        db: Session = Depends(get_db),
+        user: dict = Depends(get_current_user),
+        limit: None = Depends(RateLimiter(times=60, minutes=1))
+):
+    try:
+        bookings, next_cursor = crud.list_bookings(db, limit_num, cursor, user_id=int(user.get("sub")))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {"items": bookings, "next_cursor": next_cursor}
 
-    # 5. Commit BOTH together (Atomic Transaction)
-    # If this fails, neither the booking nor the message exists.
-    db.commit()
-    db.refresh(db_booking)
 
-    return db_booking
\ No newline at end of file
+@router.get("/", response_model=schemas.BookingPage)
+def list_event_bookings(
+        event_id: int,
+        booking_status: Optional[str] = Query(None, alias="status", max_length=20),
+        limit_num: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        shed: None = Depends(shed_non_critical),
+        db: Session = Depends(get_db),
+        admin: dict = Depends(get_current_admin_user)
+):
+    # event_id is required so every page stays a range scan, of ix_bookings_event_status_created
+    # with a status and of ix_bookings_event_created without
+    try:
+        bookings, next_cursor = crud.list_bookings(db, limit_num, cursor, event_id=event_id, status=booking_status)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {"items": bookings, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+def export_event_bookings(
+        event_id: int,
+        booking_status: Optional[str] = Query(None, alias="status", max_length=20),
+        fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+        gzip: bool = False,
+        shed: None = Depends(shed_non_critical),
+        admin: dict = Depends(get_current_admin_user),
+        limit: None = Depends(RateLimiter(times=10, minutes=1))
+):
+    # The body is produced chunk by chunk from a server-side cursor; nothing is buffered in full
+    body = export.start_export(event_id, booking_status, fmt, gzip)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress, please retry later",
+            headers={"Retry-After": str(settings.EXPORT_RETRY_AFTER_SECONDS)},
+        )
+    filename = f"bookings-event-{event_id}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else export.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class BookingCreate(BaseModel):
     event_id: int
+    join_waitlist: bool = False  # When sold out, wait for a released ticket (status WAITLISTED) instead of REJECTED
 
 class BookingRead(BaseModel):
     id: int
@@ -12,4 +14,8 @@ class BookingRead(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BookingPage(BaseModel):
+    items: List[BookingRead]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,48 @@
+# Background worker entry point: runs the outbox relay and the confirmation consumer without
+# serving HTTP, so API processes can scale on their own. Start with: python -m app.worker
+# and set RUN_BACKGROUND_TASKS=false on the API deployment.
+import asyncio
+import logging
+import signal
+import redis.asyncio as redis
+
+from .config import settings
+from .database import init_engines, dispose_engines
+from . import profiling
+from .background import start_background_tasks, stop_background_tasks
+
+logger = logging.getLogger("booking_worker")
+
+
+def _profile_worker():
+    seconds = settings.PROFILING_SIGNAL_SECONDS
+    profile_id = profiling.profile_process(seconds)
+    if profile_id is None:
+        logger.warning("Profiler busy, ignoring SIGUSR1")
+    else:
+        logger.info(f"Profiling worker for {seconds}s as {profile_id}")
+
+
+async def main():
+    init_engines()
+    redis_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+    tasks, producer = await start_background_tasks(redis_client)
+    logger.info("Booking worker started.")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    # kill -USR1 <pid>: sample the whole worker; fetch the result from /admin/profiling/<id> on any API process
+    loop.add_signal_handler(signal.SIGUSR1, _profile_worker)
+    await stop.wait()
+
+    logger.info("Booking worker shutting down...")
+    await stop_background_tasks(tasks, producer)
+    await redis_client.close()
+    dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,8 @@
+#!/bin/sh
+
+# Apply database migrations
+echo "Applying database migrations..."
+alembic upgrade head
+
+# Start the FastAPI server
+exec "$@"
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created by the old import-time create_all() already have these tables
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("bookings"):
+        op.create_table(
+            "bookings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("event_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_bookings_id", "bookings", ["id"])
+    if not inspector.has_table("outbox"):
+        op.create_table(
+            "outbox",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("topic", sa.String(), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("retry_count", sa.Integer(), nullable=True),
+        )
+        op.create_index("ix_outbox_id", "outbox", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_id", table_name="outbox")
+    op.drop_table("outbox")
+    op.drop_index("ix_bookings_id", table_name="bookings")
+    op.drop_table("bookings")
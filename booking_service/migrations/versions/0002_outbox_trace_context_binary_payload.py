@@ -0,0 +1,34 @@
+"""outbox trace context and binary payload
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"]: c for c in sa.inspect(op.get_bind()).get_columns("outbox")}
+    # Batch mode emits plain ALTERs on Postgres and a table rebuild on SQLite
+    with op.batch_alter_table("outbox") as batch_op:
+        if "trace_context" not in columns:
+            batch_op.add_column(sa.Column("trace_context", sa.String(), nullable=True))
+        if not isinstance(columns["payload"]["type"], sa.LargeBinary):
+            # Existing JSON payloads become UTF-8 bytes; messages.decode() still reads them
+            batch_op.alter_column(
+                "payload",
+                type_=sa.LargeBinary(),
+                postgresql_using="convert_to(payload, 'UTF8')",
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("outbox") as batch_op:
+        batch_op.alter_column("payload", type_=sa.Text(), postgresql_using="convert_from(payload, 'UTF8')")
+        batch_op.drop_column("trace_context")
@@ -0,0 +1,31 @@
+"""composite indexes for booking listings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The bookings table is large and written constantly: build without blocking inserts
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bookings_user_created", "bookings", ["user_id", "created_at", "id"],
+            postgresql_include=["event_id", "status"], postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_bookings_event_status_created", "bookings", ["event_id", "status", "created_at", "id"],
+            postgresql_include=["user_id"], postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_bookings_event_status_created", table_name="bookings", postgresql_concurrently=True)
+        op.drop_index("ix_bookings_user_created", table_name="bookings", postgresql_concurrently=True)
@@ -0,0 +1,27 @@
+"""index for listing an event's bookings across statuses
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Without a status filter, ix_bookings_event_status_created cannot serve the (created_at, id)
+    # order and the whole event would be sorted for every page
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bookings_event_created", "bookings", ["event_id", "created_at", "id"],
+            postgresql_include=["user_id", "status"], postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_bookings_event_created", table_name="bookings", postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+# Imports for testing tools
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Import your actual application code
+from app.database import Base
+from app import models # To create the database tables
+
+# --- Test Database Setup ---
+# An in-memory SQLite database shared by every connection (StaticPool), so tests need no
+# PostgreSQL and leave no file behind
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# --- Database Management Fixtures ---
+@pytest.fixture(scope="session", autouse=True)
+def setup_db():
+    """Creates the tables once for the whole test session."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    """Provides a session whose changes are rolled back after the test."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection)
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def committing_sessions(mocker):
+    """
+    For code that opens and commits its own sessions: points it at the test database and
+    empties the tables afterwards. Pass the module paths whose SessionLocal should be replaced.
+    """
+    def patch(*targets):
+        for target in targets:
+            mocker.patch(f"{target}.SessionLocal", TestingSessionLocal)
+        return TestingSessionLocal
+    yield patch
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
@@ -0,0 +1,91 @@
+# Tests for booking CRUD: status changes, cancellations and keyset listings
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import crud, messages, models
+
+def _booking(db_session, status: str) -> models.Booking:
+    booking = models.Booking(user_id=1, event_id=7, status=status)
+    db_session.add(booking)
+    db_session.commit()
+    return booking
+
+def test_waitlisted_booking_can_be_confirmed(db_session):
+    booking = _booking(db_session, "PENDING")
+
+    assert crud.update_booking_status(db_session, booking.id, "WAITLISTED").status == "WAITLISTED"
+    assert crud.update_booking_status(db_session, booking.id, "CONFIRMED").status == "CONFIRMED"
+
+def test_late_waitlisted_reply_does_not_demote_a_promoted_booking(db_session):
+    """The PROMOTED confirmation can overtake the original WAITLISTED reply; the booking stays CONFIRMED."""
+    booking = _booking(db_session, "PENDING")
+    crud.update_booking_status(db_session, booking.id, "CONFIRMED")
+
+    assert crud.update_booking_status(db_session, booking.id, "WAITLISTED") is None
+    db_session.refresh(booking)
+    assert booking.status == "CONFIRMED"
+
+@pytest.mark.parametrize("final", ["CONFIRMED", "REJECTED", "CANCELLED"])
+@pytest.mark.parametrize("status", ["CONFIRMED", "REJECTED", "WAITLISTED"])
+def test_final_statuses_are_not_overwritten(db_session, final, status):
+    booking = _booking(db_session, final)
+
+    assert crud.update_booking_status(db_session, booking.id, status) is None
+    db_session.refresh(booking)
+    assert booking.status == final
+
+def test_unknown_booking_is_ignored(db_session):
+    assert crud.update_booking_status(db_session, 999999, "CONFIRMED") is None
+
+def test_cancel_booking_queues_the_previous_status(db_session):
+    """events_service needs the previous status to decide between releasing and leaving the waitlist."""
+    booking = _booking(db_session, "WAITLISTED")
+
+    assert crud.cancel_booking(db_session, booking, traceparent="00-trace-span-01").status == "CANCELLED"
+
+    outbox = db_session.query(models.Outbox).one()
+    assert outbox.status == "PENDING"
+    assert outbox.trace_context == "00-trace-span-01"
+    message = messages.decode(outbox.payload, messages.BookingCancelled)
+    assert (message.booking_id, message.event_id, message.previous_status) == (booking.id, 7, "WAITLISTED")
+
+def _bookings(db_session, created_at: list) -> list:
+    bookings = [models.Booking(user_id=1, event_id=7, status="CONFIRMED", created_at=at) for at in created_at]
+    db_session.add_all(bookings)
+    db_session.commit()
+    return [booking.id for booking in bookings]
+
+def _all_pages(db_session, limit: int, **filters) -> list:
+    pages, cursor = [], None
+    while True:
+        bookings, cursor = crud.list_bookings(db_session, limit, cursor, **filters)
+        pages.append([booking.id for booking in bookings])
+        if cursor is None:
+            return pages
+
+def test_booking_cursor_round_trips():
+    created_at = datetime(2030, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert crud.decode_booking_cursor(crud.encode_booking_cursor(created_at, 42)) == (created_at, 42)
+
+def test_pages_break_created_at_ties_by_id(db_session):
+    """Bookings committed in the same instant are neither skipped nor repeated across pages."""
+    same = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    first, *tied = _bookings(db_session, [same - timedelta(seconds=1)] + [same] * 4)
+
+    pages = _all_pages(db_session, 2, event_id=7)
+
+    assert pages == [sorted(tied, reverse=True)[:2], sorted(tied, reverse=True)[2:], [first]]
+
+def test_pages_follow_the_filters(db_session):
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    ids = _bookings(db_session, [now + timedelta(seconds=i) for i in range(3)])
+    db_session.add(models.Booking(user_id=2, event_id=8, status="CONFIRMED", created_at=now))
+    db_session.commit()
+
+    assert _all_pages(db_session, 2, event_id=7) == [ids[:0:-1], ids[:1]]
+    assert _all_pages(db_session, 10, user_id=1, status="CONFIRMED") == [ids[::-1]]
+
+def test_malformed_booking_cursor_is_rejected(db_session):
+    with pytest.raises(ValueError):
+        crud.list_bookings(db_session, 10, "not-a-cursor", event_id=7)
@@ -0,0 +1,65 @@
+# Tests for batching concurrent bookings into one transaction
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
+
+from app import messages, models
+from app.group_commit import GroupCommitter
+
+@pytest.fixture
+def committer(committing_sessions, mocker):
+    committing_sessions("app.group_commit")
+    mocker.patch("app.group_commit.settings.GROUP_COMMIT_WINDOW_MS", 50.0)
+    mocker.patch("app.group_commit.settings.GROUP_COMMIT_MAX_BATCH", 100)
+    return GroupCommitter()
+
+def _book_concurrently(committer: GroupCommitter, user_ids: list) -> list:
+    """Submits one booking per user id at the same time; returns each result or exception, in order."""
+    async def run():
+        committer.start()
+        try:
+            return await asyncio.gather(
+                *(committer.submit(user_id, 7, False, None) for user_id in user_ids), return_exceptions=True
+            )
+        finally:
+            await committer.stop()
+    return asyncio.run(run())
+
+def test_concurrent_bookings_share_one_batch(committer, mocker):
+    write_batch = mocker.spy(committer, "_write_batch")
+    results = _book_concurrently(committer, list(range(1, 11)))
+
+    assert write_batch.call_count == 1
+    assert [result["status"] for result in results] == ["PENDING"] * 10
+    assert len({result["id"] for result in results}) == 10
+
+def test_each_caller_gets_its_own_row_and_outbox_message(committer, db_session):
+    """RETURNING comes back in parameter order, so row i and outbox message i belong to caller i."""
+    user_ids = [5, 3, 9, 1, 7]
+    results = _book_concurrently(committer, user_ids)
+
+    assert [result["user_id"] for result in results] == user_ids
+    outbox = db_session.scalars(select(models.Outbox).order_by(models.Outbox.id)).all()
+    decoded = [messages.decode(row.payload, messages.BookingRequested) for row in outbox]
+    assert [(message.booking_id, message.user_id) for message in decoded] == \
+        [(result["id"], result["user_id"]) for result in results]
+
+def test_data_error_is_retried_row_by_row(committer, db_session):
+    """One invalid booking fails on its own; its neighbours are still committed."""
+    results = _book_concurrently(committer, [1, None, 3])
+
+    assert results[0]["user_id"] == 1 and results[2]["user_id"] == 3
+    assert isinstance(results[1], IntegrityError)
+    assert db_session.scalar(select(func.count()).select_from(models.Booking)) == 2
+    assert db_session.scalar(select(func.count()).select_from(models.Outbox)) == 2
+
+def test_pool_timeout_fails_the_whole_batch_at_once(committer, mocker):
+    """No row-by-row retry: each retry would wait out the pool timeout again, holding up the queue."""
+    mocker.patch.object(committer, "_write_batch", side_effect=PoolTimeoutError("pool exhausted"))
+    write_one = mocker.spy(committer, "_write_one")
+    results = _book_concurrently(committer, [1, 2, 3])
+
+    assert all(isinstance(result, PoolTimeoutError) for result in results)
+    assert write_one.call_count == 0
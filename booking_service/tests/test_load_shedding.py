@@ -0,0 +1,34 @@
+# Tests for shedding requests under overload
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.load_shedding import load_monitor
+from app.main import app
+
+@pytest.fixture
+def client():
+    # No lifespan: the load-shedding dependencies answer before anything needs a database or Kafka
+    return TestClient(app)
+
+def _backlog(monkeypatch, fraction: float):
+    monkeypatch.setattr(load_monitor, "outbox_pending", int(settings.SHED_OUTBOX_BACKLOG * fraction))
+
+def test_overloaded_booking_route_returns_503(client, monkeypatch):
+    _backlog(monkeypatch, 1.5)
+    response = client.post("/bookings/", json={"event_id": 1})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.SHED_RETRY_AFTER_SECONDS)
+    assert "outbox_backlog" in response.json()["detail"]
+
+def test_non_critical_routes_are_shed_first(client, monkeypatch):
+    """Between the non-critical and the full threshold, browsing is shed while booking still gets through."""
+    _backlog(monkeypatch, (1 + settings.SHED_NON_CRITICAL_FACTOR) / 2)
+
+    assert client.get("/bookings/me").status_code == 503
+    assert client.post("/bookings/", json={"event_id": 1}).status_code == 401  # Past shedding, stopped by auth
+
+def test_requests_pass_below_the_thresholds(client, monkeypatch):
+    _backlog(monkeypatch, 0)
+    assert client.get("/bookings/me").status_code == 401
@@ -0,0 +1,54 @@
+# Tests for the versioned msgpack wire format. booking_service and events_service each carry a
+# copy of app/messages.py; both run these same tests, and the pinned bytes keep the copies in step.
+import json
+
+import msgpack
+import pytest
+
+from app import messages
+from app.messages import BookingCancelled, BookingConfirmation, BookingRequested, MessageDecodeError
+
+SAMPLES = [
+    (BookingRequested(event_id=7, booking_id=42, user_id=3, join_waitlist=True),
+     b"\x97\x01\x02\x07*\x03\xa6booked\xc3"),
+    (BookingConfirmation(booking_id=42, status="CONFIRMED", reason="PROMOTED", event_id=7),
+     b"\x96\x02\x02*\xa9CONFIRMED\xa8PROMOTED\x07"),
+    (BookingCancelled(booking_id=42, event_id=7, user_id=3, previous_status="WAITLISTED"),
+     b"\x96\x03\x01*\x07\x03\xaaWAITLISTED"),
+]
+
+@pytest.mark.parametrize("message, wire", SAMPLES, ids=lambda value: type(value).__name__)
+def test_messages_round_trip_in_the_pinned_format(message, wire):
+    assert messages.encode(message) == wire
+    assert messages.decode(wire, type(message)) == message
+
+def test_legacy_json_payload_is_decoded():
+    """Payloads written before the binary format may still sit in the outbox or on the topic."""
+    legacy = json.dumps({"event_id": 7, "booking_id": 42, "user_id": 3, "status": "booked", "unknown": 1}).encode()
+    assert messages.decode(legacy, BookingRequested) == BookingRequested(event_id=7, booking_id=42, user_id=3)
+
+def test_older_version_gets_defaults_for_appended_fields():
+    v1 = msgpack.packb([BookingConfirmation.TYPE, 1, 42, "SOLD_OUT", "SOLD_OUT"])
+    assert messages.decode(v1, BookingConfirmation) == BookingConfirmation(booking_id=42, status="SOLD_OUT",
+                                                                           reason="SOLD_OUT", event_id=None)
+
+def test_newer_version_with_appended_fields_is_decoded():
+    """The compatibility rule for rolling deploys: an older reader ignores fields appended after its version."""
+    v3 = msgpack.packb([BookingCancelled.TYPE, BookingCancelled.VERSION + 1, 42, 7, 3, "CONFIRMED", "appended"])
+    assert messages.decode(v3, BookingCancelled) == BookingCancelled(booking_id=42, event_id=7, user_id=3,
+                                                                     previous_status="CONFIRMED")
+
+@pytest.mark.parametrize("payload", [
+    msgpack.packb([BookingRequested.TYPE, 0, 7, 42, 3]),  # No such version
+    msgpack.packb([BookingRequested.TYPE, "2", 7, 42, 3]),  # Not a version at all
+    msgpack.packb([BookingConfirmation.TYPE, 2, 42, "CONFIRMED"]),  # Another message type
+    msgpack.packb([99, 1, 7, 42, 3]),  # Unknown message type
+    msgpack.packb([BookingRequested.TYPE, BookingRequested.VERSION + 1, 7]),  # Newer, but required fields missing
+    b"\xc1",  # Not msgpack
+    b'{"event_id": 7',  # Truncated legacy JSON
+    b'{"event_id": 7}',  # Legacy JSON without required fields
+], ids=["version_0", "version_not_int", "wrong_type", "unknown_type", "missing_fields",
+        "malformed", "legacy_truncated", "legacy_missing_fields"])
+def test_undecodable_payloads_raise_message_decode_error(payload):
+    with pytest.raises(MessageDecodeError):
+        messages.decode(payload, BookingRequested)
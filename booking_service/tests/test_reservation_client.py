@@ -0,0 +1,96 @@
+# Tests for the booking fast path: reserving inline, falling back to the outbox, and the cooldown
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import messages, models
+from app.auth import get_current_user
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.reservation_client import ReservationClient, reservation_client
+
+BOOKING = {"id": 1, "event_id": 7, "user_id": 5}
+
+def _client(handler) -> ReservationClient:
+    """A started client whose requests go to `handler` instead of events_service."""
+    client = ReservationClient()
+    client.client = httpx.AsyncClient(base_url="http://events", transport=httpx.MockTransport(handler))
+    return client
+
+def _reply(status: str):
+    return lambda request: httpx.Response(200, json={"booking_id": 1, "status": status, "reason": status})
+
+def test_reserve_returns_the_decided_status():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return _reply("CONFIRMED")(request)
+
+    assert asyncio.run(_client(handler).reserve(BOOKING, True, None)) == "CONFIRMED"
+    assert sent[0].url.path == "/internal/reservations"
+    assert json.loads(sent[0].read()) == {"booking_id": 1, "event_id": 7, "user_id": 5, "join_waitlist": True}
+
+def _timeout(request):
+    raise httpx.ReadTimeout("timed out", request=request)
+
+@pytest.mark.parametrize("handler", [
+    lambda request: httpx.Response(403, json={"detail": "Forbidden"}),  # Token mismatch
+    lambda request: httpx.Response(503, json={"detail": "Service overloaded"}),  # Shed by events_service
+    _timeout,
+], ids=["forbidden", "shed", "timeout"])
+def test_failure_leaves_the_booking_to_the_saga_and_starts_the_cooldown(handler):
+    client = _client(handler)
+    assert asyncio.run(client.reserve(BOOKING, False, None)) is None
+    assert client.retry_at > 0
+
+def test_fast_path_is_skipped_during_the_cooldown(mocker):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    clock = mocker.patch("app.reservation_client.time.monotonic", return_value=100.0)
+    client = _client(handler)
+    asyncio.run(client.reserve(BOOKING, False, None))
+    asyncio.run(client.reserve(BOOKING, False, None))
+    assert len(calls) == 1  # The second booking did not wait on the unhealthy service
+
+    clock.return_value = 100.0 + settings.FAST_PATH_COOLDOWN_SECONDS
+    client.client = _client(_reply("CONFIRMED")).client
+    assert asyncio.run(client.reserve(BOOKING, False, None)) == "CONFIRMED"
+
+@pytest.fixture
+def api(db_session, mocker):
+    """The booking API on the test database, with an authenticated user and no group commit."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "5"}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def _use_fast_path(mocker, handler):
+    mocker.patch.object(reservation_client, "client", _client(handler).client)
+    mocker.patch.object(reservation_client, "retry_at", 0.0)
+
+def test_booking_is_decided_inline_by_the_fast_path(api, db_session, mocker):
+    _use_fast_path(mocker, _reply("CONFIRMED"))
+
+    response = api.post("/bookings/", json={"event_id": 7})
+
+    assert response.status_code == 201 and response.json()["status"] == "CONFIRMED"
+    assert db_session.get(models.Booking, response.json()["id"]).status == "CONFIRMED"
+
+def test_failed_fast_path_falls_back_to_the_outbox(api, db_session, mocker):
+    _use_fast_path(mocker, lambda request: httpx.Response(503))
+
+    response = api.post("/bookings/", json={"event_id": 7})
+
+    assert response.status_code == 201 and response.json()["status"] == "PENDING"
+    outbox = db_session.query(models.Outbox).one()
+    request = messages.decode(outbox.payload, messages.BookingRequested)
+    assert (request.booking_id, request.event_id, request.user_id) == (response.json()["id"], 7, 5)
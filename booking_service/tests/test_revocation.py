@@ -0,0 +1,55 @@
+# Tests for the in-memory revocation list kept by every booking_service process
+import asyncio
+import time
+
+import fakeredis
+
+from app.revocation import REVOKED_TOKENS_KEY, REVOKED_USERS_KEY, RevocationList
+
+def test_apply_token_revokes_only_that_jti():
+    revocations = RevocationList()
+    revocations.apply("token", "abc", time.time() + 60)
+
+    assert revocations.is_revoked("abc", "1", 1000) is True
+    assert revocations.is_revoked("def", "1", 1000) is False
+    assert revocations.is_revoked(None, "1", 1000) is False
+
+def test_apply_user_revokes_tokens_issued_up_to_then():
+    """iat is whole seconds, so a token issued in the same second as the revocation is rejected too."""
+    revocations = RevocationList()
+    revocations.apply("user", "42", 1000.7)
+
+    assert revocations.is_revoked(None, "42", 1000) is True
+    assert revocations.is_revoked(None, "42", 1001) is False
+    assert revocations.is_revoked(None, "43", 1000) is False
+
+def test_apply_user_keeps_the_latest_revocation():
+    """A late or replayed older message must not shorten a newer revocation."""
+    revocations = RevocationList()
+    revocations.apply("user", "42", 2000.0)
+    revocations.apply("user", "42", 1000.0)
+
+    assert revocations.users["42"] == 2000.0
+    assert revocations.is_revoked(None, "42", 1500) is True
+
+def test_apply_ignores_unknown_kinds():
+    revocations = RevocationList()
+    revocations.apply("session", "abc", 1000.0)
+    assert revocations.tokens == {} and revocations.users == {}
+
+def test_resync_replaces_the_local_copy_with_the_live_snapshot():
+    """Expired tokens and user revocations older than any live token are left out; stale local entries go."""
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    now = time.time()
+
+    async def load():
+        await redis_client.zadd(REVOKED_TOKENS_KEY, {"live": now + 600, "expired": now - 1})
+        await redis_client.zadd(REVOKED_USERS_KEY, {"recent": now - 60, "ancient": now - 10 ** 6})
+        revocations = RevocationList()
+        revocations.apply("token", "local-only", now + 600)
+        await revocations.resync(redis_client)
+        return revocations
+
+    revocations = asyncio.run(load())
+    assert set(revocations.tokens) == {"live"}
+    assert set(revocations.users) == {"recent"}
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from aiokafka import AIOKafkaConsumer
+from sqlalchemy.orm import Session
+
+from . import crud, inventory, messages, models
+from .config import settings
+from .database import WorkerSessionLocal, get_redis_client
+
+logger = logging.getLogger("events_analytics")
+
+# Counter slots of a bucket
+REQUESTED, CONFIRMED, REJECTED = range(3)
+COUNTERS = ("requested", "confirmed", "rejected")
+# Confirmation statuses that decide a booking, by counter
+DECIDED_COUNTERS = {"CONFIRMED": CONFIRMED, "REJECTED": REJECTED}
+
+
+class SalesAggregator:
+    """
+    Accumulates sales counters per (event_id, minute) between flushes.
+    Each bucket is a 3-slot unsigned int array rather than a dict or object per bucket.
+
+    Both topics are at-least-once (relay retries, confirmation batches re-sent after a failure),
+    so messages are first held per (booking_id, counter) and only counted by settle(), once Redis
+    confirms that booking was not counted already. Redeliveries within ANALYTICS_DEDUP_TTL_SECONDS
+    are dropped; if Redis is unavailable, everything is counted.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[int, int], array] = {}
+        self.pending: Dict[Tuple[int, int], Tuple[int, int]] = {}  # (booking_id, counter) -> (event_id, timestamp_ms)
+
+    def record(self, booking_id: int, event_id: int, timestamp_ms: int, counter: int):
+        # The first copy decides the bucket; a redelivery may carry a later timestamp
+        self.pending.setdefault((booking_id, counter), (event_id, timestamp_ms))
+
+    def settle(self) -> None:
+        """Counts the pending messages whose booking was not counted before. Blocking (Redis)."""
+        pending, self.pending = self.pending, {}
+        for key in _first_seen(list(pending)):
+            event_id, timestamp_ms = pending[key]
+            self.add(event_id, timestamp_ms, key[1])
+
+    def add(self, event_id: int, timestamp_ms: int, counter: int, count: int = 1):
+        key = (event_id, timestamp_ms // 60_000)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = array("I", (0, 0, 0))
+        bucket[counter] += count
+
+    def merge(self, buckets: Dict[Tuple[int, int], array]):
+        for (event_id, minute), bucket in buckets.items():
+            for counter, count in enumerate(bucket):
+                if count:
+                    self.add(event_id, minute * 60_000, counter, count)
+
+    def drain(self) -> Dict[Tuple[int, int], array]:
+        buckets, self.buckets = self.buckets, {}
+        return buckets
+
+
+def _first_seen(keys: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Marks (booking_id, counter) keys as counted in one round trip; returns those not marked before."""
+    if not keys:
+        return keys
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for booking_id, counter in keys:
+            pipe.set(f"analytics:counted:{COUNTERS[counter]}:{booking_id}", 1,
+                     nx=True, ex=settings.ANALYTICS_DEDUP_TTL_SECONDS)
+        return [key for key, new in zip(keys, pipe.execute()) if new]
+    except Exception as e:
+        logger.error(f"Analytics deduplication unavailable, counting {len(keys)} messages as new: {e}")
+        return keys
+
+
+def _flush(buckets: Dict[Tuple[int, int], array]) -> None:
+    rows = [
+        {
+            "event_id": event_id,
+            "bucket_start": datetime.fromtimestamp(minute * 60, tz=timezone.utc),
+            **dict(zip(COUNTERS, bucket)),
+        }
+        for (event_id, minute), bucket in buckets.items()
+    ]
+    db = WorkerSessionLocal()
+    try:
+        crud.add_sales_rollups(db, rows)
+    finally:
+        db.close()
+
+
+def _count(aggregator: SalesAggregator, msg) -> None:
+    try:
+        if msg.topic == settings.KAFKA_BOOKING_TOPIC:
+            request = messages.decode(msg.value, messages.BookingRequested)
+            if request.status == "booked" and request.event_id:
+                aggregator.record(request.booking_id, request.event_id, msg.timestamp, REQUESTED)
+        else:
+            confirmation = messages.decode(msg.value, messages.BookingConfirmation)
+            # v1 confirmations carry no event_id and cannot be attributed. WAITLISTED is not an
+            # outcome yet: a promotion later sends CONFIRMED for the same booking
+            counter = DECIDED_COUNTERS.get(confirmation.status)
+            if confirmation.event_id and counter is not None:
+                aggregator.record(confirmation.booking_id, confirmation.event_id, msg.timestamp, counter)
+    except messages.MessageDecodeError as e:
+        logger.error(f"Skipping undecodable message on {msg.topic}: {e}")
+
+
+async def consume_sales_analytics():
+    """
+    Reads the booking and confirmation topics in its own consumer group and keeps the per-minute
+    rollups current. Buckets use the message timestamp, so replays land in the right minute.
+    Redelivered messages are deduplicated per booking (see SalesAggregator). Bookings are marked
+    as counted just before the flush, so a crash in between loses that flush's counts rather than
+    doubling them on replay; either way the dashboard is off by at most one flush interval.
+    """
+    consumer = AIOKafkaConsumer(
+        settings.KAFKA_BOOKING_TOPIC,
+        settings.KAFKA_CONFIRMATION_TOPIC,
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        group_id="events_analytics_group",
+        auto_offset_reset="earliest",
+        enable_auto_commit=False
+    )
+    aggregator = SalesAggregator()
+
+    await consumer.start()
+    logger.info("Analytics Consumer started.")
+
+    try:
+        flushed_at = time.monotonic()
+        while True:
+            batches = await consumer.getmany(
+                timeout_ms=settings.CONSUMER_BATCH_TIMEOUT_MS, max_records=settings.CONSUMER_BATCH_SIZE
+            )
+            for partition_records in batches.values():
+                for msg in partition_records:
+                    _count(aggregator, msg)
+
+            due = time.monotonic() - flushed_at >= settings.ANALYTICS_FLUSH_INTERVAL_SECONDS
+            if not due or not (aggregator.pending or aggregator.buckets):
+                continue
+            await asyncio.to_thread(aggregator.settle)
+            buckets = aggregator.drain()
+            try:
+                await asyncio.to_thread(_flush, buckets)
+                await consumer.commit()
+            except Exception as e:
+                # Keep the counts (already deduplicated) and retry on the next flush; offsets stay uncommitted meanwhile
+                logger.error(f"Failed to flush {len(buckets)} sales buckets: {e}")
+                aggregator.merge(buckets)
+            flushed_at = time.monotonic()
+    finally:
+        await consumer.stop()
+
+
+def sales_summary(db: Session, event: models.Event, minutes: int) -> dict:
+    """Builds the dashboard view for one event from its rollups only; bookings are never scanned."""
+    now = datetime.now(timezone.utc)
+    rollups = crud.get_sales_rollups(db, event.id, now - timedelta(minutes=minutes))
+    totals = {name: sum(getattr(rollup, name) for rollup in rollups) for name in COUNTERS}
+
+    # Confirmed sales per minute over the recent window drive the sell-out projection
+    window = settings.ANALYTICS_VELOCITY_WINDOW_MINUTES
+    recent_since = now - timedelta(minutes=window)
+    recent_confirmed = sum(
+        rollup.confirmed for rollup in rollups
+        if rollup.bucket_start.replace(tzinfo=rollup.bucket_start.tzinfo or timezone.utc) >= recent_since
+    )
+    velocity = recent_confirmed / window
+
+    decided = totals["confirmed"] + totals["rejected"]
+    # tickets_sold of a sharded event lags its shards, so read the shards themselves
+    remaining = inventory.available_tickets(db, event.id) if event.inventory_shards > 1 else event.available_tickets
+    projected_sellout_at: Optional[datetime] = None
+    if remaining <= 0:
+        projected_sellout_at = now
+    elif velocity > 0:
+        projected_sellout_at = now + timedelta(minutes=remaining / velocity)
+
+    return {
+        "event_id": event.id,
+        "window_minutes": minutes,
+        "buckets": rollups,
+        **totals,
+        "confirm_ratio": totals["confirmed"] / decided if decided else None,
+        "bookings_per_minute": velocity,
+        "sell_through_pct": 100.0 * (event.total_tickets - remaining) / event.total_tickets if event.total_tickets else 0.0,
+        "projected_sellout_at": projected_sellout_at,
+    }
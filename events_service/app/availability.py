@@ -0,0 +1,140 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+from redis import Redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import inventory, models
+from .database import get_redis_client
+
+logger = logging.getLogger("availability")
+
+# --- Redis Availability Map ---
+# availability:tickets   hash  event_id -> available tickets
+# availability:version   int   bumped on every change
+# availability:changes   zset  event_id scored by the version of its last change
+# availability:missed    hash  event_id -> number of changes dropped because the event was not cached
+# The change set and the missed counters hold one member per event, so they are bounded by the catalog size.
+#
+# Absolute values are only written where nothing can be selling concurrently (new events,
+# pre-warming ahead of an on-sale) or by a backfill after a miss. Reservations and releases publish
+# +/-1 deltas instead: they commute, so writers finishing in any order can never leave a stale,
+# too-high count behind, the way "read the count after commit, then publish" could.
+#
+# A backfill reads the database, so a delta published between that read and the write would be
+# lost: the event was not cached yet, so the delta is dropped. Dropped deltas bump the event's
+# missed counter, and the backfill only writes if the counter is unchanged since before its read.
+# Otherwise the next lookup retries. The remaining window errs low, never high: a reservation that
+# committed before the read but publishes after the write is counted twice, showing one ticket fewer.
+TICKETS_KEY = "availability:tickets"
+VERSION_KEY = "availability:version"
+CHANGES_KEY = "availability:changes"
+MISSED_KEY = "availability:missed"
+
+_PUBLISH_SCRIPT = """
+local version = redis.call('INCR', KEYS[2])
+for i = 1, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    redis.call('ZADD', KEYS[3], version, ARGV[i])
+end
+return version
+"""
+
+
+_CHANGE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    redis.call('HINCRBY', KEYS[4], ARGV[1], 1)
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+local version = redis.call('INCR', KEYS[2])
+redis.call('ZADD', KEYS[3], version, ARGV[1])
+return version
+"""
+
+
+# ARGV: (event_id, available, missed counter read before the database read) triples
+_BACKFILL_SCRIPT = """
+for i = 1, #ARGV, 3 do
+    local missed = redis.call('HGET', KEYS[2], ARGV[i]) or '0'
+    if missed == ARGV[i + 2] then
+        redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+"""
+
+
+def publish(redis_client: Redis, available: Dict[int, int]) -> int:
+    """Atomically stores new availability for the given events and returns the new version."""
+    args = []
+    for event_id, count in available.items():
+        args += [event_id, count]
+    return int(redis_client.eval(_PUBLISH_SCRIPT, 3, TICKETS_KEY, VERSION_KEY, CHANGES_KEY, *args))
+
+
+def record(available: Dict[int, int]) -> None:
+    """Best-effort publish of new events' availability; a Redis outage must never fail the write."""
+    try:
+        publish(get_redis_client(), available)
+    except Exception as e:
+        logger.error(f"Failed to publish availability for events {list(available)}: {e}")
+
+
+def record_change(event_id: int, delta: int) -> None:
+    """
+    Best-effort, after commit: applies a reservation (-1) or release (+1) to the map. An event missing
+    from the map is left alone; the next lookup loads it from the database, this change included.
+    Its missed counter is bumped, so a backfill that read the database before this commit is dropped.
+    """
+    try:
+        get_redis_client().eval(_CHANGE_SCRIPT, 4, TICKETS_KEY, VERSION_KEY, CHANGES_KEY, MISSED_KEY, event_id, delta)
+    except Exception as e:
+        logger.error(f"Failed to publish availability change for event {event_id}: {e}")
+
+
+def _load_from_db(db: Session, event_ids: Iterable[int]) -> Dict[int, int]:
+    stmt = select(models.Event.id, inventory.available_tickets_column()).where(models.Event.id.in_(list(event_ids)))
+    return {event_id: available for event_id, available in db.execute(stmt)}
+
+
+def lookup(redis_client: Redis, db: Session, event_ids: list, since: Optional[int] = None) -> Tuple[Optional[int], Dict[int, int]]:
+    """
+    Returns (version, {event_id: available}). With `since`, only events changed after that
+    version are returned. Events missing from Redis are read from the database and backfilled.
+    Unknown event ids are left out.
+    """
+    try:
+        # One round trip for the version, the cached values, the missed counters for a backfill
+        # and (optionally) the change set
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.get(VERSION_KEY)
+        pipe.hmget(TICKETS_KEY, event_ids)
+        pipe.hmget(MISSED_KEY, event_ids)
+        if since is not None:
+            pipe.zrangebyscore(CHANGES_KEY, f"({since}", "+inf")
+        version, cached, missed, *changed = pipe.execute()
+    except Exception as e:
+        logger.error(f"Availability map unavailable, reading from the database: {e}")
+        return None, _load_from_db(db, event_ids)
+
+    result = {event_id: int(value) for event_id, value in zip(event_ids, cached) if value is not None}
+    misses = [event_id for event_id in event_ids if event_id not in result]
+    if misses:
+        loaded = _load_from_db(db, misses)
+        result.update(loaded)
+        missed_before = dict(zip(event_ids, missed))
+        args = []
+        for event_id, available in loaded.items():
+            args += [event_id, available, missed_before[event_id] or "0"]
+        try:
+            # Backfill only: no version bump, never overwrites a value published meanwhile, and
+            # skips events whose changes since the database read were dropped
+            if args:
+                redis_client.eval(_BACKFILL_SCRIPT, 2, TICKETS_KEY, MISSED_KEY, *args)
+        except Exception as e:
+            logger.error(f"Failed to backfill availability: {e}")
+
+    if since is not None:
+        changed_ids = {int(member) for member in changed[0]}
+        result = {event_id: available for event_id, available in result.items() if event_id in changed_ids}
+    return int(version or 0), result
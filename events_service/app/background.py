@@ -0,0 +1,32 @@
+import asyncio
+import logging
+from typing import List
+
+from .config import settings
+from .coordination import run_as_leader
+from .kafka_consumer import consume_booking_events, purge_inbox_periodically
+from .analytics import consume_sales_analytics
+from . import inventory
+
+logger = logging.getLogger("events_background")
+
+
+def start_background_tasks(redis_client) -> List[asyncio.Task]:
+    """Starts the consumers and periodic jobs. Used by the API lifespan and by app.worker."""
+    # Consumer groups already split topic partitions between processes
+    tasks = [asyncio.create_task(consume_booking_events())]
+    if settings.ANALYTICS_ENABLED:
+        tasks.append(asyncio.create_task(consume_sales_analytics()))
+
+    # Periodic jobs over the whole database run in one elected process at a time
+    tasks.append(run_as_leader(redis_client, "inbox-cleanup", purge_inbox_periodically))
+    tasks.append(run_as_leader(redis_client, "inventory-sync", inventory.sync_periodically))
+    logger.info("Background tasks started.")
+    return tasks
+
+
+async def stop_background_tasks(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    logger.info("Background tasks stopped.")
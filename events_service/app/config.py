@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,11 +9,106 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     REDIS_URL: str
 
+    # --- DATABASE POOL SETTINGS ---
+    DB_CONNECTION_BUDGET: int = 20  # Connections one replica may hold; split across uvicorn workers
+    DB_POOL_SIZE: int = 0  # 0 = derive from DB_CONNECTION_BUDGET
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 2.0  # Fail fast with a 503 instead of queueing behind a saturated pool
+    DB_POOL_RECYCLE: int = 1800
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_WORKER_MAX_OVERFLOW: int = 1
+    DB_WORKER_POOL_TIMEOUT: float = 30.0
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
+    # --- READ REPLICA SETTINGS ---
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated; empty = all reads go to the primary
+    REPLICA_MAX_LAG_SECONDS: float = 0  # 0 = no lag bound
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+
     # --- KAFKA SETTINGS ---
     KAFKA_BOOTSTRAP_SERVERS: str = "kafka:9092"
     KAFKA_BOOKING_TOPIC: str = "booking_events"
     KAFKA_CONFIRMATION_TOPIC: str = "booking_confirmations"
+    KAFKA_CANCELLATION_TOPIC: str = "booking_cancellations"
+    CONSUMER_BATCH_SIZE: int = 500
+    CONSUMER_BATCH_TIMEOUT_MS: int = 100
+    # A batch failing this many times in a row is applied record by record; records that still fail
+    # on their own go to KAFKA_DEAD_LETTER_TOPIC instead of blocking their partition
+    CONSUMER_MAX_BATCH_ATTEMPTS: int = 5
+    KAFKA_DEAD_LETTER_TOPIC: str = "booking_events_dead_letter"
+
+    # --- INTERNAL API SETTINGS ---
+    INTERNAL_API_TOKEN: str = ""  # Shared with booking_service for /internal; empty disables those routes
+
+    # --- BACKGROUND TASK SETTINGS ---
+    RUN_BACKGROUND_TASKS: bool = True  # False: API only; run `python -m app.worker` separately
+    LEASE_TTL_SECONDS: float = 15.0
+
+    # --- INBOX SETTINGS ---
+    # Must outlive any redelivery: a message older than this would be applied again
+    INBOX_RETENTION_HOURS: float = 168
+    INBOX_CLEANUP_INTERVAL_SECONDS: float = 3600
+    INBOX_CLEANUP_BATCH_SIZE: int = 5000
+
+    # --- INVENTORY SETTINGS ---
+    INVENTORY_SYNC_INTERVAL_SECONDS: float = 5.0  # How often tickets_sold of sharded events catches up
+
+    # --- BULK IMPORT SETTINGS ---
+    BULK_IMPORT_CHUNK_SIZE: int = 1000  # Records validated and inserted per transaction
+    BULK_IMPORT_MAX_RECORDS: int = 100_000
+
+    # --- ANALYTICS SETTINGS ---
+    ANALYTICS_ENABLED: bool = True
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    ANALYTICS_DEDUP_TTL_SECONDS: int = 3600  # How long a counted booking is remembered, to drop redeliveries
+    ANALYTICS_VELOCITY_WINDOW_MINUTES: int = 5  # Window for the bookings/min rate behind the sell-out projection
+
+    # --- EVENT CACHE SETTINGS ---
+    EVENT_CACHE_TTL_SECONDS: int = 600  # Event detail; ticket counts always come from the availability map
+    EVENT_LIST_CACHE_TTL_SECONDS: int = 5  # First page of GET /events, so new events show up quickly
+
+    # --- PREWARM SETTINGS ---
+    PREWARM_ENABLED: bool = True
+    PREWARM_LEAD_SECONDS: int = 300  # How long before on_sale_at caches and pools are warmed
+    PREWARM_CHECK_INTERVAL_SECONDS: float = 30.0
+
+    # --- LOAD SHEDDING SETTINGS ---
+    SHED_LOOP_LAG_MS: float = 250.0
+    SHED_POOL_WAIT_MS: float = 500.0
+    SHED_NON_CRITICAL_FACTOR: float = 0.5  # Non-critical routes shed at this fraction of the thresholds
+    SHED_SIGNAL_HALF_LIFE_SECONDS: float = 1.0
+    SHED_RETRY_AFTER_SECONDS: int = 2
+
+    # --- TOKEN REVOCATION SETTINGS ---
+    REVOCATION_RESYNC_SECONDS: float = 30.0  # Full snapshot reload, on top of pub/sub updates
+    REVOCATION_RETRY_SECONDS: float = 2.0
+
+    # --- PROFILING SETTINGS ---
+    PROFILING_ENABLED: bool = False  # Installs the profiling middleware and /admin/profiling routes
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_MAX_CONCURRENT: int = 2  # Samplers running at once per process
+    PROFILING_TOKEN_TTL_SECONDS: int = 600
+    PROFILING_RETENTION_SECONDS: int = 3600
+    PROFILING_SIGNAL_SECONDS: int = 30  # Length of the profile `kill -USR1` takes of app.worker
+
+    # --- TRACING SETTINGS ---
+    SERVICE_NAME: str = "events_service"
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01  # Share of new traces recorded; continued traces follow the caller's decision
+    TRACE_EXPORT_PATH: str = "/var/log/fastticket/traces.jsonl"
+    TRACE_EXPORT_MAX_BYTES: int = 50 * 1024 * 1024  # Rotated at this size
+    TRACE_EXPORT_BACKUP_COUNT: int = 3
 
     model_config = SettingsConfigDict(env_file="../../booking-service/.env",extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+class _LazySettings:
+    """Reads the environment on first attribute access instead of at import time."""
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+settings = _LazySettings()
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Tuple
+
+from .config import settings
+
+logger = logging.getLogger("coordination")
+
+# --- Redis Lease Locks ---
+# A lease is a key holding a random token with a TTL. Only the holder (same token) can renew
+# or release it, so a process that stalls past the TTL silently loses it instead of deleting
+# a lease someone else has since taken.
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class Lease:
+    def __init__(self, redis_client, name: str, ttl: float):
+        self.redis = redis_client
+        self.key = f"lease:{settings.SERVICE_NAME}:{name}"
+        self.token = uuid.uuid4().hex
+        self.ttl_ms = int(ttl * 1000)
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self.redis.eval(_RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    async def release(self) -> None:
+        await self.redis.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+
+
+class PartitionedWork:
+    """
+    Spreads `partitions` slots of a background job across every process that runs one, one lease
+    per slot. Processes heartbeat into a member set; each holds at most its fair share
+    (ceil(partitions / live members)) and gives slots back when new members join. A slot's job runs
+    only while its lease is renewed, and is cancelled as soon as a renewal fails.
+    With a single partition this is plain leader election.
+    """
+
+    def __init__(self, redis_client, name: str, partitions: int, job: Callable[[int], Awaitable]):
+        self.redis = redis_client
+        self.name = name
+        self.partitions = partitions
+        self.job = job
+        self.ttl = settings.LEASE_TTL_SECONDS
+        self.member = uuid.uuid4().hex
+        self.members_key = f"members:{settings.SERVICE_NAME}:{name}"
+        self.held: Dict[int, Tuple[Lease, asyncio.Task]] = {}
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    await self._tick()
+                except Exception as e:
+                    # Without Redis no lease can be renewed: stop everything rather than risk a second owner
+                    logger.error(f"Coordination for {self.name} failed, pausing its jobs: {e}")
+                    await self._stop_all(release=False)
+                await asyncio.sleep(self.ttl / 3)
+        finally:
+            await self._stop_all(release=True)
+
+    async def _tick(self):
+        # 1. Heartbeat and count live members
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(self.members_key, {self.member: now})
+        pipe.zremrangebyscore(self.members_key, 0, now - self.ttl)
+        pipe.zcard(self.members_key)
+        pipe.expire(self.members_key, int(self.ttl * 2) + 1)
+        _, _, live, _ = await pipe.execute()
+        fair_share = math.ceil(self.partitions / max(live, 1))
+
+        # 2. Renew what we hold; drop slots whose lease or job is gone
+        for partition, (lease, task) in list(self.held.items()):
+            if task.done():
+                logger.warning(f"{self.name}[{partition}] job exited, releasing it")
+                await self._stop(partition, release=True)
+            elif not await lease.renew():
+                logger.warning(f"{self.name}[{partition}] lease lost")
+                await self._stop(partition, release=False)
+
+        # 3. Hand back slots above our share so newer members get some
+        while len(self.held) > fair_share:
+            await self._stop(max(self.held), release=True)
+
+        # 4. Claim free slots up to our share
+        for partition in range(self.partitions):
+            if len(self.held) >= fair_share:
+                break
+            if partition in self.held:
+                continue
+            lease = Lease(self.redis, f"{self.name}:{partition}", self.ttl)
+            if await lease.acquire():
+                logger.info(f"Acquired {self.name}[{partition}]")
+                self.held[partition] = (lease, asyncio.create_task(self.job(partition)))
+
+    async def _stop(self, partition: int, release: bool):
+        lease, task = self.held.pop(partition)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if release:
+            try:
+                await lease.release()
+            except Exception as e:
+                logger.error(f"Failed to release {self.name}[{partition}]: {e}")
+
+    async def _stop_all(self, release: bool):
+        for partition in list(self.held):
+            await self._stop(partition, release)
+
+
+def run_partitioned(redis_client, name: str, partitions: int, job: Callable[[int], Awaitable]) -> asyncio.Task:
+    return asyncio.create_task(PartitionedWork(redis_client, name, partitions, job).run())
+
+
+def run_as_leader(redis_client, name: str, job: Callable[[], Awaitable]) -> asyncio.Task:
+    """Runs job() in exactly one process of the service at a time."""
+    return run_partitioned(redis_client, name, 1, lambda _partition: job())
@@ -1,29 +1,321 @@
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, update, delete, func, and_, or_, tuple_, cast, Double
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.orm import Session
-from . import models
+from . import models, availability, inventory
+from .tracing import start_span
 
 
 def get_event(db: Session, event_id: int):
     return db.query(models.Event).filter(models.Event.id == event_id).first()
 
 
-def reserve_ticket(db: Session, event_id: int) -> str:
+# Columns of schemas.EventRead, with availability computed by the database
+EVENT_LIST_COLUMNS = (
+    models.Event.id,
+    models.Event.name,
+    models.Event.location,
+    models.Event.price,
+    models.Event.total_tickets,
+    models.Event.tickets_sold,
+    (models.Event.total_tickets - models.Event.tickets_sold).label("available_tickets"),
+    models.Event.date,
+    models.Event.on_sale_at,
+    models.Event.created_at,
+)
+
+
+def list_event_rows(db: Session, skip: int, limit: int, include_description: bool = True) -> list:
+    """
+    Returns a page of events as plain dicts, without building ORM objects.
+    """
+    columns = EVENT_LIST_COLUMNS + ((models.Event.description,) if include_description else ())
+    stmt = select(*columns).order_by(models.Event.id).offset(skip).limit(limit)
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+def get_event_row(db: Session, event_id: int) -> Optional[dict]:
+    """One event in the EventRead shape, as a plain dict (what the detail cache stores)."""
+    row = db.execute(
+        select(*EVENT_LIST_COLUMNS, models.Event.description).where(models.Event.id == event_id)
+    ).first()
+    return row._asdict() if row is not None else None
+
+
+def get_upcoming_on_sales(db: Session, start: datetime, end: datetime) -> List[models.Event]:
+    return db.query(models.Event).filter(models.Event.on_sale_at > start, models.Event.on_sale_at <= end).all()
+
+
+# --- Bulk Import ---
+def insert_event_chunk(db: Session, indexed_rows: List[Tuple[int, dict]]) -> Tuple[Dict[int, int], Dict[int, str]]:
+    """
+    Inserts a chunk of validated events in one transaction with a multi-row INSERT ... RETURNING.
+    If the database rejects the chunk, each row is retried in its own savepoint so one bad row
+    does not sink its neighbours. Takes (record_index, values) pairs and returns
+    ({record_index: event_id}, {record_index: error}).
+    """
+    created: Dict[int, int] = {}
+    errors: Dict[int, str] = {}
+    stmt = insert(models.Event).returning(models.Event.id, sort_by_parameter_order=True)
+
+    def shards(pairs):
+        return [(event_id, values["total_tickets"], values["inventory_shards"]) for event_id, values in pairs]
+
+    try:
+        with db.begin_nested():
+            ids = db.scalars(stmt, [values for _, values in indexed_rows]).all()
+            inventory.create_shards(db, shards(zip(ids, (values for _, values in indexed_rows))))
+        created = {index: event_id for (index, _), event_id in zip(indexed_rows, ids)}
+    except DBAPIError:
+        for index, values in indexed_rows:
+            try:
+                with db.begin_nested():
+                    created[index] = db.scalars(stmt, [values]).one()
+                    inventory.create_shards(db, shards([(created[index], values)]))
+            except DBAPIError as e:
+                created.pop(index, None)
+                errors[index] = str(e.orig)
+    db.commit()
+
+    # One availability publish for the whole chunk; new events have nothing sold yet
+    if created:
+        totals = {index: values["total_tickets"] for index, values in indexed_rows}
+        availability.record({event_id: totals[index] for index, event_id in created.items()})
+    return created, errors
+
+
+# --- Search ---
+def encode_search_cursor(rank: float, event_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}:{event_id}".encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Raises ValueError for a malformed cursor."""
+    rank, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return float(rank), int(event_id)
+
+
+def search_event_rows(db: Session, query: str, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """
+    Full-text search over name, location and description, plus trigram fuzzy matching on name.
+    Results are ordered by relevance and paginated by (rank, id) keyset, so deep pages stay cheap.
+    Returns (rows, next_cursor).
+    """
+    ts_query = func.websearch_to_tsquery("english", query)
+    # Cast to double so the rank survives the round trip through the cursor exactly
+    rank = cast(func.ts_rank_cd(models.Event.search_vector, ts_query) + func.similarity(models.Event.name, query), Double)
+
+    stmt = select(*EVENT_LIST_COLUMNS, rank.label("rank")).where(
+        or_(
+            models.Event.search_vector.op("@@")(ts_query),
+            models.Event.name.op("%")(query),  # Typo-tolerant match, served by the trigram index
+        )
+    )
+    if cursor:
+        after_rank, after_id = decode_search_cursor(cursor)
+        stmt = stmt.where(tuple_(rank, models.Event.id) < tuple_(after_rank, after_id))
+    stmt = stmt.order_by(rank.desc(), models.Event.id.desc()).limit(limit + 1)
+
+    rows = [row._asdict() for row in db.execute(stmt)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1]["rank"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+# Inbox message types; a booking is applied at most once per type
+BOOKING_REQUESTED = "booking_requested"
+BOOKING_CANCELLED = "booking_cancelled"
+
+
+def get_processed_results(db: Session, booking_ids: List[int], message_type: str = BOOKING_REQUESTED) -> Dict[int, str]:
+    """Bulk inbox check: returns {booking_id: recorded result} for the ids that were already applied."""
+    if not booking_ids:
+        return {}
+    stmt = select(models.ProcessedMessage.booking_id, models.ProcessedMessage.result).where(
+        models.ProcessedMessage.message_type == message_type,
+        models.ProcessedMessage.booking_id.in_(booking_ids),
+    )
+    return {booking_id: result for booking_id, result in db.execute(stmt)}
+
+
+def purge_processed_messages(db: Session, older_than: datetime, batch_size: int) -> int:
+    """
+    Deletes inbox rows older than `older_than` in batches, so a large backlog never holds long locks.
+    WAITLISTED rows are kept: promotion reads them however long the booking has been waiting.
+    """
+    deleted = 0
+    while True:
+        expired = (
+            select(models.ProcessedMessage.booking_id, models.ProcessedMessage.message_type)
+            .where(models.ProcessedMessage.processed_at < older_than, models.ProcessedMessage.result != "WAITLISTED")
+            .limit(batch_size)
+        )
+        count = db.execute(
+            delete(models.ProcessedMessage)
+            .where(tuple_(models.ProcessedMessage.booking_id, models.ProcessedMessage.message_type).in_(expired))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def reserve_ticket(db: Session, event_id: int, booking_id: Optional[int] = None,
+                   join_waitlist: bool = False, user_id: Optional[int] = None) -> str:
     """
     Attempts to reserve a ticket.
-    Returns: "CONFIRMED", "SOLD_OUT", or "NOT_FOUND"
+    Returns: "CONFIRMED", "SOLD_OUT", "WAITLISTED" or "NOT_FOUND"
+
+    With a booking_id, the result is recorded in the inbox in the same transaction, so a
+    redelivered booking gets its original result instead of a second ticket. With join_waitlist,
+    a sold-out booking is queued for the next released ticket instead of being rejected.
     """
-    # 1. Lock the row to prevent race conditions (Optional but good for high concurrency)
+    # 1. Claim a ticket: lock the event row, or one inventory shard of a sharded event
+    with start_span("reserve_ticket.lock_wait", event_id=event_id):
+        shard_count = db.scalar(select(models.Event.inventory_shards).where(models.Event.id == event_id))
+        if shard_count is None:
+            result = "NOT_FOUND"
+        elif shard_count > 1:
+            result = "CONFIRMED" if inventory.claim_ticket(db, event_id) else "SOLD_OUT"
+        else:
+            # 2. Check Availability
+            event = db.query(models.Event).filter(models.Event.id == event_id).with_for_update().one()
+            if event.tickets_sold >= event.total_tickets:
+                result = "SOLD_OUT"
+            else:
+                # 3. Update
+                event.tickets_sold += 1
+                result = "CONFIRMED"
+
+    if result == "SOLD_OUT" and join_waitlist and booking_id is not None:
+        db.add(models.WaitlistEntry(event_id=event_id, booking_id=booking_id, user_id=user_id))
+        result = "WAITLISTED"
 
-    event = db.query(models.Event).filter(models.Event.id == event_id).with_for_update().first()
+    # 4. Record the outcome atomically with the reservation (rejections too, so replies stay stable)
+    if booking_id is not None:
+        db.add(models.ProcessedMessage(booking_id=booking_id, message_type=BOOKING_REQUESTED, result=result))
+    try:
+        with start_span("reserve_ticket.commit", event_id=event_id):
+            db.commit()
+    except IntegrityError:
+        # A concurrent consumer applied this booking first; its transaction holds the ticket
+        db.rollback()
+        return get_processed_results(db, [booking_id])[booking_id]
 
-    if not event:
-        return "NOT_FOUND"
+    # 5. Keep the availability map current for GET /events/availability
+    if result == "CONFIRMED":
+        availability.record_change(event_id, -1)
+    return result
 
-    # 2. Check Availability
-    if event.tickets_sold >= event.total_tickets:
-        return "SOLD_OUT"
 
-    # 3. Update
-    event.tickets_sold += 1
+def _promote_from_waitlist(db: Session, event_id: int) -> Optional[int]:
+    """
+    Hands a released ticket to the oldest waiting booking of the event and returns its booking id.
+    The ticket stays sold, so the event's inventory row is never touched. Entries locked by a
+    concurrent promotion or cancellation are skipped rather than waited for.
+    """
+    entry_request = db.execute(
+        select(models.WaitlistEntry, models.ProcessedMessage)
+        .join(models.ProcessedMessage, and_(
+            models.ProcessedMessage.booking_id == models.WaitlistEntry.booking_id,
+            models.ProcessedMessage.message_type == BOOKING_REQUESTED,
+        ))
+        .where(models.WaitlistEntry.event_id == event_id)
+        .order_by(models.WaitlistEntry.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if entry_request is None:
+        return None
+    entry, request = entry_request
+    request.result = "CONFIRMED"
+    request.processed_at = func.now()  # Restart retention: the booking only now holds its ticket
+    db.delete(entry)
+    return entry.booking_id
+
+
+def cancel_booking(db: Session, booking_id: int, event_id: int, previous_status: str) -> Optional[int]:
+    """
+    Applies a cancellation once: frees the booking's waitlist place or its ticket. A freed ticket
+    goes to the head of the waitlist, whose booking id is returned, or back to inventory.
+    """
+    # 1. Inbox: a redelivered cancellation is a no-op
+    db.add(models.ProcessedMessage(booking_id=booking_id, message_type=BOOKING_CANCELLED, result="CANCELLED"))
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return None
+
+    # 2. What does the booking hold? A waitlist place, a ticket, or nothing yet
+    holds_ticket = False
+    left_waitlist = db.execute(
+        delete(models.WaitlistEntry).where(models.WaitlistEntry.booking_id == booking_id)
+    ).rowcount
+    request = db.get(models.ProcessedMessage, (booking_id, BOOKING_REQUESTED), with_for_update=True)
+    if request is not None:
+        holds_ticket = not left_waitlist and request.result == "CONFIRMED"
+        request.result = "CANCELLED"
+    elif previous_status == "CONFIRMED":
+        # Confirmed long enough ago for its inbox row to have been purged
+        holds_ticket = True
+    else:
+        # Not applied yet: make sure the request, when it arrives, never takes a ticket
+        db.add(models.ProcessedMessage(booking_id=booking_id, message_type=BOOKING_REQUESTED, result="CANCELLED"))
+
+    # 3. Pass the ticket on, or release it
+    promoted = None
+    released = False
+    if holds_ticket:
+        promoted = _promote_from_waitlist(db, event_id)
+        if promoted is None:
+            shard_count = db.scalar(select(models.Event.inventory_shards).where(models.Event.id == event_id))
+            if shard_count is not None and shard_count > 1:
+                released = inventory.release_ticket(db, event_id)
+            elif shard_count is not None:
+                released = db.execute(
+                    update(models.Event)
+                    .where(models.Event.id == event_id, models.Event.tickets_sold > 0)
+                    .values(tickets_sold=models.Event.tickets_sold - 1)
+                ).rowcount > 0
     db.commit()
-    db.refresh(event)
-    return "CONFIRMED"
\ No newline at end of file
+
+    if released:
+        availability.record_change(event_id, +1)
+    return promoted
+
+
+# --- Sales Rollups ---
+def add_sales_rollups(db: Session, rows: List[dict]) -> None:
+    """
+    Adds the counters in `rows` ({event_id, bucket_start, requested, confirmed, rejected}) onto the
+    stored rollups in one multi-row upsert, so concurrent analytics consumers never overwrite each other.
+    """
+    if not rows:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(models.EventSalesRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.EventSalesRollup.event_id, models.EventSalesRollup.bucket_start],
+        set_={
+            name: getattr(models.EventSalesRollup, name) + getattr(stmt.excluded, name)
+            for name in ("requested", "confirmed", "rejected")
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_sales_rollups(db: Session, event_id: int, since: datetime) -> list:
+    stmt = (
+        select(models.EventSalesRollup)
+        .where(models.EventSalesRollup.event_id == event_id, models.EventSalesRollup.bucket_start >= since)
+        .order_by(models.EventSalesRollup.bucket_start)
+    )
+    return db.scalars(stmt).all()
@@ -1,11 +1,206 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import itertools
+import logging
+import os
+import time
+from typing import Optional
+from sqlalchemy import create_engine, text, Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 from redis import Redis, ConnectionPool
 from .config import settings
 
+logger = logging.getLogger("events_database")
+
+# --- Pool Telemetry ---
+class PoolMetrics:
+    """Checkout wait and timeout counters for one named pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_avg = 0.0  # Exponentially weighted, so it tracks the current load
+        self.wait_ms_max = 0.0
+        self.updated_at = time.monotonic()
+
+    def record_wait(self, wait_ms: float):
+        self.checkouts += 1
+        self.updated_at = time.monotonic()
+        self.wait_ms_avg = wait_ms if self.checkouts == 1 else 0.9 * self.wait_ms_avg + 0.1 * wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+
+pool_metrics: dict = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        # Keyed by logging name so the counters survive pool.recreate()
+        self.metrics = pool_metrics.setdefault(kw.get("logging_name") or "default", PoolMetrics())
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000)
+
+
 # --- PostgreSQL Setup ---
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _api_pool_size() -> int:
+    """
+    Pool size for request handlers. When DB_POOL_SIZE is not set, the per-replica
+    connection budget is split across uvicorn workers, minus what the background workers hold.
+    """
+    if settings.DB_POOL_SIZE > 0:
+        return settings.DB_POOL_SIZE
+    workers = max(int(os.environ.get("WEB_CONCURRENCY", "1")), 1)
+    per_process = settings.DB_CONNECTION_BUDGET // workers
+    reserved = settings.DB_WORKER_POOL_SIZE + settings.DB_WORKER_MAX_OVERFLOW + settings.DB_MAX_OVERFLOW
+    return max(per_process - reserved, 1)
+
+
+def _create_engine(name: str, pool_size: int, max_overflow: int, pool_timeout: float, url: Optional[str] = None):
+    url = url or settings.DATABASE_URL
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer does the pooling; holding connections here would pin server connections
+        return create_engine(url, poolclass=NullPool)
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+# Engines are created by init_engines() from the app lifespan, so importing the app never touches the database
+engine = None  # Request handlers (primary)
+worker_engine = None  # Background workers (Kafka consumers) get their own pool so they can't starve the API
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+# --- Read Replicas ---
+class ReplicaSet:
+    """Round-robins reads across replicas, skipping any that lag more than REPLICA_MAX_LAG_SECONDS."""
+
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self, engines: list):
+        self.engines = engines
+        self._lag: dict = {}
+        self._checked_at: dict = {}
+        self._counter = itertools.count()
+
+    def pick(self) -> Optional[Engine]:
+        candidates = [eng for eng in self.engines if self._is_fresh(eng)]
+        if not candidates:
+            return None
+        return candidates[next(self._counter) % len(candidates)]
+
+    def _is_fresh(self, eng: Engine) -> bool:
+        if settings.REPLICA_MAX_LAG_SECONDS <= 0:
+            return True
+        # Lag is sampled at most once per interval, so this stays off the request path most of the time
+        now = time.monotonic()
+        if now - self._checked_at.get(eng, 0.0) >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            self._checked_at[eng] = now
+            self._lag[eng] = self._measure_lag(eng)
+        lag = self._lag.get(eng)
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+    def _measure_lag(self, eng: Engine) -> Optional[float]:
+        try:
+            with eng.connect() as conn:
+                return float(conn.execute(self.LAG_QUERY).scalar())
+        except Exception as e:
+            logger.error(f"Replica lag check failed for {eng.url.host}: {e}")
+            return None
+
+
+replicas = ReplicaSet([])
+
+# Session.info flag: once set, every statement in the session goes to the primary
+USE_PRIMARY = "use_primary"
+
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs to a replica. Flushes, locking reads, raw SQL and anything
+    issued after the session has written go to the primary (read-your-writes).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or self.info.get(USE_PRIMARY):
+            self.info[USE_PRIMARY] = True
+            return engine
+        if isinstance(clause, Select) and clause._for_update_arg is None:
+            replica = replicas.pick()
+            if replica is not None:
+                return replica
+        return engine
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+
+
+def init_engines():
+    """Creates the connection pools and binds the session factories. Safe to call more than once."""
+    global engine, worker_engine
+    if engine is not None:
+        return
+    engine = _create_engine("api", _api_pool_size(), settings.DB_MAX_OVERFLOW, settings.DB_POOL_TIMEOUT)
+    worker_engine = _create_engine("worker", settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW,
+                                   settings.DB_WORKER_POOL_TIMEOUT)
+    WorkerSessionLocal.configure(bind=worker_engine)
+    replicas.engines = [
+        _create_engine(f"replica{i}", _api_pool_size(), settings.DB_MAX_OVERFLOW, settings.DB_POOL_TIMEOUT, url=url.strip())
+        for i, url in enumerate(settings.DATABASE_REPLICA_URLS.split(",")) if url.strip()
+    ]
+
+
+def dispose_engines():
+    global engine, worker_engine
+    for eng in [engine, worker_engine] + replicas.engines:
+        if eng is not None:
+            eng.dispose()
+    engine = worker_engine = None
+    replicas.engines = []
+
+
+def warm_pools() -> int:
+    """
+    Opens the idle connections the request pools are allowed to keep (pool_size), so a traffic
+    spike does not start with a wave of connects. Returns the number of connections checked.
+    """
+    warmed = 0
+    for eng in [engine] + replicas.engines:
+        if eng is None or not isinstance(eng.pool, QueuePool):
+            continue
+        # Hold them all at once: a connection returned straight away would just be handed out again
+        connections = []
+        try:
+            for _ in range(max(eng.pool.size() - eng.pool.checkedout(), 0)):
+                connections.append(eng.connect())
+        finally:
+            for conn in connections:
+                conn.close()
+        warmed += len(connections)
+    return warmed
+
 
 def get_db():
     db = SessionLocal()
@@ -14,11 +209,43 @@ def get_db():
     finally:
         db.close()
 
+
+def pool_stats() -> dict:
+    """Saturation snapshot of every connection pool in this process."""
+    stats = {}
+    named_engines = [("api", engine), ("worker", worker_engine)]
+    named_engines += [(f"replica{i}", eng) for i, eng in enumerate(replicas.engines)]
+    for name, eng in named_engines:
+        if eng is None:
+            continue
+        pool = eng.pool
+        if not isinstance(pool, QueuePool):
+            stats[name] = {"pool": type(pool).__name__}
+            continue
+        capacity = pool.size() + pool._max_overflow
+        metrics = pool_metrics.get(name, PoolMetrics())
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_ms_avg": round(metrics.wait_ms_avg, 3),
+            "wait_ms_max": round(metrics.wait_ms_max, 3),
+        }
+    return stats
+
+
 # --- Redis Setup ---
-redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
+redis_pool = None
 
 def get_redis_client():
     """Dependency to get a Redis client from the connection pool."""
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True)
     return Redis(connection_pool=redis_pool)
 
 Base = declarative_base()
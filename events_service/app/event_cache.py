@@ -0,0 +1,84 @@
+import logging
+from typing import List, Optional
+import orjson
+from redis import Redis
+from sqlalchemy.orm import Session
+
+from . import availability, crud
+from .config import settings
+
+logger = logging.getLogger("event_cache")
+
+# --- Redis Event Caches ---
+# event:{id}                          EventRead JSON of one event, EVENT_CACHE_TTL_SECONDS
+# events:list:{limit}:{description}   first page of GET /events, EVENT_LIST_CACHE_TTL_SECONDS
+# Only the static columns are trusted from a cached entry: its ticket counts are overlaid from
+# the availability map on every read, so the cache never shows stale availability. Rows freshly
+# read from the database get the overlay too, since tickets_sold of a sharded event lags its shards.
+# Events are never updated in place, so entries only need to expire, not be invalidated.
+
+
+def _detail_key(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+def _list_key(limit: int, include_description: bool) -> str:
+    return f"events:list:{limit}:{int(include_description)}"
+
+
+def _overlay_availability(redis_client: Redis, db: Session, rows: List[dict]) -> List[dict]:
+    _, available = availability.lookup(redis_client, db, [row["id"] for row in rows])
+    for row in rows:
+        if row["id"] in available:
+            row["available_tickets"] = available[row["id"]]
+            row["tickets_sold"] = row["total_tickets"] - row["available_tickets"]
+    return rows
+
+
+def _read(redis_client: Redis, key: str):
+    try:
+        cached = redis_client.get(key)
+    except Exception as e:
+        logger.error(f"Event cache unavailable, reading from the database: {e}")
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+
+def _write(redis_client: Redis, key: str, value, ttl: int) -> None:
+    try:
+        redis_client.set(key, orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        logger.error(f"Failed to cache {key}: {e}")
+
+
+def fill_event(redis_client: Redis, db: Session, event_id: int, ttl: Optional[int] = None) -> Optional[dict]:
+    row = crud.get_event_row(db, event_id)
+    if row is not None:
+        _write(redis_client, _detail_key(event_id), row, ttl or settings.EVENT_CACHE_TTL_SECONDS)
+    return row
+
+
+def get_event(redis_client: Redis, db: Session, event_id: int) -> Optional[dict]:
+    row = _read(redis_client, _detail_key(event_id))
+    if row is None:
+        row = fill_event(redis_client, db, event_id)
+        if row is None:
+            return None
+    return _overlay_availability(redis_client, db, [row])[0]
+
+
+def fill_first_page(redis_client: Redis, db: Session, limit: int, include_description: bool) -> List[dict]:
+    rows = crud.list_event_rows(db, 0, limit, include_description)
+    _write(redis_client, _list_key(limit, include_description), rows, settings.EVENT_LIST_CACHE_TTL_SECONDS)
+    return rows
+
+
+def list_events(redis_client: Redis, db: Session, skip: int, limit: int, include_description: bool) -> List[dict]:
+    """The first page is what everyone loads, so only it is cached; deeper pages go to the database."""
+    if skip != 0:
+        rows = crud.list_event_rows(db, skip, limit, include_description)
+    else:
+        rows = _read(redis_client, _list_key(limit, include_description))
+        if rows is None:
+            rows = fill_first_page(redis_client, db, limit, include_description)
+    return _overlay_availability(redis_client, db, rows) if rows else rows
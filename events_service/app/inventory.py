@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Iterable, List, Tuple
+from sqlalchemy import case, exists, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import WorkerSessionLocal
+
+logger = logging.getLogger("inventory")
+
+# --- Sharded Inventory ---
+# An event with inventory_shards > 1 keeps its capacity in event_inventory_shards rows.
+# Each reservation locks one shard with free capacity, so N bookings for the same event can
+# commit in parallel instead of queueing on the events row. A shard never sells past its own
+# capacity, and the capacities sum to total_tickets, so overselling stays impossible.
+
+
+def shard_rows(event_id: int, total_tickets: int, shards: int) -> List[dict]:
+    """Splits total_tickets as evenly as possible; the first shards take the remainder."""
+    base, remainder = divmod(total_tickets, shards)
+    return [
+        {"event_id": event_id, "shard_no": shard_no, "capacity": base + (shard_no < remainder), "sold": 0}
+        for shard_no in range(shards)
+    ]
+
+
+def create_shards(db: Session, events: Iterable[Tuple[int, int, int]]) -> None:
+    """Adds the shard rows for (event_id, total_tickets, inventory_shards) triples; unsharded events are skipped."""
+    rows = [row for event_id, total, shards in events if shards > 1 for row in shard_rows(event_id, total, shards)]
+    if rows:
+        db.execute(insert(models.EventInventoryShard), rows)
+
+
+def claim_ticket(db: Session, event_id: int) -> bool:
+    """
+    Takes one ticket from any shard of the event with capacity left. Returns False when sold out.
+    The shard stays locked until the caller commits.
+    """
+    Shard = models.EventInventoryShard
+    has_capacity = (Shard.event_id == event_id, Shard.sold < Shard.capacity)
+    while True:
+        # 1. Any shard nobody else is holding; random order spreads concurrent bookings across shards
+        shard = db.scalars(
+            select(Shard).where(*has_capacity).order_by(func.random()).limit(1).with_for_update(skip_locked=True)
+        ).first()
+        if shard is None:
+            # 2. Every shard with capacity is locked by an in-flight reservation: wait for one. Also picked
+            # at random, so waiters queue on all the shards rather than all on the same one
+            shard = db.scalars(
+                select(Shard).where(*has_capacity).order_by(func.random()).limit(1).with_for_update()
+            ).first()
+        if shard is not None:
+            shard.sold += 1
+            return True
+        # The shard we waited for filled up meanwhile; only report sold out once none has capacity
+        if not db.scalar(select(exists().where(*has_capacity))):
+            return False
+
+
+def release_ticket(db: Session, event_id: int) -> bool:
+    """Returns one ticket to any shard that has sold one. Returns False if none had."""
+    Shard = models.EventInventoryShard
+    has_sold = (Shard.event_id == event_id, Shard.sold > 0)
+    while True:
+        shard = db.scalars(
+            select(Shard).where(*has_sold).order_by(func.random()).limit(1).with_for_update(skip_locked=True)
+        ).first()
+        if shard is None:
+            shard = db.scalars(select(Shard).where(*has_sold).order_by(func.random()).limit(1).with_for_update()).first()
+        if shard is not None:
+            shard.sold -= 1
+            return True
+        if not db.scalar(select(exists().where(*has_sold))):
+            return False
+
+
+def available_tickets(db: Session, event_id: int) -> int:
+    Shard = models.EventInventoryShard
+    return db.scalar(select(func.coalesce(func.sum(Shard.capacity - Shard.sold), 0)).where(Shard.event_id == event_id))
+
+
+def available_tickets_column():
+    """
+    Available tickets of an events row, read from the shards for sharded events. Use it wherever the
+    count must be current: tickets_sold of a sharded event lags by up to INVENTORY_SYNC_INTERVAL_SECONDS.
+    """
+    Shard = models.EventInventoryShard
+    from_shards = (
+        select(func.coalesce(func.sum(Shard.capacity - Shard.sold), 0))
+        .where(Shard.event_id == models.Event.id)
+        .scalar_subquery()
+    )
+    return case((models.Event.inventory_shards > 1, from_shards),
+                else_=models.Event.total_tickets - models.Event.tickets_sold)
+
+
+def sync_tickets_sold(db: Session) -> int:
+    """Copies the shard totals onto events.tickets_sold for every sharded event that drifted."""
+    Shard = models.EventInventoryShard
+    sold = select(func.sum(Shard.sold)).where(Shard.event_id == models.Event.id).scalar_subquery()
+    count = db.execute(
+        update(models.Event)
+        .where(models.Event.inventory_shards > 1, models.Event.tickets_sold != sold)
+        .values(tickets_sold=sold)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return count
+
+
+def _sync() -> int:
+    db = WorkerSessionLocal()
+    try:
+        return sync_tickets_sold(db)
+    finally:
+        db.close()
+
+
+async def sync_periodically():
+    """
+    Keeps tickets_sold of sharded events close to the shards. Reads that must be current (the
+    availability map and its DB fallback, cached event views, analytics) go to the shards instead;
+    only the raw columns, as returned by search, lag by up to INVENTORY_SYNC_INTERVAL_SECONDS.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(_sync)
+        except Exception as e:
+            logger.error(f"Inventory sync failed: {e}")
+        await asyncio.sleep(settings.INVENTORY_SYNC_INTERVAL_SECONDS)
@@ -1,19 +1,144 @@
-import json
+import asyncio
 import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
-from .database import SessionLocal
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from .database import WorkerSessionLocal
 from .config import settings
-from . import crud
+from . import crud, messages
+from .tracing import start_span, kafka_headers, traceparent_from_headers
 
 logger = logging.getLogger("events_consumer")
 
+RETRY_BACKOFF_SECONDS = 1.0
+
+# The database is unreachable or saturated: no record is at fault, so none is dead-lettered
+TRANSIENT_ERRORS = (OperationalError, PoolTimeoutError)
+
+
+REPLY_STATUS = {"CONFIRMED": "CONFIRMED", "WAITLISTED": "WAITLISTED"}  # Anything else is a rejection
+
+
+def _decode(msg, message_type):
+    try:
+        return messages.decode(msg.value, message_type)
+    except messages.MessageDecodeError as e:
+        # A poison message would otherwise block its partition forever
+        logger.error(f"Skipping undecodable message at {msg.topic} partition {msg.partition} offset {msg.offset}: {e}")
+        return None
+
+
+def _apply_batch(records: list) -> list:
+    """
+    Applies a batch of BookingRequested and BookingCancelled records and returns the
+    (reply, traceparent) pairs to send. Runs in a worker thread. Already-processed bookings
+    are found with one inbox query for the whole batch and answered with their recorded result,
+    so redelivery never reserves a second ticket.
+    """
+    requests, cancellations = [], []
+    for msg in records:
+        if msg.topic == settings.KAFKA_CANCELLATION_TOPIC:
+            cancellation = _decode(msg, messages.BookingCancelled)
+            if cancellation:
+                cancellations.append((msg, cancellation))
+            continue
+        request = _decode(msg, messages.BookingRequested)
+        if request and request.status == "booked" and request.event_id:
+            requests.append((msg, request))
+
+    replies = []
+    db = WorkerSessionLocal()
+    try:
+        # 1. Bulk inbox check
+        processed = crud.get_processed_results(db, [request.booking_id for _, request in requests])
+
+        for msg, request in requests:
+            with start_span("consume_booking_events", traceparent=traceparent_from_headers(msg.headers),
+                            partition=msg.partition, offset=msg.offset,
+                            booking_id=request.booking_id, event_id=request.event_id) as span:
+                result = processed.get(request.booking_id)
+                if result is not None:
+                    span.set_attribute("duplicate", True)
+                    logger.info(f"Booking {request.booking_id} already processed ({result}), resending reply")
+                else:
+                    # 2. Attempt Reservation (records the inbox row in the same transaction)
+                    with start_span("reserve_ticket", event_id=request.event_id) as reserve_span:
+                        result = crud.reserve_ticket(db, request.event_id, request.booking_id,
+                                                     join_waitlist=request.join_waitlist, user_id=request.user_id)
+                        reserve_span.set_attribute("result", result)
+                    # The same booking can appear twice within one batch
+                    processed[request.booking_id] = result
+                    logger.info(f"Reservation result for Booking {request.booking_id}: {result}")
+
+                # 3. Determine Reply Status
+                reply_message = messages.BookingConfirmation(
+                    booking_id=request.booking_id,
+                    status=REPLY_STATUS.get(result, "REJECTED"),
+                    reason=result,  # Send "SOLD_OUT" or "NOT_FOUND" as metadata
+                    event_id=request.event_id
+                )
+                replies.append((reply_message, span.traceparent))
+
+        # 4. Cancellations after requests, so a request and its cancellation in one batch apply in order
+        for msg, cancellation in cancellations:
+            with start_span("consume_booking_cancellations", traceparent=traceparent_from_headers(msg.headers),
+                            partition=msg.partition, offset=msg.offset,
+                            booking_id=cancellation.booking_id, event_id=cancellation.event_id) as span:
+                promoted = crud.cancel_booking(db, cancellation.booking_id, cancellation.event_id,
+                                               cancellation.previous_status)
+                logger.info(f"Booking {cancellation.booking_id} cancelled")
+                if promoted is not None:
+                    # The released ticket went to the head of the waitlist: tell that booking
+                    span.set_attribute("promoted_booking_id", promoted)
+                    logger.info(f"Booking {promoted} promoted from the waitlist")
+                    replies.append((messages.BookingConfirmation(
+                        booking_id=promoted,
+                        status="CONFIRMED",
+                        reason="PROMOTED",
+                        event_id=cancellation.event_id
+                    ), span.traceparent))
+    finally:
+        db.close()
+    return replies
+
+
+def _apply_each(records: list) -> Tuple[list, List[tuple]]:
+    """
+    Applies a batch that keeps failing one record at a time, so the records at fault can be set
+    aside. Returns (replies, dead letters), a dead letter being a (message, error) pair for a record
+    that failed on its own. Transient errors are raised instead: they would fail every record alike.
+    """
+    replies, dead_letters = [], []
+    # Requests before cancellations, as in _apply_batch
+    for msg in sorted(records, key=lambda msg: msg.topic == settings.KAFKA_CANCELLATION_TOPIC):
+        try:
+            replies += _apply_batch([msg])
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            logger.error(f"Dead-lettering message at {msg.topic} partition {msg.partition} offset {msg.offset}: {e}")
+            dead_letters.append((msg, e))
+    return replies, dead_letters
+
+
+def _dead_letter_headers(msg, error: Exception) -> list:
+    """The original headers (trace context included) plus where the message came from and why it failed."""
+    return list(msg.headers or ()) + [
+        ("dead_letter_source", f"{msg.topic}:{msg.partition}:{msg.offset}".encode()),
+        ("dead_letter_error", repr(error).encode()[:1000]),
+    ]
+
 
 async def consume_booking_events():
     consumer = AIOKafkaConsumer(
         settings.KAFKA_BOOKING_TOPIC,
+        settings.KAFKA_CANCELLATION_TOPIC,
         bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
         group_id="events_service_group",
-        auto_offset_reset="earliest"
+        auto_offset_reset="earliest",
+        # Offsets are committed only once a batch is applied and answered (at-least-once, made safe by the inbox)
+        enable_auto_commit=False
     )
     producer = AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
 
@@ -22,40 +147,73 @@ async def consume_booking_events():
     logger.info("Events Consumer & Producer started.")
 
     try:
-        async for msg in consumer:
+        failures = 0  # Consecutive failed attempts at the current batch
+        while True:
+            batches = await consumer.getmany(
+                timeout_ms=settings.CONSUMER_BATCH_TIMEOUT_MS, max_records=settings.CONSUMER_BATCH_SIZE
+            )
+            records = [msg for partition_records in batches.values() for msg in partition_records]
+            if not records:
+                continue
+
             try:
-                payload = json.loads(msg.value.decode("utf-8"))
-                event_id = payload.get("event_id")
-                booking_id = payload.get("booking_id")
-                status = payload.get("status")
-
-                if status == "booked" and event_id:
-                    db = SessionLocal()
-                    try:
-                        # 1. Attempt Reservation
-                        result = crud.reserve_ticket(db, event_id)
-
-                        logger.info(f"Reservation result for Booking {booking_id}: {result}")
-
-                        # 2. Determine Reply Status
-                        reply_status = "CONFIRMED" if result == "CONFIRMED" else "REJECTED"
-
-                        # 3. Send Reply
-                        reply_message = {
-                            "booking_id": booking_id,
-                            "status": reply_status,
-                            "reason": result  # Send "SOLD_OUT" or "NOT_FOUND" as metadata
-                        }
-
-                        await producer.send_and_wait(
+                if failures < settings.CONSUMER_MAX_BATCH_ATTEMPTS:
+                    replies, dead_letters = await asyncio.to_thread(_apply_batch, records), []
+                else:
+                    # Still failing after the retries: likely a poison message, so isolate it rather than
+                    # block its partition forever. A bad booking is left PENDING for an operator to replay.
+                    replies, dead_letters = await asyncio.to_thread(_apply_each, records)
+
+                # 4. Send Replies, then acknowledge the whole batch
+                with start_span("send_confirmations", topic=settings.KAFKA_CONFIRMATION_TOPIC, count=len(replies)):
+                    pending = [
+                        await producer.send(
                             settings.KAFKA_CONFIRMATION_TOPIC,
-                            json.dumps(reply_message).encode("utf-8")
+                            messages.encode(reply),
+                            # Keyed by booking, so all replies for one booking stay in order on one partition
+                            key=str(reply.booking_id).encode(),
+                            headers=kafka_headers(traceparent)
                         )
-
-                    finally:
-                        db.close()
+                        for reply, traceparent in replies
+                    ]
+                    await asyncio.gather(*pending)
+                if dead_letters:
+                    pending = [
+                        await producer.send(settings.KAFKA_DEAD_LETTER_TOPIC, msg.value, key=msg.key,
+                                            headers=_dead_letter_headers(msg, error))
+                        for msg, error in dead_letters
+                    ]
+                    await asyncio.gather(*pending)
+                await consumer.commit()
+                failures = 0
             except Exception as e:
-                logger.error(f"Error processing message: {e}")
+                # Rewind to the start of the batch; bookings applied before the failure are skipped by the inbox
+                failures += 1
+                logger.error(f"Error processing batch of {len(records)} messages (attempt {failures}), retrying: {e}")
+                for tp, partition_records in batches.items():
+                    consumer.seek(tp, partition_records[0].offset)
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS)
     finally:
         await consumer.stop()
-        await producer.stop()
\ No newline at end of file
+        await producer.stop()
+
+
+def _purge_inbox() -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.INBOX_RETENTION_HOURS)
+    db = WorkerSessionLocal()
+    try:
+        return crud.purge_processed_messages(db, cutoff, settings.INBOX_CLEANUP_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+async def purge_inbox_periodically():
+    """Keeps the inbox bounded to the retention window."""
+    while True:
+        try:
+            deleted = await asyncio.to_thread(_purge_inbox)
+            if deleted:
+                logger.info(f"Purged {deleted} processed messages older than {settings.INBOX_RETENTION_HOURS}h")
+        except Exception as e:
+            logger.error(f"Inbox cleanup failed: {e}")
+        await asyncio.sleep(settings.INBOX_CLEANUP_INTERVAL_SECONDS)
@@ -1,56 +1,72 @@
 import logging
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine
-from . import models
-from .routers import events_router
+from .database import init_engines, dispose_engines, pool_stats
+from .routers import events_router, internal_router, profiling_router
 import redis.asyncio as redis
-from fastapi_limiter import FastAPILimiter
 from .config import settings
-
-# --- NEW IMPORT ---
-from .kafka_consumer import consume_booking_events
+from . import rate_limit, profiling
+from .load_shedding import load_monitor
+from .background import start_background_tasks, stop_background_tasks
+from .revocation import sync_revocations
+from .prewarm import prewarm_periodically
 
 logger = logging.getLogger("events_service")
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Events Service starting up...")
 
+    # Connection pools are created here rather than at import, so workers start without touching the DB
+    init_engines()
+
     # 1. Start Redis
     redis_client = None
     try:
         redis_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-        await FastAPILimiter.init(redis_client)
+        rate_limit.init(redis_client)
     except Exception as e:
-        logger.error(f"Failed to initialize FastAPILimiter: {e}")
+        logger.error(f"Failed to initialize rate limiter Redis client: {e}")
+
+    # 2. Revoked tokens, mirrored in memory for get_current_user
+    revocation_task = asyncio.create_task(sync_revocations(redis_client)) if redis_client else None
 
-    # 2. Start Kafka Consumer (Background Task) --- NEW SECTION ---
-    consumer_task = asyncio.create_task(consume_booking_events())
-    logger.info("Kafka Consumer task initiated.")
-    # -----------------------------------------------------------
+    # 3. Kafka consumers and periodic jobs; API-only deployments run them in app.worker instead
+    background_tasks = start_background_tasks(redis_client) if settings.RUN_BACKGROUND_TASKS else []
+
+    # 4. Overload signals for the load-shedding dependencies
+    monitor_task = asyncio.create_task(load_monitor.watch_loop_lag())
+
+    # 5. Warm caches and this process's pools ahead of scheduled on-sales
+    prewarm_task = asyncio.create_task(prewarm_periodically()) if settings.PREWARM_ENABLED else None
+
+    # 6. On-demand profiling (admin only)
+    if settings.PROFILING_ENABLED:
+        profiling.enable()
+        app.include_router(profiling_router.router)
 
     yield
 
     logger.info("Events Service shutting down...")
 
-    # 3. Graceful Shutdown --- NEW SECTION ---
-    consumer_task.cancel()
-    try:
-        await consumer_task
-    except asyncio.CancelledError:
-        logger.info("Kafka Consumer task cancelled.")
-    # ----------------------------------------
+    # 7. Graceful Shutdown
+    await stop_background_tasks(background_tasks)
+    monitor_task.cancel()
+    if revocation_task:
+        revocation_task.cancel()
+    if prewarm_task:
+        prewarm_task.cancel()
 
     if redis_client:
         await redis_client.close()
 
+    dispose_engines()
+
 
 app = FastAPI(title="Events Service API", version="1.0.0", lifespan=lifespan)
 
@@ -62,7 +78,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(profiling.ProfilingMiddleware)  # Pass-through unless PROFILING_ENABLED
+
 app.include_router(events_router.router)
+app.include_router(internal_router.router)
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # The connection pool is saturated: shed the request quickly instead of cascading timeouts
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    return pool_stats()
+
+
+@app.get("/metrics/load")
+def load_metrics():
+    return load_monitor.snapshot()
 
 
 @app.get("/")
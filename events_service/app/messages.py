@@ -0,0 +1,84 @@
+import json
+from dataclasses import dataclass
+from typing import ClassVar, Optional
+import msgpack
+
+# --- Wire Format ---
+# Every message is a msgpack array: [type_tag, version, field1, field2, ...]
+# Fields are positional, in declaration order. To evolve a schema, only ever
+# append new fields with a default and bump VERSION:
+#   - an older reader ignores the trailing fields it does not know about,
+#   - a newer reader fills the missing trailing fields from their defaults.
+# Never remove, reorder or retype an existing field.
+
+
+class MessageDecodeError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class BookingRequested:
+    """booking_service -> events_service: a new PENDING booking needs a ticket."""
+    TYPE: ClassVar[int] = 1
+    VERSION: ClassVar[int] = 2
+
+    event_id: int
+    booking_id: int
+    user_id: int
+    status: str = "booked"
+    join_waitlist: bool = False  # v2: queue for a released ticket instead of being rejected when sold out
+
+
+@dataclass(slots=True)
+class BookingConfirmation:
+    """events_service -> booking_service: outcome of a reservation."""
+    TYPE: ClassVar[int] = 2
+    VERSION: ClassVar[int] = 2
+
+    booking_id: int
+    status: str
+    reason: Optional[str] = None
+    event_id: Optional[int] = None  # v2: lets consumers attribute the outcome without a lookup
+
+
+@dataclass(slots=True)
+class BookingCancelled:
+    """booking_service -> events_service: release whatever the booking holds (ticket or waitlist place)."""
+    TYPE: ClassVar[int] = 3
+    VERSION: ClassVar[int] = 1
+
+    booking_id: int
+    event_id: int
+    user_id: int
+    previous_status: str  # Booking status when it was cancelled, as booking_service knew it
+
+
+_packer = msgpack.Packer(use_bin_type=True)
+
+
+def encode(message) -> bytes:
+    return _packer.pack([message.TYPE, message.VERSION, *[getattr(message, name) for name in message.__slots__]])
+
+
+def decode(data: bytes, message_type):
+    """Decodes `data` into an instance of `message_type`."""
+    # Legacy JSON payloads from before the binary format may still be in the outbox or on the topic
+    if data[:1] == b"{":
+        try:
+            raw = json.loads(data)
+            return message_type(**{name: raw[name] for name in message_type.__slots__ if name in raw})
+        except (ValueError, TypeError) as e:
+            raise MessageDecodeError(f"Malformed legacy JSON message: {e}") from e
+
+    try:
+        tag, version, *values = msgpack.unpackb(data, use_list=True, raw=False)
+    except (ValueError, TypeError, msgpack.UnpackException) as e:
+        raise MessageDecodeError(f"Malformed message: {e}") from e
+    if tag != message_type.TYPE:
+        raise MessageDecodeError(f"Expected message type {message_type.TYPE}, got {tag}")
+    if not isinstance(version, int) or version < 1:
+        raise MessageDecodeError(f"Invalid schema version {version}")
+    try:
+        return message_type(*values[:len(message_type.__slots__)])
+    except TypeError as e:
+        raise MessageDecodeError(f"Missing required fields for {message_type.__name__} v{version}: {e}") from e
@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Computed, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from .database import Base
 
+# Weighted document for full-text search: name matches rank above location, location above description
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -12,10 +21,76 @@ class Event(Base):
     price = Column(Float, nullable=False)
     total_tickets = Column(Integer, nullable=False)
     tickets_sold = Column(Integer, default=0, nullable=False)
+    # > 1: capacity lives in EventInventoryShard rows and tickets_sold is synced from them periodically
+    inventory_shards = Column(Integer, default=1, nullable=False)
     date = Column(DateTime(timezone=True), nullable=False)
+    # When tickets go on sale; caches and pools are pre-warmed ahead of it (see prewarm.py)
+    on_sale_at = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by Postgres on every insert/update; deferred so normal reads never load it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_DOCUMENT, persisted=True)))
+
+    # Don't RETURNING the generated tsvector on every insert; created_at is loaded on access instead
+    __mapper_args__ = {"eager_defaults": False}
 
+    __table_args__ = (
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram index for typo-tolerant name matching (pg_trgm)
+        Index("ix_events_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     @property
     def available_tickets(self):
-        return self.total_tickets - self.tickets_sold
\ No newline at end of file
+        return self.total_tickets - self.tickets_sold
+
+
+class EventInventoryShard(Base):
+    """
+    One slice of a sharded event's capacity. Reservations lock a single shard instead of the
+    event row, so concurrent bookings for a hot event proceed in parallel.
+    """
+    __tablename__ = "event_inventory_shards"
+
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    shard_no = Column(Integer, primary_key=True)
+    capacity = Column(Integer, nullable=False)
+    sold = Column(Integer, default=0, nullable=False)
+
+
+class WaitlistEntry(Base):
+    """A booking waiting for a ticket of a sold-out event; promoted in id (FIFO) order as tickets are released."""
+    __tablename__ = "waitlist_entries"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    booking_id = Column(Integer, nullable=False, unique=True)
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_waitlist_entries_event_fifo", "event_id", "id"),
+    )
+
+
+class ProcessedMessage(Base):
+    """
+    Inbox of booking messages already applied, written in the same transaction as their effect.
+    A redelivered message finds its row here and gets the recorded result instead of being applied twice.
+    """
+    __tablename__ = "processed_messages"
+
+    booking_id = Column(Integer, primary_key=True)
+    message_type = Column(String, primary_key=True)
+    result = Column(String, nullable=False)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class EventSalesRollup(Base):
+    """Per-event, per-minute sales counters maintained by the analytics consumer (see analytics.py)."""
+    __tablename__ = "event_sales_rollups"
+
+    event_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    requested = Column(Integer, default=0, nullable=False)
+    confirmed = Column(Integer, default=0, nullable=False)
+    rejected = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Set, Tuple
+from jose import jwt
+
+from . import availability, crud, event_cache, inventory
+from .config import settings
+from .database import SessionLocal, get_redis_client, warm_pools
+
+logger = logging.getLogger("prewarm")
+
+# --- On-Sale Pre-Warming ---
+# Every API process checks for events going on sale within PREWARM_LEAD_SECONDS and, once per
+# on-sale, gets ready for the spike:
+#   - shared state, by whichever process claims prewarm:{event_id}:{on_sale_at} first: exact
+#     availability (sharded events included) in the availability map, and the event detail in the
+#     Redis cache. The first listing page is left to its short TTL: kept past the on-sale, it would
+#     hide events created meanwhile;
+#   - its own state: open DB connections up to pool_size, SQLAlchemy's compiled statements for the
+#     hot reads, and the JWT code path, so the first requests find everything warm.
+
+
+def _claim(redis_client, event_id: int, on_sale_at: datetime) -> bool:
+    key = f"prewarm:{event_id}:{int(on_sale_at.timestamp())}"
+    return bool(redis_client.set(key, 1, nx=True, ex=settings.PREWARM_LEAD_SECONDS * 2))
+
+
+def _warm_shared(redis_client, db, event, on_sale_at: datetime, now: datetime) -> None:
+    available = inventory.available_tickets(db, event.id) if event.inventory_shards > 1 else event.available_tickets
+    availability.publish(redis_client, {event.id: available})
+    # Warmed minutes ahead, so the entry must outlive the on-sale moment rather than its usual TTL.
+    # Events are never updated in place, so the detail cannot go stale meanwhile.
+    until_on_sale = int((on_sale_at - now).total_seconds())
+    event_cache.fill_event(redis_client, db, event.id, until_on_sale + settings.EVENT_CACHE_TTL_SECONDS)
+
+
+def _warm_process(db, event_id: int) -> int:
+    jwt.decode(jwt.encode({"sub": "0"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM),
+               settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    # The same statements the hot routes run, so their compiled forms are cached in this process
+    crud.get_event(db, event_id)
+    crud.get_event_row(db, event_id)
+    crud.list_event_rows(db, 0, 100, True)
+    return warm_pools()
+
+
+def prewarm_upcoming(warmed: Set[Tuple[int, datetime]]) -> None:
+    now = datetime.now(timezone.utc)
+    warmed.difference_update([key for key in warmed if key[1] <= now])  # Past on-sales
+    db = SessionLocal()
+    try:
+        events = crud.get_upcoming_on_sales(db, now, now + timedelta(seconds=settings.PREWARM_LEAD_SECONDS))
+        redis_client = get_redis_client()
+        for event in events:
+            on_sale_at = event.on_sale_at.replace(tzinfo=event.on_sale_at.tzinfo or timezone.utc)
+            if (event.id, on_sale_at) in warmed:
+                continue
+            connections = _warm_process(db, event.id)
+            try:
+                if _claim(redis_client, event.id, on_sale_at):
+                    _warm_shared(redis_client, db, event, on_sale_at, now)
+                    logger.info(f"Pre-warmed caches for event {event.id}, on sale at {on_sale_at}")
+            except Exception as e:
+                logger.error(f"Failed to pre-warm caches for event {event.id}: {e}")
+            warmed.add((event.id, on_sale_at))
+            logger.info(f"Pre-warmed this process for event {event.id} ({connections} DB connections)")
+    finally:
+        db.close()
+
+
+async def prewarm_periodically():
+    warmed: Set[Tuple[int, datetime]] = set()
+    while True:
+        try:
+            await asyncio.to_thread(prewarm_upcoming, warmed)
+        except Exception as e:
+            logger.error(f"On-sale pre-warming failed: {e}")
+        await asyncio.sleep(settings.PREWARM_CHECK_INTERVAL_SECONDS)
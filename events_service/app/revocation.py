@@ -0,0 +1,86 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+from .config import settings
+
+logger = logging.getLogger("revocation")
+
+# --- Access Token Revocation ---
+# auth_service records revoked tokens (jti -> expiry) and users (user id -> revocation time) in
+# two Redis sorted sets and announces each one on a pub/sub channel. Every API process keeps a
+# copy in memory, so get_current_user checks revocation with two dict lookups and no I/O.
+# Pub/sub delivers revocations within milliseconds; the periodic snapshot catches up on anything
+# missed while the subscription was down. The names below are shared with auth_service.
+REVOKED_TOKENS_KEY = "revoked:tokens"
+REVOKED_USERS_KEY = "revoked:users"
+REVOCATION_CHANNEL = "revocations"
+
+
+class RevocationList:
+    def __init__(self):
+        self.tokens: Dict[str, float] = {}  # jti -> token expiry
+        self.users: Dict[str, float] = {}  # user id -> revoked at; tokens issued up to then are revoked
+
+    def is_revoked(self, jti: Optional[str], user_id: str, issued_at: Optional[float]) -> bool:
+        if jti is not None and jti in self.tokens:
+            return True
+        revoked_at = self.users.get(user_id)
+        return revoked_at is not None and (issued_at or 0) <= revoked_at
+
+    def apply(self, kind: str, member: str, score: float):
+        if kind == "token":
+            self.tokens[member] = score
+        elif kind == "user":
+            self.users[member] = max(score, self.users.get(member, 0))
+
+    async def resync(self, redis_client):
+        """Replaces the local copy with the Redis snapshot, dropping entries that can no longer match."""
+        now = time.time()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrangebyscore(REVOKED_TOKENS_KEY, now, "+inf", withscores=True)
+        pipe.zrangebyscore(REVOKED_USERS_KEY, now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60, "+inf", withscores=True)
+        tokens, users = await pipe.execute()
+        # Swapped in whole, so a lookup never sees a half-loaded snapshot
+        self.tokens = dict(tokens)
+        self.users = dict(users)
+
+
+revocations = RevocationList()
+
+
+async def sync_revocations(redis_client):
+    """Keeps `revocations` current for the lifetime of the process."""
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            # Subscribe before loading the snapshot, so nothing published in between is lost
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            await revocations.resync(redis_client)
+            resynced_at = time.monotonic()
+            logger.info(f"Revocation list loaded: {len(revocations.tokens)} tokens, {len(revocations.users)} users")
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    try:
+                        revocation = json.loads(message["data"])
+                        revocations.apply(revocation["kind"], revocation["id"], float(revocation["at"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.error(f"Ignoring malformed revocation message: {e}")
+                if time.monotonic() - resynced_at >= settings.REVOCATION_RESYNC_SECONDS:
+                    await revocations.resync(redis_client)
+                    resynced_at = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep serving with the last known list and reconnect
+            logger.error(f"Revocation sync failed, retrying: {e}")
+            await asyncio.sleep(settings.REVOCATION_RETRY_SECONDS)
+        finally:
+            try:
+                await pubsub.reset()
+            except Exception:
+                pass
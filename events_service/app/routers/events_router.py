@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from .. import models, schemas
-from ..auth import get_current_user # Reused from Auth service
-from fastapi_limiter.depends import RateLimiter
+from redis import Redis
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from ..database import get_db, get_redis_client
+from .. import models, schemas, crud, availability, analytics, inventory, event_cache
+from ..auth import get_current_user, get_current_admin_user # Reused from Auth service
+from ..rate_limit import RateLimiter
+from ..load_shedding import shed_critical, shed_non_critical
+from ..config import settings
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+MAX_AVAILABILITY_IDS = 500
+
 @router.post("/", response_model=schemas.EventRead, status_code=status.HTTP_201_CREATED)
 async def create_event(
     event: schemas.EventCreate,
+    shed: None = Depends(shed_critical),
     db: Session = Depends(get_db),
     user: dict = Depends(get_current_user), # Requires Login
     limit: None = Depends(RateLimiter(times=10, minutes=1))
@@ -19,16 +29,170 @@ async def create_event(
     # For now, any logged-in user can create an event
     db_event = models.Event(**event.model_dump())
     db.add(db_event)
+    db.flush()
+    inventory.create_shards(db, [(db_event.id, db_event.total_tickets, db_event.inventory_shards)])
     db.commit()
     db.refresh(db_event)
+    availability.record({db_event.id: db_event.available_tickets})
     return db_event
 
+async def _raw_records(request: Request) -> AsyncIterator[Union[bytes, dict]]:
+    """Yields records from an NDJSON stream line by line, or from a JSON array body."""
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    for item in items:
+        yield item
+
+
+async def _aenumerate(iterator: AsyncIterator):
+    index = 0
+    async for item in iterator:
+        yield index, item
+        index += 1
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'record'}: {err['msg']}" for err in e.errors())
+
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import_events(
+    request: Request,
+    shed: None = Depends(shed_non_critical),
+    db: Session = Depends(get_db),
+    admin: dict = Depends(get_current_admin_user),
+    limit: None = Depends(RateLimiter(times=10, minutes=1))
+):
+    """
+    Accepts EventCreate records as a JSON array or as an NDJSON stream (Content-Type: application/x-ndjson).
+    Records are validated and inserted in chunks of BULK_IMPORT_CHUNK_SIZE, one transaction per chunk.
+    Invalid records are reported by index and never abort the rest of the import.
+    """
+    event_ids: List[int] = []
+    errors: List[dict] = []
+    chunk: List[Tuple[int, dict]] = []
+
+    async def flush():
+        created, failed = await run_in_threadpool(crud.insert_event_chunk, db, chunk)
+        event_ids.extend(created[index] for index, _ in chunk if index in created)
+        errors.extend({"index": index, "error": error} for index, error in failed.items())
+        chunk.clear()
+
+    async for index, raw in _aenumerate(_raw_records(request)):
+        if index >= settings.BULK_IMPORT_MAX_RECORDS:
+            errors.append({"index": index, "error": f"Import limited to {settings.BULK_IMPORT_MAX_RECORDS} records; the rest was not read"})
+            break
+        try:
+            if isinstance(raw, bytes):
+                event = schemas.EventCreate.model_validate_json(raw)
+            else:
+                event = schemas.EventCreate.model_validate(raw)
+        except ValidationError as e:
+            errors.append({"index": index, "error": _validation_message(e)})
+            continue
+        chunk.append((index, event.model_dump()))
+        if len(chunk) >= settings.BULK_IMPORT_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    errors.sort(key=lambda error: error["index"])
+    return {"created": len(event_ids), "event_ids": event_ids, "errors": errors}
+
 @router.get("/", response_model=List[schemas.EventRead])
 async def list_events(
     skip: int = 0,
     limit_num: int = 100,
+    include_description: bool = True,
+    shed: None = Depends(shed_non_critical),
+    db: Session = Depends(get_db),
+    redis_client: Redis = Depends(get_redis_client),
+    limit: None = Depends(RateLimiter(times=100, minutes=1))
+):
+    # Rows go straight to orjson: no ORM hydration and no EventRead validation on the hot browse path.
+    # Grid views can pass include_description=false to skip the largest column.
+    rows = await run_in_threadpool(event_cache.list_events, redis_client, db, skip, limit_num, include_description)
+    return ORJSONResponse(rows)
+
+@router.get("/search", response_model=schemas.EventSearchPage)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit_num: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    shed: None = Depends(shed_non_critical),
+    db: Session = Depends(get_db),
+    limit: None = Depends(RateLimiter(times=100, minutes=1))
+):
+    """
+    Ticket counts in search results come straight from the events table; for events with sharded
+    inventory they can lag by a few seconds. GET /events/availability has the live counts.
+    """
+    try:
+        rows, next_cursor = await run_in_threadpool(crud.search_event_rows, db, q, limit_num, cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return ORJSONResponse({"items": rows, "next_cursor": next_cursor})
+
+@router.get("/availability", response_model=schemas.AvailabilityMap)
+def bulk_availability(
+    ids: str = Query(..., description=f"Comma-separated event ids, at most {MAX_AVAILABILITY_IDS}"),
+    since: Optional[int] = Query(None, description="Only return events changed after this version"),
+    shed: None = Depends(shed_non_critical),
     db: Session = Depends(get_db),
+    redis_client: Redis = Depends(get_redis_client),
+    limit: None = Depends(RateLimiter(times=600, minutes=1))
+):
+    try:
+        event_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma-separated integers")
+    if not event_ids or len(event_ids) > MAX_AVAILABILITY_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_AVAILABILITY_IDS} event ids are required",
+        )
+
+    version, available = availability.lookup(redis_client, db, event_ids, since)
+    return ORJSONResponse({"version": version, "availability": {str(k): v for k, v in available.items()}})
+
+@router.get("/{event_id:int}", response_model=schemas.EventRead)
+async def get_event(
+    event_id: int,
+    shed: None = Depends(shed_non_critical),
+    db: Session = Depends(get_db),
+    redis_client: Redis = Depends(get_redis_client),
     limit: None = Depends(RateLimiter(times=100, minutes=1))
 ):
-    events = db.query(models.Event).offset(skip).limit(limit_num).all()
-    return events
\ No newline at end of file
+    # Static fields from the Redis cache, ticket counts from the availability map
+    event = await run_in_threadpool(event_cache.get_event, redis_client, db, event_id)
+    if event is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return ORJSONResponse(event)
+
+@router.get("/{event_id:int}/sales", response_model=schemas.EventSales)
+def event_sales(
+    event_id: int,
+    minutes: int = Query(60, ge=1, le=1440),
+    shed: None = Depends(shed_non_critical),
+    db: Session = Depends(get_db),
+    admin: dict = Depends(get_current_admin_user)
+):
+    # Reads the precomputed rollups only, so dashboards never compete with the booking path
+    db_event = crud.get_event(db, event_id)
+    if db_event is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return analytics.sales_summary(db, db_event, minutes)
@@ -0,0 +1,43 @@
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from .. import crud, schemas
+from ..config import settings
+from ..database import get_db, USE_PRIMARY
+from ..kafka_consumer import REPLY_STATUS
+from ..load_shedding import shed_critical
+from ..tracing import start_span, TRACEPARENT_HEADER
+
+
+def verify_internal_token(x_internal_token: str = Header("")):
+    # Service-to-service only: not routed by nginx, and refused unless the shared token matches
+    if not settings.INTERNAL_API_TOKEN or not hmac.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+router = APIRouter(prefix="/internal", tags=["Internal"], include_in_schema=False,
+                   dependencies=[Depends(verify_internal_token)])
+
+
+@router.post("/reservations", response_model=schemas.ReservationResult)
+def reserve(
+    request: Request,
+    reservation: schemas.ReservationRequest,
+    shed: None = Depends(shed_critical),
+    db: Session = Depends(get_db)
+):
+    """
+    Synchronous twin of the BookingRequested consumer, for booking_service's fast path. It shares
+    the inbox, so whichever of the two sees a booking first decides it and the other one returns
+    that same result.
+    """
+    db.info[USE_PRIMARY] = True  # Locking reads and read-your-writes: never a replica
+    with start_span("reserve_ticket.fast_path", traceparent=request.headers.get(TRACEPARENT_HEADER),
+                    booking_id=reservation.booking_id, event_id=reservation.event_id) as span:
+        result = crud.get_processed_results(db, [reservation.booking_id]).get(reservation.booking_id)
+        if result is None:
+            result = crud.reserve_ticket(db, reservation.event_id, reservation.booking_id,
+                                         join_waitlist=reservation.join_waitlist, user_id=reservation.user_id)
+        span.set_attribute("result", result)
+    return {"booking_id": reservation.booking_id, "status": REPLY_STATUS.get(result, "REJECTED"), "reason": result}
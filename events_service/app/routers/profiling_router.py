@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from .. import profiling
+from ..auth import get_current_admin_user
+from ..config import settings
+
+# Admin-only; mounted by main.py only when PROFILING_ENABLED is set
+router = APIRouter(prefix="/admin/profiling", tags=["Profiling"], dependencies=[Depends(get_current_admin_user)])
+
+
+@router.post("/token")
+def issue_profile_token():
+    """Token for the X-Profile-Token header: each request carrying it is profiled on its own."""
+    ttl = settings.PROFILING_TOKEN_TTL_SECONDS
+    return {"header": profiling.PROFILE_TOKEN_HEADER, "token": profiling.issue_token(ttl), "expires_in": ttl}
+
+
+@router.post("/sample", status_code=status.HTTP_202_ACCEPTED)
+def sample_process(seconds: float = Query(10.0, gt=0)):
+    """Samples every thread of the process that serves this call, for `seconds`."""
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    profile_id = profiling.profile_process(seconds)
+    if profile_id is None:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many profiles running")
+    return {"profile_id": profile_id, "seconds": seconds}
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+def download_profile(profile_id: str):
+    """Folded stacks, one `frame;frame;... count` per line: feed to flamegraph.pl or speedscope."""
+    folded = profiling.load(profile_id)
+    if folded is None:
+        if profiling.is_running(profile_id):
+            return PlainTextResponse("Profile still running\n", status_code=status.HTTP_202_ACCEPTED)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(
+        folded, headers={"Content-Disposition": f'attachment; filename="{settings.SERVICE_NAME}-{profile_id}.folded"'}
+    )
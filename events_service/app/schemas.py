@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class EventBase(BaseModel):
     name: str
@@ -9,9 +9,20 @@ class EventBase(BaseModel):
     price: float
     total_tickets: int
     date: datetime
+    on_sale_at: Optional[datetime] = None
 
 class EventCreate(EventBase):
-    pass
+    # Split capacity across this many inventory rows; raise it for on-sales with heavy contention
+    inventory_shards: int = Field(1, ge=1, le=64)
+
+class BulkImportError(BaseModel):
+    index: int  # Position of the record in the submitted list/stream, from 0
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    event_ids: List[int]
+    errors: List[BulkImportError]
 
 class EventRead(EventBase):
     id: int
@@ -20,4 +31,58 @@ class EventRead(EventBase):
     available_tickets: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EventSummary(BaseModel):
+    id: int
+    name: str
+    location: str
+    price: float
+    total_tickets: int
+    tickets_sold: int
+    available_tickets: int
+    date: datetime
+    created_at: datetime
+
+class EventSearchResult(EventSummary):
+    rank: float
+
+class EventSearchPage(BaseModel):
+    items: List[EventSearchResult]
+    next_cursor: Optional[str] = None
+
+class AvailabilityMap(BaseModel):
+    version: Optional[int] = None  # None when served straight from the database
+    availability: Dict[int, int]
+
+class ReservationRequest(BaseModel):
+    booking_id: int
+    event_id: int
+    user_id: int
+    join_waitlist: bool = False
+
+class ReservationResult(BaseModel):
+    booking_id: int
+    status: str  # CONFIRMED, WAITLISTED or REJECTED, as in BookingConfirmation
+    reason: str
+
+class SalesBucket(BaseModel):
+    bucket_start: datetime
+    requested: int
+    confirmed: int
+    rejected: int
+
+    class Config:
+        from_attributes = True
+
+class EventSales(BaseModel):
+    event_id: int
+    window_minutes: int
+    buckets: List[SalesBucket]
+    requested: int
+    confirmed: int
+    rejected: int
+    confirm_ratio: Optional[float] = None  # None until any booking was decided
+    bookings_per_minute: float
+    sell_through_pct: float
+    projected_sellout_at: Optional[datetime] = None  # None while nothing is selling
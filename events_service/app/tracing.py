@@ -0,0 +1,161 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger("tracing")
+
+# W3C trace context header, used both for HTTP and Kafka message headers
+TRACEPARENT_HEADER = "traceparent"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+# --- Span Exporter ---
+# Finished spans of sampled traces are written as JSON lines using OTLP field names, so the file
+# can be inspected directly or shipped by an OpenTelemetry Collector filelog receiver.
+# Callers only put the record on a queue; a listener thread does the file I/O and rotation,
+# so the event loop never waits on the disk.
+_exporter: Optional[logging.Logger] = None
+
+
+def _get_exporter() -> logging.Logger:
+    global _exporter
+    if _exporter is None:
+        directory = os.path.dirname(settings.TRACE_EXPORT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            settings.TRACE_EXPORT_PATH,
+            maxBytes=settings.TRACE_EXPORT_MAX_BYTES,
+            backupCount=settings.TRACE_EXPORT_BACKUP_COUNT,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, handler)
+        listener.start()
+        atexit.register(listener.stop)  # Flushes what is still queued
+
+        exporter = logging.getLogger("tracing.export")
+        exporter.propagate = False
+        exporter.setLevel(logging.INFO)
+        exporter.addHandler(logging.handlers.QueueHandler(records))
+        _exporter = exporter
+    return _exporter
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None, attributes: Optional[dict] = None,
+                 sampled: bool = True):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: Optional[int] = None
+        self.status = "OK"
+
+    @property
+    def traceparent(self) -> str:
+        # The trace-flags field carries the sampling decision downstream
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.end_time_unix_nano = time.time_ns()
+
+    def to_dict(self) -> dict:
+        return {
+            "service.name": settings.SERVICE_NAME,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_unix_nano,
+            "endTimeUnixNano": self.end_time_unix_nano,
+            "durationMs": round((self.end_time_unix_nano - self.start_time_unix_nano) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Returns (trace_id, parent_span_id, sampled) from a traceparent string, or None if malformed."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 0x01)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+@contextmanager
+def start_span(name: str, traceparent: Optional[str] = None, **attributes):
+    """
+    Records a span around the wrapped block.
+    The parent is taken from `traceparent` if given, otherwise from the current span.
+    """
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent)
+    if remote:
+        trace_id, parent_span_id, sampled = remote
+    elif parent:
+        trace_id, parent_span_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        # New trace: the sampling decision is made once here and inherited by every span after it
+        trace_id, parent_span_id = secrets.token_hex(16), None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+
+    span = Span(name, trace_id, parent_span_id, attributes, sampled)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "ERROR"
+        span.set_attribute("exception.message", str(e))
+        raise
+    finally:
+        span.end()
+        _current_span.reset(token)
+        if settings.TRACING_ENABLED and span.sampled:
+            try:
+                _get_exporter().info(json.dumps(span.to_dict(), default=str))
+            except Exception as e:
+                logger.error(f"Failed to export span {span.name}: {e}")
+
+
+def current_traceparent() -> Optional[str]:
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+# --- Kafka Header Helpers ---
+def kafka_headers(traceparent: Optional[str] = None) -> list:
+    """Builds aiokafka message headers carrying the given (or current) trace context."""
+    traceparent = traceparent or current_traceparent()
+    return [(TRACEPARENT_HEADER, traceparent.encode("utf-8"))] if traceparent else []
+
+
+def traceparent_from_headers(headers: Optional[Iterable[Tuple[str, bytes]]]) -> Optional[str]:
+    for key, value in headers or ():
+        if key == TRACEPARENT_HEADER and value:
+            return value.decode("utf-8")
+    return None
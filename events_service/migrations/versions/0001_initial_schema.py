@@ -0,0 +1,39 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created by the old import-time create_all() already have this table
+    if sa.inspect(op.get_bind()).has_table("events"):
+        return
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("total_tickets", sa.Integer(), nullable=False),
+        sa.Column("tickets_sold", sa.Integer(), nullable=False),
+        sa.Column("date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_events_id", "events", ["id"])
+    op.create_index("ix_events_name", "events", ["name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_name", table_name="events")
+    op.drop_index("ix_events_id", table_name="events")
+    op.drop_table("events")
@@ -0,0 +1,41 @@
+"""full-text and trigram search on events
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # tsvector and pg_trgm are Postgres-only
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column("events", sa.Column("search_vector", TSVECTOR(), sa.Computed(SEARCH_DOCUMENT, persisted=True)))
+    op.create_index("ix_events_search_vector", "events", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_events_name_trgm", "events", ["name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_events_name_trgm", table_name="events")
+    op.drop_index("ix_events_search_vector", table_name="events")
+    op.drop_column("events", "search_vector")
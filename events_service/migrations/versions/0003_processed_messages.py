@@ -0,0 +1,29 @@
+"""inbox of processed booking messages
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "processed_messages",
+        sa.Column("booking_id", sa.Integer(), primary_key=True),
+        sa.Column("message_type", sa.String(), primary_key=True),
+        sa.Column("result", sa.String(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_processed_messages_processed_at", "processed_messages", ["processed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_processed_messages_processed_at", table_name="processed_messages")
+    op.drop_table("processed_messages")
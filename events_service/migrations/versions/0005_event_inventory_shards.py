@@ -0,0 +1,31 @@
+"""sharded event inventory
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing events keep a single inventory row: the events row itself
+    op.add_column("events", sa.Column("inventory_shards", sa.Integer(), nullable=False, server_default="1"))
+    op.create_table(
+        "event_inventory_shards",
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id"), primary_key=True),
+        sa.Column("shard_no", sa.Integer(), primary_key=True),
+        sa.Column("capacity", sa.Integer(), nullable=False),
+        sa.Column("sold", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("event_inventory_shards")
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.drop_column("inventory_shards")
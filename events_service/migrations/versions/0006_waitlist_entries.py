@@ -0,0 +1,30 @@
+"""per-event waitlist
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id"), nullable=False),
+        sa.Column("booking_id", sa.Integer(), nullable=False, unique=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_waitlist_entries_event_fifo", "waitlist_entries", ["event_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_waitlist_entries_event_fifo", table_name="waitlist_entries")
+    op.drop_table("waitlist_entries")
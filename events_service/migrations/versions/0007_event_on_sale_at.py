@@ -0,0 +1,23 @@
+"""event on-sale time
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("on_sale_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_events_on_sale_at", "events", ["on_sale_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_on_sale_at", table_name="events")
+    op.drop_column("events", "on_sale_at")
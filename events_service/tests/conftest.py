@@ -0,0 +1,76 @@
+# Imports for testing tools
+import fakeredis
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Import your actual application code
+from app.database import Base
+from app import models # To create the database tables
+
+# --- Test Database Setup ---
+# An in-memory SQLite database shared by every connection (StaticPool), so tests need no
+# PostgreSQL and leave no file behind
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The search column is a Postgres tsvector generated from the text columns: on SQLite it is plain
+# text, generated by stand-ins for the two functions it is computed with
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_as_text(type_, compiler, **kw):
+    return "TEXT"
+
+@event.listens_for(engine, "connect")
+def _register_search_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("to_tsvector", 2, lambda config, text: text, deterministic=True)
+    dbapi_connection.create_function("setweight", 2, lambda vector, weight: vector, deterministic=True)
+
+# --- Database Management Fixtures ---
+@pytest.fixture(scope="session", autouse=True)
+def setup_db():
+    """Creates the tables once for the whole test session."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    """
+    Provides a session for code that commits and rolls back itself (the inbox relies on both),
+    and empties the tables after the test.
+    """
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+@pytest.fixture(scope="function")
+def committing_sessions(mocker):
+    """
+    For code that opens and commits its own sessions: points it at the test database and
+    empties the tables afterwards. Pass the module paths whose session factory should be replaced.
+    """
+    def patch(*targets, factory: str = "SessionLocal"):
+        for target in targets:
+            mocker.patch(f"{target}.{factory}", TestingSessionLocal)
+        return TestingSessionLocal
+    yield patch
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+@pytest.fixture
+def redis_client(mocker):
+    """Points the availability map at an in-memory Redis."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch("app.availability.get_redis_client", return_value=client)
+    return client
@@ -0,0 +1,45 @@
+# Tests for the sales analytics counters
+from types import SimpleNamespace
+
+import pytest
+
+from app import analytics, messages
+from app.analytics import SalesAggregator
+from app.config import settings
+
+MINUTE = 60_000
+
+@pytest.fixture(autouse=True)
+def nothing_counted_before(mocker):
+    """Every booking is new to the deduplication set."""
+    mocker.patch("app.analytics._first_seen", side_effect=lambda keys: keys)
+
+def _reply(booking_id: int, status: str, timestamp: int, reason=None):
+    message = messages.BookingConfirmation(booking_id=booking_id, status=status, reason=reason, event_id=7)
+    return SimpleNamespace(topic=settings.KAFKA_CONFIRMATION_TOPIC, value=messages.encode(message), timestamp=timestamp)
+
+def _bucket(requested: int = 0, confirmed: int = 0, rejected: int = 0) -> list:
+    return [requested, confirmed, rejected]
+
+def _counts(aggregator: SalesAggregator) -> dict:
+    aggregator.settle()
+    return {key: list(bucket) for key, bucket in aggregator.drain().items()}
+
+def test_requests_and_outcomes_are_counted_per_minute():
+    aggregator = SalesAggregator()
+    request = messages.BookingRequested(event_id=7, booking_id=1, user_id=10)
+    analytics._count(aggregator, SimpleNamespace(topic=settings.KAFKA_BOOKING_TOPIC,
+                                                 value=messages.encode(request), timestamp=0))
+    analytics._count(aggregator, _reply(1, "CONFIRMED", 1000))
+    analytics._count(aggregator, _reply(2, "REJECTED", MINUTE))
+
+    assert _counts(aggregator) == {(7, 0): _bucket(requested=1, confirmed=1), (7, 1): _bucket(rejected=1)}
+
+def test_promoted_booking_is_counted_once_as_confirmed():
+    """WAITLISTED is not an outcome: only the later PROMOTED confirmation counts, and never as a rejection."""
+    aggregator = SalesAggregator()
+    analytics._count(aggregator, _reply(1, "WAITLISTED", 0))
+    assert _counts(aggregator) == {}
+
+    analytics._count(aggregator, _reply(1, "CONFIRMED", MINUTE, reason="PROMOTED"))
+    assert _counts(aggregator) == {(7, 1): _bucket(confirmed=1)}
@@ -0,0 +1,53 @@
+# Tests for the Redis availability map: deltas and the backfill after a miss
+from datetime import datetime, timezone
+
+from app import availability, models
+
+def _event(db_session, total_tickets: int, tickets_sold: int = 0) -> int:
+    event = models.Event(name="Concert", location="Hall", price=10.0, total_tickets=total_tickets,
+                         tickets_sold=tickets_sold, date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db_session.add(event)
+    db_session.commit()
+    return event.id
+
+def _cached(redis_client, event_id: int):
+    return redis_client.hget(availability.TICKETS_KEY, str(event_id))
+
+def test_miss_is_loaded_from_the_database_and_backfilled(db_session, redis_client):
+    event_id = _event(db_session, total_tickets=10, tickets_sold=3)
+
+    assert availability.lookup(redis_client, db_session, [event_id])[1] == {event_id: 7}
+    assert _cached(redis_client, event_id) == "7"
+
+def test_changes_apply_to_cached_events_only(db_session, redis_client):
+    event_id = _event(db_session, total_tickets=10)
+    availability.record_change(event_id, -1)
+    assert _cached(redis_client, event_id) is None
+
+    availability.publish(redis_client, {event_id: 10})
+    availability.record_change(event_id, -1)
+    assert _cached(redis_client, event_id) == "9"
+
+def test_backfill_is_dropped_when_a_change_lands_after_the_database_read(db_session, redis_client, mocker):
+    """
+    A reservation committing after the backfill's read publishes a delta nobody applies, since the
+    event is not cached yet. Writing the value read would leave a count too high for good.
+    """
+    event_id = _event(db_session, total_tickets=10)
+    load_from_db = availability._load_from_db
+
+    def load_then_reserve(db, event_ids):
+        loaded = load_from_db(db, event_ids)
+        db.query(models.Event).filter(models.Event.id == event_id).update({"tickets_sold": 1})
+        db.commit()
+        availability.record_change(event_id, -1)
+        return loaded
+
+    load = mocker.patch("app.availability._load_from_db", side_effect=load_then_reserve)
+    assert availability.lookup(redis_client, db_session, [event_id])[1] == {event_id: 10}
+    assert _cached(redis_client, event_id) is None
+
+    # The next lookup reads the reservation and backfills
+    load.side_effect = load_from_db
+    assert availability.lookup(redis_client, db_session, [event_id])[1] == {event_id: 9}
+    assert _cached(redis_client, event_id) == "9"
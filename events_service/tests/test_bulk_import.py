@@ -0,0 +1,31 @@
+# Tests for inserting bulk-imported events chunk by chunk
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from app import availability, crud, models
+
+def _values(name, total_tickets: int = 100, shards: int = 1) -> dict:
+    return {"name": name, "description": None, "location": "Hall", "price": 10.0, "total_tickets": total_tickets,
+            "inventory_shards": shards, "date": datetime(2030, 1, 1, tzinfo=timezone.utc), "on_sale_at": None}
+
+def test_chunk_is_inserted_in_one_statement(db_session, redis_client):
+    created, errors = crud.insert_event_chunk(db_session, [(0, _values("A")), (1, _values("B", 10, shards=4))])
+
+    assert errors == {} and sorted(created) == [0, 1]
+    assert db_session.scalar(select(func.count()).select_from(models.EventInventoryShard)) == 4
+    assert redis_client.hget(availability.TICKETS_KEY, str(created[1])) == "10"
+
+def test_bad_row_is_reported_and_the_rest_of_the_chunk_inserted(db_session, redis_client):
+    """The database rejects the whole chunk; the per-row savepoint retry isolates the row at fault."""
+    rows = [(3, _values("A")), (4, _values(None)), (5, _values("C", 10, shards=2))]
+
+    created, errors = crud.insert_event_chunk(db_session, rows)
+
+    assert sorted(created) == [3, 5]
+    assert list(errors) == [4] and "NOT NULL" in errors[4]
+    names = db_session.scalars(select(models.Event.name).order_by(models.Event.id)).all()
+    assert names == ["A", "C"]
+    # The sharded row got its shards, and only created events were published
+    assert db_session.scalar(select(func.count()).select_from(models.EventInventoryShard)) == 2
+    assert sorted(redis_client.hkeys(availability.TICKETS_KEY)) == sorted(str(created[i]) for i in (3, 5))
@@ -0,0 +1,86 @@
+# Tests for cancellations: releasing tickets, promoting the waitlist and the inbox
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app import availability, crud, inventory, models
+
+def _event(db_session, redis_client, total_tickets: int, shards: int = 1) -> int:
+    """Creates an event with its shards and publishes its availability, like the create endpoint."""
+    event = models.Event(name="Concert", location="Hall", price=10.0, total_tickets=total_tickets,
+                         inventory_shards=shards, date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db_session.add(event)
+    db_session.flush()
+    inventory.create_shards(db_session, [(event.id, total_tickets, shards)])
+    db_session.commit()
+    availability.publish(redis_client, {event.id: total_tickets})
+    return event.id
+
+def _available(db_session, event_id: int) -> int:
+    return db_session.scalar(select(inventory.available_tickets_column()).where(models.Event.id == event_id))
+
+def _published(redis_client, event_id: int) -> int:
+    return int(redis_client.hget(availability.TICKETS_KEY, str(event_id)))
+
+def _request_result(db_session, booking_id: int) -> str:
+    return crud.get_processed_results(db_session, [booking_id])[booking_id]
+
+@pytest.mark.parametrize("shards", [1, 4])
+def test_cancelling_a_confirmed_booking_releases_its_ticket(db_session, redis_client, shards):
+    event_id = _event(db_session, redis_client, total_tickets=8, shards=shards)
+    assert crud.reserve_ticket(db_session, event_id, booking_id=1) == "CONFIRMED"
+    assert _published(redis_client, event_id) == 7
+
+    assert crud.cancel_booking(db_session, 1, event_id, "CONFIRMED") is None
+
+    assert _available(db_session, event_id) == 8
+    assert _published(redis_client, event_id) == 8
+    assert _request_result(db_session, 1) == "CANCELLED"
+
+def test_released_ticket_goes_to_the_head_of_the_waitlist(db_session, redis_client):
+    """The ticket stays sold and passes to the oldest waiting booking, whose request now reads CONFIRMED."""
+    event_id = _event(db_session, redis_client, total_tickets=1)
+    assert crud.reserve_ticket(db_session, event_id, booking_id=1) == "CONFIRMED"
+    assert crud.reserve_ticket(db_session, event_id, booking_id=2, join_waitlist=True, user_id=20) == "WAITLISTED"
+    assert crud.reserve_ticket(db_session, event_id, booking_id=3, join_waitlist=True, user_id=30) == "WAITLISTED"
+
+    assert crud.cancel_booking(db_session, 1, event_id, "CONFIRMED") == 2
+
+    assert _available(db_session, event_id) == 0
+    assert _published(redis_client, event_id) == 0
+    assert _request_result(db_session, 2) == "CONFIRMED"
+    assert db_session.scalars(select(models.WaitlistEntry.booking_id)).all() == [3]
+
+def test_cancelling_a_waitlisted_booking_only_leaves_the_waitlist(db_session, redis_client):
+    event_id = _event(db_session, redis_client, total_tickets=1)
+    crud.reserve_ticket(db_session, event_id, booking_id=1)
+    crud.reserve_ticket(db_session, event_id, booking_id=2, join_waitlist=True, user_id=20)
+
+    assert crud.cancel_booking(db_session, 2, event_id, "WAITLISTED") is None
+
+    assert _available(db_session, event_id) == 0  # Booking 1 keeps its ticket
+    assert db_session.scalar(select(func.count()).select_from(models.WaitlistEntry)) == 0
+    assert _request_result(db_session, 2) == "CANCELLED"
+
+def test_redelivered_cancellation_is_a_no_op(db_session, redis_client):
+    event_id = _event(db_session, redis_client, total_tickets=2)
+    crud.reserve_ticket(db_session, event_id, booking_id=1)
+    crud.reserve_ticket(db_session, event_id, booking_id=2)
+    crud.cancel_booking(db_session, 1, event_id, "CONFIRMED")
+
+    assert crud.cancel_booking(db_session, 1, event_id, "CONFIRMED") is None
+
+    # Only booking 1's ticket came back, once
+    assert _available(db_session, event_id) == 1
+    assert _published(redis_client, event_id) == 1
+
+def test_cancellation_before_the_request_keeps_the_request_from_taking_a_ticket(db_session, redis_client):
+    """The cancellation can overtake the booking request; the request then finds it already cancelled."""
+    event_id = _event(db_session, redis_client, total_tickets=1)
+
+    assert crud.cancel_booking(db_session, 1, event_id, "PENDING") is None
+    assert crud.reserve_ticket(db_session, event_id, booking_id=1) == "CANCELLED"
+
+    assert _available(db_session, event_id) == 1
+    assert _published(redis_client, event_id) == 1
@@ -0,0 +1,48 @@
+# Tests for the internal reservation API used by booking_service's fast path
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import get_db
+from app.routers import internal_router
+
+TOKEN = "internal-secret"
+
+@pytest.fixture
+def client(db_session, redis_client, mocker):
+    mocker.patch("app.routers.internal_router.settings.INTERNAL_API_TOKEN", TOKEN)
+    app = FastAPI()
+    app.include_router(internal_router.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    return TestClient(app)
+
+@pytest.fixture
+def event_id(db_session) -> int:
+    event = models.Event(name="Concert", location="Hall", price=10.0, total_tickets=1,
+                         date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db_session.add(event)
+    db_session.commit()
+    return event.id
+
+def _reserve(client: TestClient, booking_id: int, event_id: int, token=TOKEN):
+    headers = {"X-Internal-Token": token} if token is not None else {}
+    return client.post("/internal/reservations", headers=headers,
+                       json={"booking_id": booking_id, "event_id": event_id, "user_id": 10})
+
+@pytest.mark.parametrize("token", [None, "", "wrong-secret"])
+def test_missing_or_wrong_token_is_forbidden(client, event_id, token):
+    assert _reserve(client, 1, event_id, token).status_code == 403
+
+def test_routes_are_disabled_without_a_configured_token(client, event_id, mocker):
+    mocker.patch("app.routers.internal_router.settings.INTERNAL_API_TOKEN", "")
+    assert _reserve(client, 1, event_id, "").status_code == 403
+
+def test_reservation_is_decided_once(client, event_id, db_session):
+    """A retry (or the saga's copy of the same booking) gets the first result back, not a second ticket."""
+    assert _reserve(client, 1, event_id).json() == {"booking_id": 1, "status": "CONFIRMED", "reason": "CONFIRMED"}
+    assert _reserve(client, 1, event_id).json()["status"] == "CONFIRMED"
+    assert _reserve(client, 2, event_id).json() == {"booking_id": 2, "status": "REJECTED", "reason": "SOLD_OUT"}
+    assert db_session.get(models.Event, event_id).tickets_sold == 1
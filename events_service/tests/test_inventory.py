@@ -0,0 +1,87 @@
+# Tests for sharded inventory: claims never oversell, releases never go negative
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import false, select
+
+from app import crud, inventory, models
+
+def _event(db_session, total_tickets: int, shards: int) -> int:
+    event = models.Event(name="Concert", location="Hall", price=10.0, total_tickets=total_tickets,
+                         inventory_shards=shards, date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db_session.add(event)
+    db_session.flush()
+    inventory.create_shards(db_session, [(event.id, total_tickets, shards)])
+    db_session.commit()
+    return event.id
+
+def _shards(db_session, event_id: int) -> list:
+    Shard = models.EventInventoryShard
+    return [(shard.capacity, shard.sold) for shard in
+            db_session.scalars(select(Shard).where(Shard.event_id == event_id).order_by(Shard.shard_no))]
+
+@pytest.fixture(params=[False, True], ids=["skip_locked", "blocking_fallback"])
+def all_shards_locked(request, db_session, mocker):
+    """
+    With True, every SKIP LOCKED pick finds nothing, as if concurrent reservations held all the shards,
+    so each claim and release goes through the blocking fallback. Returns the number of fallbacks taken.
+    """
+    taken = []
+    if request.param:
+        scalars = db_session.scalars
+
+        def scalars_with_shards_locked(stmt, *args, **kwargs):
+            for_update = getattr(stmt, "_for_update_arg", None)
+            if for_update is not None and for_update.skip_locked:
+                taken.append(stmt)
+                return scalars(stmt.where(false()), *args, **kwargs)
+            return scalars(stmt, *args, **kwargs)
+        mocker.patch.object(db_session, "scalars", side_effect=scalars_with_shards_locked)
+    return taken
+
+def test_shard_rows_split_the_capacity_evenly():
+    rows = inventory.shard_rows(7, total_tickets=10, shards=4)
+    assert [row["capacity"] for row in rows] == [3, 3, 2, 2]
+    assert sum(row["capacity"] for row in rows) == 10
+
+def _each_committed(db_session, operation, event_id: int, times: int) -> list:
+    """Runs a claim or release `times` times, one transaction each like reserve_ticket and cancel_booking."""
+    results = []
+    for _ in range(times):
+        results.append(operation(db_session, event_id))
+        db_session.commit()
+    return results
+
+def test_claims_stop_at_total_capacity(db_session, all_shards_locked):
+    event_id = _event(db_session, total_tickets=10, shards=4)
+
+    claims = _each_committed(db_session, inventory.claim_ticket, event_id, 12)
+
+    assert claims == [True] * 10 + [False] * 2
+    assert all(sold == capacity for capacity, sold in _shards(db_session, event_id))
+    assert inventory.available_tickets(db_session, event_id) == 0
+    if all_shards_locked:
+        assert len(all_shards_locked) >= 12
+
+def test_releases_stop_when_nothing_is_sold(db_session, all_shards_locked):
+    event_id = _event(db_session, total_tickets=10, shards=4)
+    _each_committed(db_session, inventory.claim_ticket, event_id, 3)
+
+    releases = _each_committed(db_session, inventory.release_ticket, event_id, 5)
+
+    assert releases == [True] * 3 + [False] * 2
+    assert all(sold == 0 for _, sold in _shards(db_session, event_id))
+
+def test_sync_copies_the_shard_totals_onto_tickets_sold(db_session):
+    sharded = _event(db_session, total_tickets=10, shards=4)
+    unsharded = _event(db_session, total_tickets=10, shards=1)
+    for _ in range(6):
+        crud.reserve_ticket(db_session, sharded)
+    inventory.release_ticket(db_session, sharded)
+    crud.reserve_ticket(db_session, unsharded)
+    db_session.commit()
+
+    assert inventory.sync_tickets_sold(db_session) == 1
+    assert db_session.get(models.Event, sharded).tickets_sold == 5
+    assert db_session.get(models.Event, unsharded).tickets_sold == 1  # Unsharded events are left alone
+    assert inventory.sync_tickets_sold(db_session) == 0  # Nothing drifted since
@@ -0,0 +1,138 @@
+# Tests for the booking consumer: redelivered batches and poison messages
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+
+from app import crud, kafka_consumer, messages, models
+from app.config import settings
+
+@pytest.fixture
+def session_factory(committing_sessions, redis_client):
+    return committing_sessions("app.kafka_consumer", factory="WorkerSessionLocal")
+
+@pytest.fixture
+def event_id(session_factory) -> int:
+    db = session_factory()
+    event = models.Event(name="Concert", location="Hall", price=10.0, total_tickets=1,
+                         date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db.add(event)
+    db.commit()
+    try:
+        return event.id
+    finally:
+        db.close()
+
+def _request(booking_id: int, event_id: int, offset: int):
+    message = messages.BookingRequested(event_id=event_id, booking_id=booking_id, user_id=10)
+    return SimpleNamespace(topic=settings.KAFKA_BOOKING_TOPIC, partition=0, offset=offset, key=None,
+                           value=messages.encode(message), headers=[], timestamp=0)
+
+def _statuses(replies: list) -> dict:
+    return {reply.booking_id: (reply.status, reply.reason) for reply, _ in replies}
+
+def _tickets_sold(session_factory, event_id: int) -> int:
+    db = session_factory()
+    try:
+        return db.get(models.Event, event_id).tickets_sold
+    finally:
+        db.close()
+
+def test_redelivered_batch_is_answered_from_the_inbox(session_factory, event_id):
+    """A batch applied again after a failed commit resends the recorded results and takes no second ticket."""
+    batch = [_request(1, event_id, 0), _request(2, event_id, 1)]
+    first = _statuses(kafka_consumer._apply_batch(batch))
+    assert first == {1: ("CONFIRMED", "CONFIRMED"), 2: ("REJECTED", "SOLD_OUT")}
+
+    assert _statuses(kafka_consumer._apply_batch(batch)) == first
+    assert _tickets_sold(session_factory, event_id) == 1
+
+def _poison(mocker, booking_id: int, error: Exception):
+    """Makes reserving `booking_id` fail with `error`; other bookings reserve normally."""
+    reserve_ticket = crud.reserve_ticket
+
+    def reserve(db, event_id, booking_id_, **kwargs):
+        if booking_id_ == booking_id:
+            raise error
+        return reserve_ticket(db, event_id, booking_id_, **kwargs)
+    mocker.patch("app.kafka_consumer.crud.reserve_ticket", side_effect=reserve)
+
+def test_record_failing_on_its_own_is_dead_lettered(session_factory, event_id, mocker):
+    _poison(mocker, 1, DataError("INSERT", {}, Exception("value out of range")))
+
+    replies, dead_letters = kafka_consumer._apply_each([_request(1, event_id, 0), _request(2, event_id, 1)])
+
+    assert _statuses(replies) == {2: ("CONFIRMED", "CONFIRMED")}  # The ticket went to the next booking
+    assert [msg.offset for msg, _ in dead_letters] == [0]
+
+def test_unreachable_database_dead_letters_nothing(session_factory, event_id, mocker):
+    _poison(mocker, 1, OperationalError("SELECT", {}, Exception("connection refused")))
+    with pytest.raises(OperationalError):
+        kafka_consumer._apply_each([_request(1, event_id, 0), _request(2, event_id, 1)])
+
+class _Stopped(Exception):
+    pass
+
+class _FakeConsumer:
+    """Serves the same batch until it is committed, like a consumer seeking back after a failure."""
+
+    def __init__(self, records: list):
+        self.records = records
+        self.seeks = 0
+        self.committed = False
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def getmany(self, **kwargs):
+        if self.committed:
+            raise _Stopped()
+        return {"partition-0": self.records}
+
+    def seek(self, tp, offset):
+        self.seeks += 1
+
+    async def commit(self):
+        self.committed = True
+
+class _FakeProducer:
+    def __init__(self):
+        self.sent = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def send(self, topic, value, key=None, headers=None):
+        self.sent.append((topic, key, dict(headers or ())))
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+def test_poison_message_is_dead_lettered_after_the_retries(session_factory, event_id, mocker):
+    """The partition moves on: the bad record goes to the dead-letter topic and the rest is answered and committed."""
+    _poison(mocker, 1, DataError("INSERT", {}, Exception("value out of range")))
+    consumer = _FakeConsumer([_request(1, event_id, 0), _request(2, event_id, 1)])
+    producer = _FakeProducer()
+    mocker.patch("app.kafka_consumer.AIOKafkaConsumer", return_value=consumer)
+    mocker.patch("app.kafka_consumer.AIOKafkaProducer", return_value=producer)
+    mocker.patch("app.kafka_consumer.RETRY_BACKOFF_SECONDS", 0)
+    mocker.patch("app.kafka_consumer.settings.CONSUMER_MAX_BATCH_ATTEMPTS", 2)
+
+    with pytest.raises(_Stopped):
+        asyncio.run(kafka_consumer.consume_booking_events())
+
+    assert consumer.seeks == 2 and consumer.committed
+    topics = [topic for topic, _, _ in producer.sent]
+    assert topics == [settings.KAFKA_CONFIRMATION_TOPIC, settings.KAFKA_DEAD_LETTER_TOPIC]
+    assert producer.sent[0][1] == b"2"  # Booking 2's reply
+    _, _, headers = producer.sent[1]
+    assert headers["dead_letter_source"] == f"{settings.KAFKA_BOOKING_TOPIC}:0:0".encode()
+    assert b"value out of range" in headers["dead_letter_error"]
@@ -0,0 +1,34 @@
+# Tests for on-sale pre-warming of the shared caches
+from datetime import datetime, timedelta, timezone
+
+from app import availability, event_cache, models, prewarm
+from app.config import settings
+
+def _event(db_session, name: str, on_sale_at=None) -> models.Event:
+    event = models.Event(name=name, location="Hall", price=10.0, total_tickets=100, on_sale_at=on_sale_at,
+                         date=datetime(2030, 1, 1, tzinfo=timezone.utc))
+    db_session.add(event)
+    db_session.commit()
+    return event
+
+def test_event_detail_is_kept_past_the_on_sale(db_session, redis_client):
+    now = datetime.now(timezone.utc)
+    on_sale_at = now + timedelta(minutes=4)
+    event = _event(db_session, "Concert", on_sale_at=on_sale_at)
+
+    prewarm._warm_shared(redis_client, db_session, event, on_sale_at, now)
+
+    assert redis_client.ttl(f"event:{event.id}") > settings.EVENT_CACHE_TTL_SECONDS
+    assert redis_client.hget(availability.TICKETS_KEY, str(event.id)) == "100"
+
+def test_events_created_after_warming_are_listed(db_session, redis_client):
+    """The first listing page is not warmed, so it never outlives its short TTL."""
+    now = datetime.now(timezone.utc)
+    on_sale_at = now + timedelta(minutes=4)
+    event = _event(db_session, "Concert", on_sale_at=on_sale_at)
+    prewarm._warm_shared(redis_client, db_session, event, on_sale_at, now)
+    assert not redis_client.keys("events:list:*")
+
+    created = _event(db_session, "Festival")
+    rows = event_cache.list_events(redis_client, db_session, 0, 100, True)
+    assert [row["id"] for row in rows] == [event.id, created.id]
@@ -0,0 +1,78 @@
+# Tests for full-text search: the query it builds, keyset pagination and the route
+import asyncio
+import threading
+from collections import namedtuple
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app import crud
+from app.routers import events_router
+
+# search_event_rows needs Postgres (tsvector, pg_trgm) to run, so these tests inspect the statement
+# it builds and feed it rows instead
+Row = namedtuple("Row", "id name rank")
+
+def _search(mocker, rows: list, limit: int, cursor=None):
+    """Runs search_event_rows against a session returning `rows`; returns (result, next_cursor, SQL)."""
+    db = mocker.MagicMock()
+    db.execute.return_value = rows
+    result, next_cursor = crud.search_event_rows(db, "jazz festival", limit, cursor)
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    return result, next_cursor, sql
+
+def test_cursor_round_trips_the_rank_exactly():
+    """The keyset compares ranks for equality, so the cursor must not round the float."""
+    rank = 0.1 + 0.2
+    assert crud.decode_search_cursor(crud.encode_search_cursor(rank, 42)) == (rank, 42)
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm8tY29sb24=", "YWJjOmRlZg=="])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        crud.decode_search_cursor(cursor)
+
+def test_search_matches_full_text_or_trigram_and_orders_by_rank(mocker):
+    _, _, sql = _search(mocker, [], limit=20)
+
+    assert "events.search_vector @@ websearch_to_tsquery" in sql
+    assert "events.name %% " in sql  # Typo-tolerant match served by the trigram index (% escaped for psycopg2)
+    assert "ts_rank_cd(events.search_vector" in sql and "similarity(events.name" in sql
+    assert sql.split("ORDER BY")[1].strip().startswith("CAST(ts_rank_cd(")
+    assert "DESC, events.id DESC" in sql
+    assert "LIMIT" in sql
+
+def test_full_page_returns_a_cursor_after_its_last_row(mocker):
+    rows = [Row(9, "a", 0.9), Row(7, "b", 0.5), Row(8, "c", 0.5)]  # One more than the page
+    result, next_cursor, _ = _search(mocker, rows, limit=2)
+
+    assert [row["id"] for row in result] == [9, 7]
+    assert crud.decode_search_cursor(next_cursor) == (0.5, 7)
+
+def test_last_page_has_no_cursor(mocker):
+    result, next_cursor, _ = _search(mocker, [Row(9, "a", 0.9)], limit=2)
+    assert len(result) == 1 and next_cursor is None
+
+def test_cursor_continues_after_the_last_rank_and_id(mocker):
+    """Ties on rank are broken by id, so rows sharing the last row's rank are not skipped."""
+    _, _, sql = _search(mocker, [], limit=2, cursor=crud.encode_search_cursor(0.5, 7))
+    assert "events.id) < (" in sql
+
+def test_search_route_queries_off_the_event_loop(mocker):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def search(db, q, limit, cursor):
+        threads.append(threading.get_ident())
+        return [], None
+
+    mocker.patch("app.routers.events_router.crud.search_event_rows", side_effect=search)
+    response = asyncio.run(events_router.search_events(q="jazz", limit_num=20, cursor=None, shed=None, db=None, limit=None))
+
+    assert response.status_code == 200
+    assert threads and threads[0] != loop_thread
+
+def test_search_route_rejects_a_malformed_cursor():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(events_router.search_events(q="jazz", limit_num=20, cursor="not-base64!", shed=None, db=None, limit=None))
+    assert exc.value.status_code == 400
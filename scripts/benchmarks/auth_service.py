@@ -0,0 +1,26 @@
+"""auth_service hot paths: token issue/decode, password and refresh token hashing."""
+from harness import bench, report
+
+from jose import jwt
+
+from app import auth
+from app.config import settings
+from app.routers.auth_router import hash_refresh_token, verify_refresh_token
+
+PASSWORD = "correct horse battery staple"
+
+access_token = auth.create_access_token({"sub": "42", "role": "user"})
+refresh_token = auth.create_refresh_token({"sub": "42"})
+password_hash = auth.hash_password(PASSWORD)
+refresh_token_hash = hash_refresh_token(refresh_token)
+
+bench("create_access_token", lambda: auth.create_access_token({"sub": "42", "role": "user"}))
+# The decode step of get_current_user; the user lookup that follows is a DB round trip
+bench("decode_access_token", lambda: jwt.decode(access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]))
+# bcrypt: the time is spent in its C extension
+bench("hash_password", lambda: auth.hash_password(PASSWORD), calibration="native")
+bench("verify_password", lambda: auth.verify_password(PASSWORD, password_hash), calibration="native")
+bench("hash_refresh_token", lambda: hash_refresh_token(refresh_token), calibration="native")
+bench("verify_refresh_token", lambda: verify_refresh_token(refresh_token, refresh_token_hash), calibration="native")
+
+report()
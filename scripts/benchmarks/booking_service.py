@@ -0,0 +1,20 @@
+"""booking_service hot paths: stateless auth, outbox payload encoding, confirmation decoding."""
+from harness import bench, report
+
+from jose import jwt
+from starlette.requests import Request
+
+from app import messages
+from app.auth import get_current_user
+from app.config import settings
+
+access_token = jwt.encode({"sub": "42", "role": "user", "jti": "0" * 32}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+request = Request({"type": "http", "headers": []})
+booking_requested = messages.BookingRequested(event_id=7, booking_id=123456, user_id=42, join_waitlist=True)
+confirmation = messages.encode(messages.BookingConfirmation(booking_id=123456, status="CONFIRMED", event_id=7))
+
+bench("get_current_user", lambda: get_current_user(request, access_token))
+bench("encode_booking_requested", lambda: messages.encode(booking_requested))
+bench("decode_booking_confirmation", lambda: messages.decode(confirmation, messages.BookingConfirmation))
+
+report()
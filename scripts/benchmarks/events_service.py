@@ -0,0 +1,65 @@
+"""
+events_service hot paths: stateless auth, booking request decoding, event page serialization and,
+when BENCH_DATABASE_URL points at a migrated events database, reserve_ticket.
+"""
+import itertools
+import os
+from datetime import datetime, timezone
+from typing import List
+
+from harness import bench, report
+
+from jose import jwt
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+from app import messages, models, schemas
+from app.auth import get_current_user
+from app.config import settings
+
+access_token = jwt.encode({"sub": "42", "role": "user", "jti": "0" * 32}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+request = Request({"type": "http", "headers": []})
+booking_requested = messages.encode(messages.BookingRequested(event_id=7, booking_id=123456, user_id=42))
+
+now = datetime.now(timezone.utc)
+page = [
+    models.Event(
+        id=i, name=f"Event {i}", description="An evening of live music " * 4, location="Main Hall",
+        price=49.5, total_tickets=5000, tickets_sold=i * 7, date=now, created_at=now,
+    )
+    for i in range(100)
+]
+page_adapter = TypeAdapter(List[schemas.EventRead])
+
+bench("get_current_user", lambda: get_current_user(request, access_token))
+bench("decode_booking_requested", lambda: messages.decode(booking_requested, messages.BookingRequested))
+# What the list routes do per response: validate from ORM objects, then dump to JSON
+bench("serialize_event_page_100", lambda: page_adapter.dump_json(page_adapter.validate_python(page, from_attributes=True)))
+
+if os.environ.get("BENCH_DATABASE_URL"):
+    from sqlalchemy import delete
+
+    from app import availability, crud
+    from app.database import init_engines, dispose_engines, WorkerSessionLocal
+
+    if not os.environ.get("BENCH_REDIS_URL"):
+        # No Redis to publish to: time the database path only, without connection-refused noise
+        availability.record = lambda available: None
+
+    init_engines()
+    db = WorkerSessionLocal()  # The Kafka consumer's session, as in production
+    event = models.Event(name="Benchmark", location="Nowhere", price=1, total_tickets=10**9, date=now)
+    db.add(event)
+    db.commit()
+    booking_ids = itertools.count(-(10**12))  # Far from real booking ids
+    try:
+        bench("reserve_ticket", lambda: crud.reserve_ticket(db, event.id, booking_id=next(booking_ids)))
+    finally:
+        db.rollback()
+        db.execute(delete(models.ProcessedMessage).where(models.ProcessedMessage.booking_id < -(10**11)))
+        db.execute(delete(models.Event).where(models.Event.id == event.id))
+        db.commit()
+        db.close()
+        dispose_engines()
+
+report()
@@ -0,0 +1,69 @@
+"""
+Shared timing loop for the per-service benchmark modules.
+
+Each module runs in a fresh interpreter with the service directory as its working directory
+(see scripts/benchmark.py), registers its functions with `bench` and ends with `report()`,
+which prints {name: [calibration units, seconds per call]} as JSON on the last line of stdout.
+
+Absolute times move with the machine and with whatever else it is running, so every benchmark
+run is interleaved with a run of a fixed calibration loop, and the result is the best benchmark
+run divided by the best calibration run. A slower or busier machine slows both sides alike.
+Benchmarks that spend their time in native code pass calibration="native".
+"""
+import hashlib
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict
+
+# The service's `app` package lives in the working directory, not next to this file
+sys.path.insert(0, os.getcwd())
+
+REPEAT = int(os.environ.get("BENCH_REPEAT", "15"))  # Runs per benchmark, each interleaved with a calibration run
+
+_results: Dict[str, list] = {}
+
+
+def _python_workload() -> int:
+    # Roughly the mix of the hot paths: interpreted dict/str work, JSON and a hash in C
+    payload = {"sub": "12345", "role": "user", "scopes": ["read", "write"], "n": 0}
+    total = 0
+    for i in range(50):
+        payload["n"] = i
+        encoded = json.dumps(payload, sort_keys=True)
+        total += len(hashlib.sha256(encoded.encode()).hexdigest()) + len(json.loads(encoded))
+    return total
+
+
+def _native_workload() -> bytes:
+    # A compute-bound loop in native code, for benchmarks that spend their time in one (bcrypt)
+    return hashlib.pbkdf2_hmac("sha256", b"calibration", b"salt", 20_000)
+
+
+def _timer(fn: Callable[[], object]):
+    """Returns a function timing one run of fn(), long enough (at least 0.2s) to be measured reliably."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return lambda: timer.timeit(number) / number
+
+
+# Interpreter speed varies between processes (memory layout) in ways native code does not,
+# so each benchmark is calibrated against the kind of work it mostly does
+_calibrations = {"python": _timer(_python_workload), "native": _timer(_native_workload)}
+
+
+def bench(name: str, fn: Callable[[], object], calibration: str = "python") -> None:
+    """Records fn()'s best per-call time over REPEAT runs, in calibration units and in seconds."""
+    calibrate = _calibrations[calibration]
+    measure = _timer(fn)
+    calibrations, times = [], []
+    for _ in range(REPEAT):
+        calibrations.append(calibrate())
+        times.append(measure())
+    # Interference only ever slows a run down, so the fastest run of each side is its truest time
+    _results[name] = [min(times) / min(calibrations), min(times)]
+
+
+def report() -> None:
+    print(json.dumps(_results))